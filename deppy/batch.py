@@ -0,0 +1,145 @@
+"""Used to find the newer versions of many requirements at once, over the
+versions of all their packages packed into one sorted list of integers.
+
+numpy is used when it is installed, and a pure python search otherwise,
+with the same results.
+
+"""
+
+import bisect
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import consts
+from . import versions
+
+
+def is_vectorized():
+    """Return whether the batch search is vectorized (numpy is installed)
+
+    the pure python search of a table is slower than searching the versions
+    of each package on its own, so it is only worth it when vectorized
+    """
+
+    return numpy is not None
+
+
+class VersionTable(object):
+    """The versions of many packages, packed into one sorted list of codes
+
+    every distinct version key of the table gets a rank, its position among
+    all the keys, and a version is coded as package index * stride + rank.
+    the versions of a package are thus contiguous and in version order, and
+    the versions of any package newer than any version are found by a
+    single search over the whole list. codes are python integers, which
+    never overflow however large the table grows (numpy searches a 64 bit
+    copy of them)
+    """
+
+    def __init__(self, all_versions, extra_versions=()):
+        """
+        :param all_versions: a dictionary mapping package name to list of
+        versions
+        :param extra_versions: versions to rank as well, though no package
+        has them (e.g. the versions requirements start from)
+        """
+        self.packages = sorted(all_versions)
+        self.indexes = dict(
+            (name, index) for index, name in enumerate(self.packages))
+        keys = set(versions.version_key(version)
+                   for version in extra_versions)
+        for name in self.packages:
+            keys.update(versions.version_key(version)
+                        for version in all_versions[name])
+        self.ranks = dict((key, rank) for rank, key in enumerate(sorted(keys)))
+        self.stride = len(self.ranks) + 1
+
+        # equal versions (e.g. 1.0 and 1.0.0) keep their order
+        coded = sorted(
+            ((index * self.stride
+              + self.ranks[versions.version_key(version)], version)
+             for index, name in enumerate(self.packages)
+             for version in all_versions[name]),
+            key=operator.itemgetter(0))
+        self.codes = [code for code, _ in coded]
+        self.versions = [version for _, version in coded]
+        self._numpy_codes = None
+
+    def _search(self, targets):
+        """Return, for each target code, the number of codes not above it
+
+        :param targets: list of codes
+        """
+
+        if numpy is None:
+            return [bisect.bisect_right(self.codes, target)
+                    for target in targets]
+        if self._numpy_codes is None:
+            self._numpy_codes = numpy.array(self.codes, dtype=numpy.int64)
+        return numpy.searchsorted(
+            self._numpy_codes, numpy.array(targets, dtype=numpy.int64),
+            side='right').tolist()
+
+    def newer(self, requirements):
+        """Return, for each (package name, version) pair, the versions of the
+        package newer than the version, in version order
+
+        all the versions of the package are returned for an empty version.
+        the versions must be ranked by the table, and the packages in it
+
+        :param requirements: list of (package name, version) pairs
+        """
+
+        starts = []
+        ends = []
+        for name, version in requirements:
+            base = self.indexes[name] * self.stride
+            # an empty version comes before every version of the package
+            starts.append(base + self.ranks[versions.version_key(version)]
+                          if version else base - 1)
+            ends.append(base + self.stride - 1)
+        bounds = self._search(starts + ends)
+        count = len(requirements)
+        return [self.versions[bounds[index]:bounds[count + index]]
+                for index in range(count)]
+
+
+def get_new_available(my_versions, all_versions, known=None):
+    """Same as versions.get_new_available, searching the newer versions of
+    all the requirements in one pass
+
+    :param my_versions: a dictionary mapping package name to list of versions
+    in current project
+    :param all_versions: a dictionary mapping package name to list of versions
+    available on pypi
+    :param known: a dictionary mapping (package name, version in current
+    project) to newer versions already found, None if there are none
+    """
+
+    known = known or {}
+    requirements = [
+        (name, require)
+        for name in sorted(my_versions) if name in all_versions
+        for require in my_versions[name]]
+    pending = [(name, versions.specifier_set(require).baseline)
+               for name, require in requirements
+               if known.get((name, require)) is None]
+    found = iter(VersionTable(
+        dict((name, all_versions[name]) for name, _ in pending),
+        [baseline for _, baseline in pending]
+    ).newer(pending)) if pending else iter(())
+
+    result = []
+    for name, require in requirements:
+        newer = known.get((name, require))
+        if newer is None:
+            newer = next(found)
+        result.append({
+            consts.PACKAGE_KEY: name,
+            consts.REQUIRE_KEY: require,
+            consts.NEW_VERS_KEY: newer})
+    return result
@@ -0,0 +1,663 @@
+"""Used to keep data fetched from pypi on disk between runs.
+
+"""
+
+import os
+import json
+import time
+import urllib
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import cStringIO
+
+from . import consts
+from . import payloads
+
+
+def _get_umask():
+    """Return the umask of the process (only settable along with reading
+    it, so it is read once, before any thread writes files)
+
+    """
+
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _get_umask()
+
+
+def write_atomic(path, data):
+    """Write data to a file so readers never see a partially written file
+
+    the file gets the mode any new file gets (0666 less the umask), not the
+    owner only mode of temporary files, so caches and states may be shared
+
+    :param path: the file path
+    :param data: the data to write
+    """
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # windows does not allow renaming over an existing file
+            os.remove(path)
+            os.rename(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _bundle_names(key):
+    """Return the names of the body file and metadata file of an entry, as
+    kept in a bundle (and by FileCache)
+
+    :param key: the entry key
+    """
+
+    base_name = urllib.quote(key, safe='')
+    return base_name + consts.CACHE_BODY_SUFFIX, \
+        base_name + consts.CACHE_META_SUFFIX
+
+
+class _Cache(object):
+    """The parts shared by all the caches: freshness, validators, lookup
+    counts, pruning and bundles
+
+    an entry is a dictionary holding the ETag/Last-Modified validators of a
+    pypi response and the last time it was known to be up to date, along
+    with the record reduced from it (see load)
+    """
+
+    def __init__(self, path, ttl=consts.CACHE_TTL_DEFAULT):
+        """
+        :param path: the cache directory (created on first write)
+        :param ttl: seconds during which an entry is used as is
+        """
+        self.path = path
+        self.ttl = ttl
+        self._counts = dict((kind, 0) for kind in consts.CACHE_COUNT_KEYS)
+        self._counts_lock = threading.Lock()
+
+    def _ensure_dir(self):
+        """Create the cache directory if it does not exist
+
+        """
+
+        if not os.path.isdir(self.path):
+            try:
+                os.makedirs(self.path)
+            except OSError:
+                # created meanwhile by another worker
+                if not os.path.isdir(self.path):
+                    raise
+
+    def is_fresh(self, entry):
+        """Return True if the entry can be used without revalidation
+
+        :param entry: the entry, as returned by get
+        """
+
+        return time.time() - entry.get(consts.CACHE_FETCHED_KEY, 0) \
+            < self.ttl
+
+    @staticmethod
+    def validators(entry):
+        """Return the headers for a conditional request revalidating an entry
+
+        :param entry: the entry, as returned by get (None for no entry)
+        """
+
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get(consts.CACHE_ETAG_KEY):
+            headers[consts.IF_NONE_MATCH_HEADER] = \
+                entry[consts.CACHE_ETAG_KEY]
+        if entry.get(consts.CACHE_LAST_MODIFIED_KEY):
+            headers[consts.IF_MODIFIED_SINCE_HEADER] = \
+                entry[consts.CACHE_LAST_MODIFIED_KEY]
+        return headers
+
+    def prune(self, max_age=None, max_size=None):
+        """Remove the entries older than max_age seconds, then the oldest
+        entries until the cache is no bigger than max_size bytes, and return
+        the number of entries removed
+
+        :param max_age: seconds after which an entry is removed (None: any)
+        :param max_size: maximal total size of the entries (None: any)
+        """
+
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, __ in entries)
+        now = time.time()
+        removed = 0
+        for key, size, fetched in entries:
+            if not (max_age is not None and now - fetched > max_age
+                    or max_size is not None and total_size > max_size):
+                break
+            self.remove(key)
+            total_size -= size
+            removed += 1
+        return removed
+
+    def record(self, kind):
+        """Count a lookup of the cache
+
+        :param kind: the lookup outcome (one of consts.CACHE_COUNT_KEYS)
+        """
+
+        with self._counts_lock:
+            self._counts[kind] += 1
+
+    def save_counts(self):
+        """Add the lookups counted since the last save to the counts kept
+        on disk
+
+        """
+
+        with self._counts_lock:
+            counts = self._counts
+            self._counts = dict((kind, 0) for kind in consts.CACHE_COUNT_KEYS)
+        if any(counts.values()):
+            self._add_counts(counts)
+
+    def stats(self):
+        """Return a dictionary describing the cache: its entries, their size,
+        and the lookup counts and hit ratio of all runs so far
+
+        """
+
+        entries = self.entries()
+        counts = self.load_counts()
+        with self._counts_lock:
+            for kind in counts:
+                counts[kind] += self._counts[kind]
+        lookups = sum(counts.values())
+        stats = {
+            consts.CACHE_ENTRIES_KEY: len(entries),
+            consts.CACHE_SIZE_KEY: sum(size for _, size, __ in entries),
+            consts.CACHE_HIT_RATIO_KEY: float(
+                counts[consts.CACHE_HITS_KEY] +
+                counts[consts.CACHE_REVALIDATED_KEY]) / lookups
+            if lookups else None
+        }
+        stats.update(counts)
+        return stats
+
+    def export_bundle(self, path):
+        """Write all the entries to a gzipped tar file, and return the
+        number of entries written
+
+        every entry is written as a json body file and a metadata file, so a
+        bundle can be imported by any kind of cache
+
+        :param path: the bundle file path
+        """
+
+        count = 0
+        with tarfile.open(path, 'w:gz') as bundle:
+            for key, _, __ in self.entries():
+                entry = self.get(key)
+                if entry is None:
+                    continue
+                meta = dict((meta_key, entry.get(meta_key))
+                            for meta_key in consts.CACHE_META_KEYS)
+                for name, data in zip(_bundle_names(key), [
+                        json.dumps(self.load(entry)), json.dumps(meta)]):
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    info.mtime = time.time()
+                    bundle.addfile(info, cStringIO.StringIO(data))
+                count += 1
+        return count
+
+    def import_bundle(self, path):
+        """Add the entries of a bundle written by export_bundle, replacing
+        existing entries with the same keys, and return the number of
+        entries added
+
+        only regular files named like cache entries are taken, so a bundle
+        can never write outside the cache directory
+
+        :param path: the bundle file path
+        """
+
+        files = {}
+        with tarfile.open(path, 'r:*') as bundle:
+            for member in bundle.getmembers():
+                file_name = member.name
+                if not member.isfile() \
+                        or os.path.basename(file_name) != file_name \
+                        or not file_name.endswith(
+                            (consts.CACHE_BODY_SUFFIX,
+                             consts.CACHE_META_SUFFIX)):
+                    continue
+                files[file_name] = bundle.extractfile(member).read()
+
+        added = 0
+        for file_name in files:
+            if not file_name.endswith(consts.CACHE_META_SUFFIX):
+                continue
+            key = urllib.unquote(file_name[:-len(consts.CACHE_META_SUFFIX)])
+            body_name = _bundle_names(key)[0]
+            try:
+                meta = json.loads(files[file_name])
+                record = json.loads(files[body_name])
+            except (KeyError, ValueError):
+                continue
+            self.store(key, record,
+                       meta.get(consts.CACHE_ETAG_KEY),
+                       meta.get(consts.CACHE_LAST_MODIFIED_KEY),
+                       meta.get(consts.CACHE_FETCHED_KEY))
+            added += 1
+        return added
+
+
+class FileCache(_Cache):
+    """A directory holding pypi responses and their validators
+
+    every entry is made of a body file and a metadata file, which holds the
+    ETag/Last-Modified validators of the response and the last time it was
+    known to be up to date
+    """
+
+    def _entry_paths(self, key):
+        """Return the body file path and metadata file path of an entry
+
+        :param key: the entry key
+        """
+        return tuple(os.path.join(self.path, name)
+                     for name in _bundle_names(key))
+
+    def _write_meta(self, meta_path, entry):
+        """Write the metadata of an entry (everything but the body)
+
+        :param meta_path: the metadata file path
+        :param entry: the entry
+        """
+        write_atomic(meta_path, json.dumps(dict(
+            (key, entry[key]) for key in entry
+            if key != consts.CACHE_BODY_KEY)))
+
+    def get(self, key):
+        """Return the cached entry for the given key, None if there is none
+
+        the entry is a dictionary holding the body and its validators
+
+        :param key: the entry key
+        """
+
+        body_path, meta_path = self._entry_paths(key)
+        try:
+            with open(meta_path, 'rb') as meta_file:
+                entry = json.load(meta_file)
+            with open(body_path, 'rb') as body_file:
+                entry[consts.CACHE_BODY_KEY] = body_file.read()
+        except (IOError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, body, etag=None, last_modified=None, fetched=None):
+        """Store a response body along with its validators
+
+        :param key: the entry key
+        :param body: the response body
+        :param etag: the ETag header of the response
+        :param last_modified: the Last-Modified header of the response
+        :param fetched: the time the response was fetched (None: now)
+        """
+
+        self._ensure_dir()
+        body_path, meta_path = self._entry_paths(key)
+        write_atomic(body_path, body)
+        self._write_meta(meta_path, {
+            consts.CACHE_ETAG_KEY: etag,
+            consts.CACHE_LAST_MODIFIED_KEY: last_modified,
+            consts.CACHE_FETCHED_KEY: time.time() if fetched is None
+            else fetched
+        })
+
+    @staticmethod
+    def load(entry):
+        """Return the record kept in an entry
+
+        :param entry: the entry, as returned by get
+        """
+
+        return json.loads(entry[consts.CACHE_BODY_KEY])
+
+    def store(self, key, record, etag=None, last_modified=None,
+              fetched=None):
+        """Store a record along with the validators of its response
+
+        :param key: the entry key
+        :param record: the record
+        :param etag: the ETag header of the response
+        :param last_modified: the Last-Modified header of the response
+        :param fetched: the time the response was fetched (None: now)
+        """
+
+        self.put(key, json.dumps(record), etag, last_modified, fetched)
+
+    def touch(self, key, entry):
+        """Mark an entry as up to date (e.g. after a 304 response)
+
+        :param key: the entry key
+        :param entry: the entry, as returned by get
+        """
+
+        entry[consts.CACHE_FETCHED_KEY] = time.time()
+        self._write_meta(self._entry_paths(key)[1], entry)
+
+    def entries(self):
+        """Return a list of (key, size, fetched) triplets, one per entry,
+        where size counts both the body and the metadata files
+
+        """
+
+        try:
+            file_names = os.listdir(self.path)
+        except OSError:
+            return []
+        entries = []
+        for file_name in file_names:
+            if not file_name.endswith(consts.CACHE_META_SUFFIX):
+                continue
+            key = urllib.unquote(file_name[:-len(consts.CACHE_META_SUFFIX)])
+            body_path, meta_path = self._entry_paths(key)
+            try:
+                with open(meta_path, 'rb') as meta_file:
+                    fetched = json.load(meta_file).get(
+                        consts.CACHE_FETCHED_KEY, 0)
+                size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+            except (IOError, OSError, ValueError, AttributeError):
+                # a broken entry is as good as an ancient one
+                fetched = 0
+                size = sum(os.path.getsize(path)
+                           for path in (body_path, meta_path)
+                           if os.path.isfile(path))
+            entries.append((key, size, fetched))
+        return entries
+
+    def remove(self, key):
+        """Remove an entry, if there is one
+
+        :param key: the entry key
+        """
+
+        for path in self._entry_paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _stats_path(self):
+        """Return the path of the file keeping the lookup counts
+
+        """
+        return os.path.join(self.path, consts.CACHE_STATS_FILE_NAME)
+
+    def load_counts(self):
+        """Return the lookup counts kept on disk by former runs
+
+        """
+
+        counts = dict((kind, 0) for kind in consts.CACHE_COUNT_KEYS)
+        try:
+            with open(self._stats_path(), 'rb') as stats_file:
+                kept = json.load(stats_file)
+            for kind in counts:
+                counts[kind] = int(kept.get(kind, 0))
+        except (IOError, ValueError, TypeError, AttributeError):
+            pass
+        return counts
+
+    def _add_counts(self, counts):
+        """Add lookup counts to the counts kept on disk
+
+        :param counts: a dictionary mapping lookup outcomes to counts
+        """
+
+        kept = self.load_counts()
+        for kind in counts:
+            kept[kind] += counts[kind]
+        try:
+            self._ensure_dir()
+            write_atomic(self._stats_path(), json.dumps(kept))
+        except (IOError, OSError):
+            # statistics are not worth failing a run for
+            pass
+
+
+# the info fields of a record, as columns of the packages table
+_INFO_COLUMNS = ', '.join(payloads.INFO_FIELDS)
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS packages ('
+    'key TEXT PRIMARY KEY, {0}, info_fields INTEGER, '
+    'etag TEXT, last_modified TEXT, fetched REAL)'.format(_INFO_COLUMNS),
+    'CREATE TABLE IF NOT EXISTS versions ('
+    'key TEXT, position INTEGER, version TEXT, '
+    'PRIMARY KEY (key, position))',
+    'CREATE TABLE IF NOT EXISTS counts ('
+    'kind TEXT PRIMARY KEY, count INTEGER)'
+)
+
+
+class SqliteCache(_Cache):
+    """A sqlite database holding the records reduced from pypi responses,
+    with a row per page (its info fields and validators) and a row per
+    version
+
+    the database is kept in WAL mode, so any number of processes (pool
+    workers, concurrent runs on the same host) read it while one of them
+    writes. every process opens a single connection, shared by its threads
+    """
+
+    def __init__(self, path, ttl=consts.CACHE_TTL_DEFAULT):
+        """
+        :param path: the cache directory (created on first write)
+        :param ttl: seconds during which an entry is used as is
+        """
+        super(SqliteCache, self).__init__(path, ttl)
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Return the connection of this process, opening the database (and
+        creating it) on first use
+
+        must be called with the lock held
+        """
+
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        self._ensure_dir()
+        connection = sqlite3.connect(
+            os.path.join(self.path, consts.SQLITE_CACHE_FILE_NAME),
+            timeout=consts.SQLITE_TIMEOUT, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        with connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def _query(self, statement, params=()):
+        """Return all the rows of a query
+
+        :param statement: the sql statement
+        :param params: the statement parameters
+        """
+
+        with self._lock:
+            return self._connect().execute(statement, params).fetchall()
+
+    def _write(self, statements):
+        """Run statements in a single transaction
+
+        :param statements: list of (sql statement, parameters list) pairs,
+            a statement is run once per parameters in its list
+        """
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for statement, params_list in statements:
+                    connection.executemany(statement, params_list)
+
+    def get(self, key):
+        """Return the cached entry for the given key, None if there is none
+
+        the entry is a dictionary holding the record and its validators
+
+        :param key: the entry key
+        """
+
+        rows = self._query(
+            'SELECT {0}, info_fields, etag, last_modified, fetched, version '
+            'FROM packages LEFT JOIN versions USING (key) '
+            'WHERE key = ? ORDER BY position'.format(_INFO_COLUMNS), (key,))
+        if not rows:
+            return None
+        fields_count = len(payloads.INFO_FIELDS)
+        first = rows[0]
+        info = dict(
+            (field, first[index])
+            for index, field in enumerate(payloads.INFO_FIELDS)
+            if first[fields_count] & (1 << index))
+        releases = [row[-1] for row in rows if row[-1] is not None]
+        return {
+            consts.CACHE_ETAG_KEY: first[fields_count + 1],
+            consts.CACHE_LAST_MODIFIED_KEY: first[fields_count + 2],
+            consts.CACHE_FETCHED_KEY: first[fields_count + 3],
+            consts.CACHE_RECORD_KEY: {
+                consts.INFO_KEY: info,
+                consts.RELEASES_KEY: releases
+            }
+        }
+
+    @staticmethod
+    def load(entry):
+        """Return the record kept in an entry
+
+        :param entry: the entry, as returned by get
+        """
+
+        return entry[consts.CACHE_RECORD_KEY]
+
+    def store(self, key, record, etag=None, last_modified=None,
+              fetched=None):
+        """Store a record along with the validators of its response
+
+        :param key: the entry key
+        :param record: the record
+        :param etag: the ETag header of the response
+        :param last_modified: the Last-Modified header of the response
+        :param fetched: the time the response was fetched (None: now)
+        """
+
+        info = record.get(consts.INFO_KEY) or {}
+        info_fields = 0
+        for index, field in enumerate(payloads.INFO_FIELDS):
+            if field in info:
+                info_fields |= 1 << index
+        self._write([
+            ('INSERT OR REPLACE INTO packages VALUES ({0})'.format(
+                ', '.join(['?'] * (len(payloads.INFO_FIELDS) + 5))),
+             [[key] + [info.get(field) for field in payloads.INFO_FIELDS] +
+              [info_fields, etag, last_modified,
+               time.time() if fetched is None else fetched]]),
+            ('DELETE FROM versions WHERE key = ?', [(key,)]),
+            ('INSERT INTO versions VALUES (?, ?, ?)',
+             [(key, position, version) for position, version
+              in enumerate(record.get(consts.RELEASES_KEY) or [])])
+        ])
+
+    def touch(self, key, entry):
+        """Mark an entry as up to date (e.g. after a 304 response)
+
+        :param key: the entry key
+        :param entry: the entry, as returned by get
+        """
+
+        entry[consts.CACHE_FETCHED_KEY] = time.time()
+        self._write([('UPDATE packages SET fetched = ? WHERE key = ?',
+                      [(entry[consts.CACHE_FETCHED_KEY], key)])])
+
+    def entries(self):
+        """Return a list of (key, size, fetched) triplets, one per entry,
+        where size counts the bytes of the stored values
+
+        """
+
+        lengths = ' + '.join('IFNULL(LENGTH({0}), 0)'.format(column)
+                             for column in payloads.INFO_FIELDS)
+        return [tuple(row) for row in self._query(
+            'SELECT key, {0} + IFNULL(SUM(LENGTH(version)), 0), fetched '
+            'FROM packages LEFT JOIN versions USING (key) '
+            'GROUP BY key'.format(lengths))]
+
+    def remove(self, key):
+        """Remove an entry, if there is one
+
+        :param key: the entry key
+        """
+
+        self._write([('DELETE FROM packages WHERE key = ?', [(key,)]),
+                     ('DELETE FROM versions WHERE key = ?', [(key,)])])
+
+    def load_counts(self):
+        """Return the lookup counts kept on disk by former runs
+
+        """
+
+        counts = dict((kind, 0) for kind in consts.CACHE_COUNT_KEYS)
+        counts.update(self._query('SELECT kind, count FROM counts'))
+        return counts
+
+    def _add_counts(self, counts):
+        """Add lookup counts to the counts kept on disk
+
+        :param counts: a dictionary mapping lookup outcomes to counts
+        """
+
+        try:
+            self._write([
+                ('INSERT OR IGNORE INTO counts VALUES (?, 0)',
+                 [(kind,) for kind in counts]),
+                ('UPDATE counts SET count = count + ? WHERE kind = ?',
+                 [(counts[kind], kind) for kind in counts])
+            ])
+        except sqlite3.Error:
+            # statistics are not worth failing a run for
+            pass
+
+    def close(self):
+        """Close the connection of this process
+
+        """
+
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+BACKENDS = {
+    consts.CACHE_BACKEND_SQLITE_STR: SqliteCache,
+    consts.CACHE_BACKEND_FILES_STR: FileCache
+}
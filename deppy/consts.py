@@ -2,7 +2,6 @@
 INSTALL_REQUIRES_ARG = 'install_requires'
 NAME_ARG = 'name'
 SETUP_MODULE_NAME = 'setup'
-PIPDEPTREE_JSON_CMD = 'pipdeptree -j'
 REQUIRED_VERSION_KEY = 'required_version'
 PYPI_URL = 'https://pypi.python.org/pypi/{0}/json'
 INFO_KEY = 'info'
@@ -22,6 +21,8 @@ UNKNOWN_LICENSE_STR = UNKNOWN
 SETUP_FILE_NAME = 'setup.py'
 REQUIREMENTS_FILE_NAME = 'requirements.txt'
 RESULTS_KEY = 'results'
+REFRESHED_KEY = 'refreshed'
+FROM_STATE_KEY = 'from_state'
 MODULES_KEY = 'modules'
 ILLEGITIMATE_LICENSES_KEY = 'illegitimate_licenses'
 ARGUMENTS_KEY = 'args'
@@ -31,10 +32,12 @@ MAIN_DESCRIPTION = 'Manage dependencies in your projects'
 SEEKUP_DESCRIPTION = 'Find newer versions for project dependencies'
 SHOWPACK_DESCRIPTION = 'Show info about given package'
 LICENSES_DESCRIPTION = 'Show info about package licenses'
+CACHE_DESCRIPTION = 'Manage the directory keeping pypi data between runs'
 SUBCOMMAND_STR = 'subcommand'
 SEEKUP_STR = 'seekup'
 SHOWPACK_STR = 'showpack'
 LICENSES_STR = 'licenses'
+CACHE_STR = 'cache'
 INPUT_TYPE_ARG_STR = '-i'
 INPUT_PACKAGE_STR = 'package'
 INPUT_PATH_STR = 'path'
@@ -79,19 +82,270 @@ REQUIREMENTS_HELP_STR = 'url of requirements.txt file. ' \
 MAX_JOBS_ARG_STR = '-t'
 MAX_JOBS_STR = 'max_threads'
 MAX_JOBS_DEFAULT = None
-MAX_JOBS_HELP_STR = 'limit the number of threads (default: unlimited)'
+MAX_JOBS_HELP_STR = 'limit the number of threads (default: unlimited, ' \
+                    'or {0} requests in flight for the async backend)'
+BACKEND_ARG_STR = '-b'
+BACKEND_STR = 'backend'
+BACKEND_SERIAL_STR = 'serial'
+BACKEND_THREAD_STR = 'thread'
+BACKEND_PROCESS_STR = 'process'
+BACKEND_ASYNC_STR = 'async'
+BACKEND_DEFAULT = None
+FETCH_BACKEND_DEFAULT = BACKEND_ASYNC_STR
+PARSE_BACKEND_DEFAULT = BACKEND_PROCESS_STR
+BACKEND_HELP_STR = 'choose how work is run in parallel.  options:  ' \
+                   '{0} (one call at a time),  {1} (a pool of threads),  ' \
+                   '{2} (a pool of processes),  {3} (concurrent calls ' \
+                   'from a single process).  default: {4} for pypi ' \
+                   'lookups, {5} for setup.py files'
+ASYNC_CONCURRENCY_DEFAULT = 100
+CACHE_DIR_ARG_STR = '-cdir'
+CACHE_DIR_STR = 'cache_dir'
+CACHE_DIR_DEFAULT = None
+CACHE_DIR_HELP_STR = 'directory for keeping pypi data between runs ' \
+                     '(default: no cache)'
+CACHE_TTL_ARG_STR = '-ttl'
+CACHE_TTL_STR = 'cache_ttl'
+CACHE_TTL_DEFAULT = 0
+CACHE_TTL_HELP_STR = 'seconds during which cached pypi data is used ' \
+                     'without asking pypi if it changed (default: 0)'
+CACHE_BODY_SUFFIX = '.json'
+CACHE_META_SUFFIX = '.meta'
+CACHE_BODY_KEY = 'body'
+CACHE_ETAG_KEY = 'etag'
+CACHE_LAST_MODIFIED_KEY = 'last_modified'
+CACHE_FETCHED_KEY = 'fetched'
+CACHE_RECORD_KEY = 'record'
+CACHE_META_KEYS = (CACHE_ETAG_KEY, CACHE_LAST_MODIFIED_KEY, CACHE_FETCHED_KEY)
+CACHE_STATS_FILE_NAME = 'deppy-stats'
+CACHE_BACKEND_ARG_STR = '-cbe'
+CACHE_BACKEND_STR = 'cache_backend'
+CACHE_BACKEND_SQLITE_STR = 'sqlite'
+CACHE_BACKEND_FILES_STR = 'files'
+CACHE_BACKEND_DEFAULT = CACHE_BACKEND_SQLITE_STR
+CACHE_BACKEND_HELP_STR = 'choose how the cache is kept.  options:  ' \
+                         '{0} (a database holding only the fields deppy ' \
+                         'needs - default),  {1} (a json file per pypi page)'
+SQLITE_CACHE_FILE_NAME = 'deppy.sqlite'
+SQLITE_TIMEOUT = 30.0
+CACHE_HITS_KEY = 'hits'
+CACHE_REVALIDATED_KEY = 'revalidated'
+CACHE_MISSES_KEY = 'misses'
+CACHE_COUNT_KEYS = (CACHE_HITS_KEY, CACHE_REVALIDATED_KEY, CACHE_MISSES_KEY)
+CACHE_ENTRIES_KEY = 'entries'
+CACHE_SIZE_KEY = 'size'
+CACHE_HIT_RATIO_KEY = 'hit_ratio'
+CACHE_ACTION_STR = 'action'
+CACHE_ACTION_METAVAR_STR = 'ACTION'
+CACHE_WARM_STR = 'warm'
+CACHE_STATS_STR = 'stats'
+CACHE_PRUNE_STR = 'prune'
+CACHE_EXPORT_STR = 'export'
+CACHE_IMPORT_STR = 'import'
+CACHE_ACTION_HELP_STR = 'options:  {0} (fetch the given packages),  ' \
+                        '{1} (show size and hit ratio),  ' \
+                        '{2} (remove old entries),  ' \
+                        '{3} (write all entries to a bundle file),  ' \
+                        '{4} (add the entries of a bundle file)'
+CACHE_INPUT_HELP_STR = 'packages to {0}, or the bundle file to {1}/{2}'
+ENVIRONMENT_ARG_STR = '-env'
+ENVIRONMENT_STR = 'environment'
+ENVIRONMENT_HELP_STR = 'also {0} every package of the current environment ' \
+                       '(based on its installed metadata)'
+MAX_AGE_ARG_STR = '-age'
+MAX_AGE_STR = 'max_age'
+MAX_AGE_DEFAULT = None
+MAX_AGE_HELP_STR = '{0} entries fetched more than this number of seconds ago'
+MAX_SIZE_ARG_STR = '-size'
+MAX_SIZE_STR = 'max_size'
+MAX_SIZE_DEFAULT = None
+MAX_SIZE_HELP_STR = '{0} the oldest entries until the cache is no bigger ' \
+                    'than this number of bytes'
+CACHE_WARMED_KEY = 'warmed'
+CACHE_FAILED_KEY = 'failed'
+CACHE_REMOVED_KEY = 'removed'
+CACHE_EXPORTED_KEY = 'exported'
+CACHE_IMPORTED_KEY = 'imported'
+ETAG_HEADER = 'ETag'
+LAST_MODIFIED_HEADER = 'Last-Modified'
+IF_NONE_MATCH_HEADER = 'If-None-Match'
+IF_MODIFIED_SINCE_HEADER = 'If-Modified-Since'
+ACCEPT_ENCODING_HEADER = 'Accept-Encoding'
+ACCEPT_ENCODING = 'gzip, deflate'
+CONNECTION_HEADER = 'Connection'
+KEEP_ALIVE = 'keep-alive'
+HTTP_SCHEMES = ('http://', 'https://')
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 32
+PAYLOAD_CHUNK_SIZE = 64 * 1024
+AIMD_INITIAL_LIMIT = 8
+AIMD_MIN_LIMIT = 1
+AIMD_MAX_LIMIT = HTTP_POOL_MAXSIZE
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_LATENCY_TOLERANCE = 2.0
+RETRIES_DEFAULT = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_AFTER_HEADER = 'Retry-After'
+CONNECT_TIMEOUT_ARG_STR = '-cto'
+CONNECT_TIMEOUT_STR = 'connect_timeout'
+CONNECT_TIMEOUT_DEFAULT = 5.0
+CONNECT_TIMEOUT_HELP_STR = 'seconds to wait for a connection to a server ' \
+                           '(default: {0})'
+READ_TIMEOUT_ARG_STR = '-rto'
+READ_TIMEOUT_STR = 'read_timeout'
+READ_TIMEOUT_DEFAULT = 30.0
+READ_TIMEOUT_HELP_STR = 'seconds to wait for data from a server ' \
+                        '(default: {0})'
+HEDGE_ARG_STR = '-hedge'
+HEDGE_STR = 'hedge'
+HEDGE_HELP_STR = 'send a duplicate of any request slower than most ' \
+                 'requests so far, and use the first response'
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WINDOW = 200
+THROTTLE_STATUS_CODES = (429,)
+MEMO_SIZE_STR = 'memo_size'
+MEMO_SIZE_DEFAULT = 4096
+MEMO_TTL_STR = 'memo_ttl'
+MEMO_TTL_DEFAULT = 3600
+VERSION_KEYS_MAXSIZE = 65536
+SPECIFIER_SETS_MAXSIZE = 4096
+REQUIREMENTS_MAXSIZE = 16384
+MEMO_HITS_KEY = 'hits'
+MEMO_MISSES_KEY = 'misses'
+MEMO_SIZE_KEY = 'size'
+MEMO_MAXSIZE_KEY = 'maxsize'
+INDEXES_ARG_STR = '-idx'
+INDEXES_STR = 'indexes'
+INDEXES_DEFAULT = [PYPI_URL]
+INDEXES_HELP_STR = 'package indexes to query for the {0} source, in order ' \
+                   'of preference.  an index is the base url of its json ' \
+                   'api (e.g. https://pypi.org/pypi), or a url where {{0}} ' \
+                   'stands for the package name (default: {1})'
+INDEX_JSON_URL = '{0}/{1}/json'
+INDEX_POLICY_ARG_STR = '-ipol'
+INDEX_POLICY_STR = 'index_policy'
+INDEX_POLICY_FIRST_STR = 'first'
+INDEX_POLICY_MERGE_STR = 'merge'
+INDEX_POLICY_DEFAULT = INDEX_POLICY_FIRST_STR
+INDEX_POLICY_HELP_STR = 'choose how indexes answers are used.  options:  ' \
+                        '{0} (the first index in order which has the ' \
+                        'package - default),  {1} (versions of all the ' \
+                        'indexes which have the package)'
+STATE_ARG_STR = '-st'
+STATE_STR = 'state'
+STATE_DEFAULT = None
+STATE_HELP_STR = 'file keeping the versions found by previous runs.  ' \
+                 'packages looked up recently enough are not looked up ' \
+                 'again (default: look up all packages)'
+FRESHNESS_ARG_STR = '-fresh'
+FRESHNESS_STR = 'freshness'
+FRESHNESS_DEFAULT = 24 * 60 * 60
+FRESHNESS_HELP_STR = 'seconds during which versions kept in the {0} file ' \
+                     'are used as is (default: {1})'
+STATE_PACKAGES_KEY = 'packages'
+STATE_VERSIONS_KEY = 'versions'
+STATE_LICENSE_KEY = 'license'
+STATE_NEWER_KEY = 'newer'
+STATE_FETCHED_KEY = 'fetched'
+STATE_SETTINGS_KEY = 'settings'
+SEEKUP_MODE_ARG_STR = '-mode'
+SEEKUP_MODE_STR = 'mode'
+SEEKUP_MODE_ALL_STR = 'all'
+SEEKUP_MODE_LATEST_STR = 'latest'
+SEEKUP_MODE_COMPATIBLE_STR = 'compatible'
+SEEKUP_MODE_DEFAULT = SEEKUP_MODE_ALL_STR
+SEEKUP_MODE_HELP_STR = 'choose which newer versions are reported.  ' \
+                       'options:  {0} (all of them - default),  {1} (only ' \
+                       'the latest version),  {2} (only the latest version ' \
+                       'the requirement still allows)'
+SOURCE_ARG_STR = '-src'
+SOURCE_STR = 'source'
+SOURCE_JSON_STR = 'json'
+SOURCE_SIMPLE_STR = 'simple'
+SOURCE_MIRROR_STR = 'mirror'
+SOURCE_DEFAULT = SOURCE_JSON_STR
+SOURCE_HELP_STR = 'choose where versions are read from.  options:  ' \
+                  '{0} (pypi json pages - default),  {1} (the much ' \
+                  'smaller simple repository api pages - json pages are ' \
+                  'still read if license, summary or homepage are ' \
+                  'needed),  {2} (a local pypi mirror, see {3})'
+SIMPLE_INDEX_ARG_STR = '-sidx'
+SIMPLE_INDEX_STR = 'simple_index'
+SIMPLE_INDEX_DEFAULT = 'https://pypi.org/simple/'
+SIMPLE_INDEX_HELP_STR = 'url or local directory of the simple repository ' \
+                        'api, for the {0} source (default: {1})'
+MIRROR_ARG_STR = '-mir'
+MIRROR_STR = 'mirror'
+MIRROR_DEFAULT = None
+MIRROR_HELP_STR = 'path or file url of a local pypi mirror (as kept by ' \
+                  'bandersnatch), for the {0} source'
+MIRROR_WEB_DIR = 'web'
+MIRROR_JSON_DIR = 'json'
+MIRROR_PYPI_DIR = 'pypi'
+MIRROR_SIMPLE_DIR = 'simple'
+SIMPLE_JSON_CONTENT_TYPE = 'application/vnd.pypi.simple.v1+json'
+SIMPLE_JSON_INDEX_FILE = 'index.v1_json'
+ACCEPT_HEADER = 'Accept'
+FILE_URL_PREFIX = 'file://'
+FILES_KEY = 'files'
+FILENAME_KEY = 'filename'
+YANKED_KEY = 'yanked'
+EXCLUDE_ARG_STR = '-excl'
+EXCLUDE_STR = 'exclude'
+EXCLUDE_PRE_STR = 'pre'
+EXCLUDE_YANKED_STR = 'yanked'
+EXCLUDE_FILELESS_STR = 'fileless'
+EXCLUDE_DEFAULT = []
+EXCLUDE_HELP_STR = 'kinds of releases left out as soon as they are read.  ' \
+                   'options:  {0} (pre-releases and dev releases),  {1} ' \
+                   '(releases whose files are all yanked),  {2} (releases ' \
+                   'with no files) (default: none)'
+INFO_REQUIRED_STR = 'info_required'
+WHEEL_EXTENSION = '.whl'
+EGG_EXTENSION = '.egg'
+EGG_INFO_DIR = 'EGG-INFO'
+EGG_INFO_SUFFIX = '.egg-info'
+EGG_INFO_REQUIRES_FILE = 'requires.txt'
+DIST_INFO_SUFFIX = '.dist-info'
+DIST_INFO_METADATA_FILE = 'METADATA'
+REQUIRES_DIST_HEADER = 'requires-dist'
+SDIST_EXTENSIONS = ('.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tar', '.zip')
 INPUT_STR = 'input'
 INPUT_METAVAR_STR = 'INPUT'
 INPUT_HELP_STR = 'package'
 SHOW_PACKAGE_INPUT_HELP_STR = 'package name'
 ERROR_MESSAGE_ILLEGAL_SOURCE = 'Illegal source chosen. Legit sources are: {0}'
+ERROR_MESSAGE_NO_MIRROR = 'The {0} source requires a mirror path ({1})'
+ERROR_MESSAGE_ILLEGAL_INDEX_POLICY = \
+    'Illegal index policy chosen. Legit policies are: {0}'
 ERROR_MESSAGE_ILLEGAL_INPUT_TYPE = \
     'Illegal input type chosen.  Legit input types are: {0}'
+ERROR_MESSAGE_ILLEGAL_BACKEND = \
+    'Illegal backend chosen.  Legit backends are: {0}'
+ERROR_MESSAGE_ILLEGAL_CACHE_BACKEND = \
+    'Illegal cache backend chosen.  Legit cache backends are: {0}'
+ERROR_MESSAGE_ILLEGAL_EXCLUDE = \
+    'Illegal kind of releases to exclude chosen.  Legit kinds are: {0}'
+ERROR_MESSAGE_ILLEGAL_SEEKUP_MODE = \
+    'Illegal mode chosen.  Legit modes are: {0}'
+ERROR_MESSAGE_ILLEGAL_CACHE_ACTION = \
+    'Illegal cache action chosen.  Legit actions are: {0}'
+ERROR_MESSAGE_NO_CACHE_DIR = 'No cache directory given! Use {0}'.format(
+    CACHE_DIR_ARG_STR)
+ERROR_MESSAGE_NO_PRUNE_LIMIT = 'Nothing to prune by! Use {0} or {1}'.format(
+    MAX_AGE_ARG_STR, MAX_SIZE_ARG_STR)
+ERROR_MESSAGE_NO_BUNDLE = 'A single bundle file path is required'
+ERROR_MESSAGE_BUNDLE = 'Error while reading or writing the bundle file: {0}'
 ERROR_MESSAGE_NO_SETUP = 'No {0} files found in the given path'.format(
     SETUP_FILE_NAME)
 ERROR_MESSAGE_NO_PACKAGE_INSTALLED = 'No package found with the name {0}'
 ERROR_MESSAGE_NO_DEPENDENCIES = 'No dependencies found in project'
 ERROR_MESSAGE_NO_VERSIONS = 'No versions found online'
+WARNING_LOOKUP_FAILED = 'Looking up {0} failed, its versions are ' \
+                        'unknown: {1}'
+LOG_FORMAT = '%(levelname)s: %(message)s'
 ERROR_MESSAGE_BUILDING_DEPTREE = 'Error while building dependencies tree'
 ERROR_MESSAGE_URL = 'Error while getting dependencies from url'
 ERROR_MESSAGE_PYPI_JSON = 'Error while getting json from pypi'
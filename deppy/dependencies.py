@@ -5,17 +5,16 @@
 import os
 import sys
 import imp
-import json
 import shutil
 import tempfile
 import cStringIO
 import setuptools
-import subprocess
-
-import requests
 
+from . import names
 from . import consts
+from . import network
 from . import versions
+from . import distributions
 
 
 def get_from_file(path):
@@ -23,7 +22,9 @@ def get_from_file(path):
 
     if the name is unknown, return the path instead
 
-    handles only single-operator requires, not >=3, <=4
+    a require of several clauses (e.g. >=3,<4) is kept whole: its operator
+    and version join back to the full requirement. extras and environment
+    markers are left out
 
     :param path: the setup.py file path
     """
@@ -33,16 +34,9 @@ def get_from_file(path):
     dependencies_list = setup_kwargs.get(consts.INSTALL_REQUIRES_ARG, [])
     dependencies = []
     for dependency in dependencies_list:
-        for oper in versions.OPERATORS:
-            index = dependency.find(oper)
-            if index >= 0:
-                package_name = dependency[:index]
-                version, require_operator = \
-                    versions.split_require(dependency[index:])
-                dependencies.append((package_name, version, require_operator))
-                break
-        else:
-            dependencies.append((dependency, '', ''))
+        requirement = versions.parse_requirement(dependency)
+        dependencies.append(
+            (requirement.name, requirement.version, requirement.operator))
 
     # return the dependencies list and the path of the original setup.py file
     return dependencies, \
@@ -66,13 +60,12 @@ def get_by_url(url, req_url=None):
             suffix=str(os.getpid())
         )
         setup_path = os.path.join(tmp_dir, consts.SETUP_FILE_NAME)
-        requests.packages.urllib3.disable_warnings()
-        setup_str = requests.get(url).content
+        setup_str = network.get(url).content
         with open(setup_path, mode='w') as tmp_setup:
             tmp_setup.write(setup_str)
         if req_url:
             req_path = os.path.join(tmp_dir, consts.REQUIREMENTS_FILE_NAME)
-            req_str = requests.get(req_url).content
+            req_str = network.get(req_url).content
             with open(req_path, mode='w') as tmp_req:
                 tmp_req.write(req_str)
         dependencies, package_name, lic = get_from_file(tmp_setup.name)
@@ -106,11 +99,13 @@ def get_for_package(package_name, depth=0):
     return dependencies_list, package_name, consts.UNKNOWN
 
 
-def _rec_build_tree(dependencies_tree, dependencies_dict, package_name, depth):
+def _rec_build_tree(dependencies_tree, dependencies_index, package_name,
+                    depth):
     """Recursively build a dependencies tree/subtree
 
     :param dependencies_tree: the tree build so-far
-    :param dependencies_dict: pipdeptree output
+    :param dependencies_index: the installed distributions (see
+    distributions.InstalledDistributions)
     :param package_name: the package that is the root of this subtree
     :param depth: maximal depth of subtree
     """
@@ -118,55 +113,60 @@ def _rec_build_tree(dependencies_tree, dependencies_dict, package_name, depth):
     package_name = package_name.lower()
     if package_name in dependencies_tree:
         return dependencies_tree
-    for dictionary_item in dependencies_dict:
-        try:
-            current_package = str(
-                dictionary_item[consts.PACKAGE_KEY]
-                [consts.KEY_KEY]).lower()
-        except KeyError:
-            continue
-        if current_package == package_name:
-            dependencies_list = []
-            for dependency in dictionary_item.get(
-                    consts.DEPENDENCIES_KEY, []):
-                if consts.KEY_KEY in dependency:
-                    required_package_name = str(
-                        dependency[consts.KEY_KEY]).lower()
-                    version = dependency.get(
-                        consts.REQUIRED_VERSION_KEY, '')
-                    if version is None:
-                        version = ''
-                    else:
-                        version = str(version).lower()
-                    dependencies_list.append({
-                        consts.PACKAGE_KEY: required_package_name,
-                        consts.REQUIRE_KEY: version
-                    })
-            dependencies_tree[package_name] = dependencies_list
-            if depth != 0:
-                for dependency in dependencies_list:
-                    dependencies_tree = _rec_build_tree(
-                        dependencies_tree, dependencies_dict,
-                        dependency[consts.PACKAGE_KEY], depth - 1)
+    dictionary_item = dependencies_index.get(
+        names.normalize_name(package_name))
+    if dictionary_item is None:
+        return dependencies_tree
+    dependencies_list = []
+    for dependency in dictionary_item.get(consts.DEPENDENCIES_KEY, []):
+        if consts.KEY_KEY in dependency:
+            required_package_name = str(dependency[consts.KEY_KEY]).lower()
+            version = dependency.get(consts.REQUIRED_VERSION_KEY, '')
+            if version is None:
+                version = ''
+            else:
+                version = str(version).lower()
+            dependencies_list.append({
+                consts.PACKAGE_KEY: required_package_name,
+                consts.REQUIRE_KEY: version
+            })
+    dependencies_tree[package_name] = dependencies_list
+    if depth != 0:
+        for dependency in dependencies_list:
+            dependencies_tree = _rec_build_tree(
+                dependencies_tree, dependencies_index,
+                dependency[consts.PACKAGE_KEY], depth - 1)
     return dependencies_tree
 
 
 def build_tree(package_name, depth=-1):
     """Return a dictionary representing a dependencies tree with the given
-    package as root, based on pipdeptree
+    package as root, based on the metadata of the installed distributions
+
+    only the distributions the tree reaches have their metadata read
 
     :param package_name: the main package (root of the tree)
     :param depth: maximal depth for the tree (negative is unlimited)
     """
 
-    try:
-        dependencies_dict = json.loads(subprocess.Popen(
-            consts.PIPDEPTREE_JSON_CMD, shell=True,
-            stdout=subprocess.PIPE, close_fds=True).communicate()[0])
-    except Exception:
-        return None
     return _rec_build_tree(
-        {}, dependencies_dict, package_name, depth)
+        {}, distributions.InstalledDistributions(), package_name, depth)
+
+
+def get_environment_packages():
+    """Return a sorted list of the packages installed in the current
+    environment and of their requirements, based on their metadata
+
+    """
+
+    installed = distributions.InstalledDistributions()
+    packages = set()
+    for name in installed.names():
+        dictionary_item = installed.get(name)
+        packages.add(dictionary_item[consts.PACKAGE_KEY][consts.KEY_KEY])
+        for dependency in dictionary_item[consts.DEPENDENCIES_KEY]:
+            packages.add(dependency[consts.KEY_KEY])
+    return sorted(packages)
 
 
 def _get_setup_kwargs(path):
@@ -9,13 +9,19 @@ dependencies.
 
 import os
 import json
+import logging
+import tarfile
 import argparse
-import multiprocessing
 
 import sys
 
+from . import batch
+from . import cache
 from . import consts
+from . import state
+from . import network
 from . import versions
+from . import executors
 from . import dependencies
 
 
@@ -45,15 +51,51 @@ def _set_default_kwargs(kwargs, defaults):
             kwargs[default] = defaults[default]
 
 
-def _parallel(func, args, threads_num=None):
-    """Initialize a pool and run a given func in parallel over different args
+BACKENDS = executors.EXECUTORS.keys()
+
+
+def _get_backend(kwargs, stage_default):
+    """Return the backend to run a stage with
+
+    setup.py files are evaluated by patching setuptools and the std streams,
+    so they are never evaluated by threads of the same process
+
+    :param kwargs: arguments
+    :param stage_default: the backend used if none was chosen
+    """
+
+    backend = kwargs.get(consts.BACKEND_STR) or stage_default
+    if stage_default == consts.PARSE_BACKEND_DEFAULT and backend in [
+            consts.BACKEND_THREAD_STR, consts.BACKEND_ASYNC_STR]:
+        return consts.PARSE_BACKEND_DEFAULT
+    return backend
+
+
+def _worker_settings():
+    """Return the settings the fetching calls run with, for executors to
+    tell whether their workers still hold them
+
+    """
+
+    return versions.configuration(), network.configuration()
+
+
+def _parallel(func, args, threads_num=None,
+              backend=consts.FETCH_BACKEND_DEFAULT):
+    """Run a given func in parallel over different args
+
+    a single call is always run serially, as no pool is worth starting for it
 
     :param func: the function to be executed in parallel
     :param args: iterable object containing arguments for the function
     :param threads_num: limit the number of threads, None for unlimited
+    :param backend: the backend running the calls (one of BACKENDS)
     """
-    pool = multiprocessing.Pool(threads_num)
-    return pool.map(func, args)
+    args = list(args)
+    if len(args) <= 1:
+        backend = consts.BACKEND_SERIAL_STR
+    return executors.get_executor(
+        backend, threads_num, _worker_settings()).map(func, args)
 
 
 def _licenses_to_string(licenses_dict, by_module):
@@ -161,6 +203,32 @@ def _seekup_to_string_by_dependency(results, modules, licenses_dict=None):
     return result_str
 
 
+def _state_to_string(refreshed, from_state):
+    """Return which packages were looked up and which were served from the
+    state of previous runs, in a string format
+
+    :param refreshed: list of packages looked up
+    :param from_state: list of packages served from the state
+    """
+    return '\nLooked up:  {0}\nKept from previous runs:  {1}\n'.format(
+        ', '.join(refreshed), ', '.join(from_state))
+
+
+def _cache_result_to_string(result):
+    """Return the result of a cache action in a string format
+
+    :param result: dictionary of the result fields
+    """
+
+    result_str = ''
+    for key in sorted(result):
+        value = result[key]
+        if isinstance(value, list):
+            value = ', '.join(value)
+        result_str += '{0}:  {1}\n'.format(key, value)
+    return result_str.rstrip('\n')
+
+
 def _illegitimate_licenses_to_string(illegitimate_licenses):
     """Return a string with the given illegitimate licenses
 
@@ -192,7 +260,185 @@ def _get_dependencies_from_path(kwargs):
 
     # get dependencies list of each file - in parallel
     return _parallel(
-        dependencies.get_from_file, paths, kwargs[consts.MAX_JOBS_STR])
+        dependencies.get_from_file, paths, kwargs[consts.MAX_JOBS_STR],
+        backend=_get_backend(kwargs, consts.PARSE_BACKEND_DEFAULT))
+
+
+def _add_dependencies(dependencies_dict, modules_dict, sub_list, module,
+                      by_module):
+    """Add the dependencies of a module to the dependencies dictionary and
+    to the dictionary of dep per modules, and return the packages which
+    were not in the dependencies dictionary yet
+
+    :param dependencies_dict: mapping packages to lists of requirements
+    :param modules_dict: mapping modules to dependencies (or vise versa)
+    :param sub_list: list of (package, version, operator) of the module
+    :param module: the module name
+    :param by_module: true if modules_dict keys are modules
+    """
+
+    new_packages = []
+    for package, version, operator in sub_list:
+        if package not in dependencies_dict:
+            dependencies_dict[package] = []
+            new_packages.append(package)
+        if operator + version not in dependencies_dict[package]:
+            dependencies_dict[package].append(operator + version)
+
+        if by_module:
+            dict_key = module
+            dict_list_item = package, operator + version
+        else:
+            dict_key = package + operator + version
+            dict_list_item = module
+        if dict_key not in modules_dict:
+            modules_dict[dict_key] = []
+        modules_dict[dict_key].append(dict_list_item)
+    return new_packages
+
+
+def _get_from_state(seekup_state, package, license_required, known_newer):
+    """Return the versions kept for a package by previous runs, in the form
+    returned by versions.get_from_pypi, None if there are no fresh ones
+
+    :param seekup_state: the state of previous runs, None if there is none
+    :param package: package name
+    :param license_required: whether the package license is needed
+    :param known_newer: filled with (package, requirement) mapped to newer
+    versions kept for the package
+    """
+
+    if seekup_state is None:
+        return None
+    entry = seekup_state.get(package, license_required)
+    if entry is None:
+        return None
+    for require, newer in entry[consts.STATE_NEWER_KEY].items():
+        known_newer[package, require] = [str(ver) for ver in newer]
+    package_license = entry[consts.STATE_LICENSE_KEY]
+    return (package,
+            [str(ver) for ver in entry[consts.STATE_VERSIONS_KEY]],
+            consts.UNKNOWN_LICENSE_STR if package_license is None
+            else package_license)
+
+
+def _update_state(seekup_state, versions_list, results, from_state,
+                  license_required):
+    """Keep the versions just looked up, and the newer versions found for
+    each requirement, for the next runs
+
+    :param seekup_state: the state of previous runs
+    :param versions_list: list of (package, versions, license)
+    :param results: the new versions available (see get_new_available)
+    :param from_state: packages whose versions were kept by previous runs
+    :param license_required: whether licenses were looked up
+    """
+
+    newer_dict = {}
+    for result in results:
+        newer_dict.setdefault(result[consts.PACKAGE_KEY], {})[
+            result[consts.REQUIRE_KEY]] = result[consts.NEW_VERS_KEY]
+    for package, vers, lic in versions_list:
+        if not vers:
+            continue
+        if package in from_state:
+            # the entry may have gone stale since it was read
+            seekup_state.add_newer(package, newer_dict.get(package, {}))
+        else:
+            seekup_state.update(package, vers,
+                                lic if license_required else None,
+                                newer_dict.get(package))
+    seekup_state.save()
+
+
+def _get_new_available(kwargs, my_versions, all_versions, known=None):
+    """Return the newer versions available for each requirement, as many as
+    the seekup mode reports (see versions.get_new_available)
+
+    :param kwargs: arguments
+    :param my_versions: a dictionary mapping package name to list of versions
+    in current project
+    :param all_versions: a dictionary mapping package name to list of versions
+    available on pypi
+    :param known: a dictionary mapping (package name, version in current
+    project) to all the newer versions already found, None if there are none
+    """
+
+    mode = kwargs.get(consts.SEEKUP_MODE_STR, consts.SEEKUP_MODE_DEFAULT)
+    if mode == consts.SEEKUP_MODE_ALL_STR:
+        search = batch if batch.is_vectorized() else versions
+        return search.get_new_available(my_versions, all_versions, known)
+    return versions.get_latest_available(
+        my_versions, all_versions,
+        compatible=mode == consts.SEEKUP_MODE_COMPATIBLE_STR)
+
+
+def _seekup_pipeline(kwargs, dependencies_dict, modules_dict, known_newer,
+                     seekup_state=None, from_state=None):
+    """Get dependencies for project(s) in a given path via setup.py files,
+    and the versions available for them, with both stages overlapping
+
+    each package is looked up as soon as the first setup.py file requiring
+    it is parsed (unless its versions are served from the state of previous
+    runs), and its newer versions are found as soon as its lookup completes.
+    requirements found later are compared by the caller
+
+    :param kwargs: arguments
+    :param dependencies_dict: filled with packages mapped to requirements
+    :param modules_dict: filled with modules mapped to dependencies
+    :param known_newer: filled with (package, requirement) mapped to newer
+    versions
+    :param seekup_state: the state of previous runs, None if there is none
+    :param from_state: filled with packages served from the state
+    """
+
+    paths = _find_files_in_path(
+        consts.SETUP_FILE_NAME, kwargs[consts.INPUT_STR])
+    if not paths:
+        return consts.ERROR_MESSAGE_NO_SETUP
+
+    parsed = executors.get_executor(
+        _get_backend(kwargs, consts.PARSE_BACKEND_DEFAULT),
+        kwargs[consts.MAX_JOBS_STR]
+    ).imap_unordered(dependencies.get_from_file, paths)
+
+    versions_list = []
+    if from_state is None:
+        from_state = set()
+
+    def discovered():
+        for sub_list, module, _ in parsed:
+            for package in _add_dependencies(
+                    dependencies_dict, modules_dict, sub_list, module,
+                    kwargs[consts.BY_MODULE_STR]):
+                result = _get_from_state(
+                    seekup_state, package,
+                    kwargs[consts.SHOW_LICENSE_STR] is not None, known_newer)
+                if result is None:
+                    yield package
+                else:
+                    from_state.add(package)
+                    versions_list.append(result)
+
+    for result in executors.get_executor(
+            _get_backend(kwargs, consts.FETCH_BACKEND_DEFAULT),
+            kwargs[consts.MAX_JOBS_STR], _worker_settings()
+    ).imap_unordered(versions.get_from_pypi, discovered()):
+        versions_list.append(result)
+        name, vers, _ = result
+        # only all the newer versions are worth keeping
+        if vers and kwargs.get(consts.SEEKUP_MODE_STR,
+                               consts.SEEKUP_MODE_DEFAULT) \
+                == consts.SEEKUP_MODE_ALL_STR:
+            for item in versions.get_new_available(
+                    {name: list(dependencies_dict[name])}, {name: vers}):
+                known_newer[item[consts.PACKAGE_KEY],
+                            item[consts.REQUIRE_KEY]] = \
+                    item[consts.NEW_VERS_KEY]
+
+    if not dependencies_dict:
+        return consts.ERROR_MESSAGE_NO_DEPENDENCIES
+    return versions_list
 
 
 def _get_dependencies_from_url(kwargs):
@@ -209,7 +455,8 @@ def _get_dependencies_from_url(kwargs):
 
 
 def _get_dependencies_by_package_name(kwargs):
-    """Get dependencies for a package given by name via pipdeptree tool
+    """Get dependencies for a package given by name, from the metadata of the
+    installed distributions
 
     :param kwargs: arguments
     """
@@ -232,6 +479,124 @@ INPUTS = {
     consts.INPUT_URL_STR: _get_dependencies_from_url
 }
 
+INDEX_POLICIES = [consts.INDEX_POLICY_FIRST_STR, consts.INDEX_POLICY_MERGE_STR]
+
+EXCLUDES = [
+    consts.EXCLUDE_PRE_STR,
+    consts.EXCLUDE_YANKED_STR,
+    consts.EXCLUDE_FILELESS_STR
+]
+
+SEEKUP_MODES = [
+    consts.SEEKUP_MODE_ALL_STR,
+    consts.SEEKUP_MODE_LATEST_STR,
+    consts.SEEKUP_MODE_COMPATIBLE_STR
+]
+
+CACHE_ACTIONS = [
+    consts.CACHE_WARM_STR,
+    consts.CACHE_STATS_STR,
+    consts.CACHE_PRUNE_STR,
+    consts.CACHE_EXPORT_STR,
+    consts.CACHE_IMPORT_STR
+]
+
+
+def _check_fetch_kwargs(kwargs):
+    """Return an error message if the arguments controlling how pypi data is
+    fetched are illegal, None otherwise
+
+    :param kwargs: arguments
+    """
+
+    if kwargs[consts.BACKEND_STR] not in [None] + BACKENDS:
+        return consts.ERROR_MESSAGE_ILLEGAL_BACKEND.format(BACKENDS)
+    if kwargs[consts.SOURCE_STR] not in versions.SOURCES:
+        return consts.ERROR_MESSAGE_ILLEGAL_SOURCE.format(
+            versions.SOURCES.keys())
+    if kwargs[consts.SOURCE_STR] == consts.SOURCE_MIRROR_STR \
+            and not kwargs[consts.MIRROR_STR]:
+        return consts.ERROR_MESSAGE_NO_MIRROR.format(
+            consts.SOURCE_MIRROR_STR, consts.MIRROR_ARG_STR)
+    if kwargs[consts.INDEX_POLICY_STR] not in INDEX_POLICIES:
+        return consts.ERROR_MESSAGE_ILLEGAL_INDEX_POLICY.format(
+            INDEX_POLICIES)
+    if kwargs[consts.CACHE_BACKEND_STR] not in cache.BACKENDS:
+        return consts.ERROR_MESSAGE_ILLEGAL_CACHE_BACKEND.format(
+            cache.BACKENDS.keys())
+    for exclude in kwargs[consts.EXCLUDE_STR]:
+        if exclude not in EXCLUDES:
+            return consts.ERROR_MESSAGE_ILLEGAL_EXCLUDE.format(EXCLUDES)
+    return None
+
+
+def _add_fetch_arguments(parser):
+    """Add the arguments controlling how pypi data is fetched to a sub-parser
+
+    :param parser: the sub-command parser
+    """
+
+    parser.add_argument(
+        consts.BACKEND_ARG_STR, dest=consts.BACKEND_STR, type=str,
+        default=consts.BACKEND_DEFAULT,
+        help=consts.BACKEND_HELP_STR.format(
+            consts.BACKEND_SERIAL_STR, consts.BACKEND_THREAD_STR,
+            consts.BACKEND_PROCESS_STR, consts.BACKEND_ASYNC_STR,
+            consts.FETCH_BACKEND_DEFAULT, consts.PARSE_BACKEND_DEFAULT))
+    parser.add_argument(
+        consts.SOURCE_ARG_STR, dest=consts.SOURCE_STR, type=str,
+        default=consts.SOURCE_DEFAULT,
+        help=consts.SOURCE_HELP_STR.format(
+            consts.SOURCE_JSON_STR, consts.SOURCE_SIMPLE_STR,
+            consts.SOURCE_MIRROR_STR, consts.MIRROR_ARG_STR))
+    parser.add_argument(
+        consts.INDEXES_ARG_STR, dest=consts.INDEXES_STR, type=str, nargs='+',
+        default=consts.INDEXES_DEFAULT,
+        help=consts.INDEXES_HELP_STR.format(
+            consts.SOURCE_JSON_STR, consts.PYPI_URL))
+    parser.add_argument(
+        consts.INDEX_POLICY_ARG_STR, dest=consts.INDEX_POLICY_STR, type=str,
+        default=consts.INDEX_POLICY_DEFAULT,
+        help=consts.INDEX_POLICY_HELP_STR.format(
+            consts.INDEX_POLICY_FIRST_STR, consts.INDEX_POLICY_MERGE_STR))
+    parser.add_argument(
+        consts.SIMPLE_INDEX_ARG_STR, dest=consts.SIMPLE_INDEX_STR, type=str,
+        default=consts.SIMPLE_INDEX_DEFAULT,
+        help=consts.SIMPLE_INDEX_HELP_STR.format(
+            consts.SOURCE_SIMPLE_STR, consts.SIMPLE_INDEX_DEFAULT))
+    parser.add_argument(
+        consts.MIRROR_ARG_STR, dest=consts.MIRROR_STR, type=str,
+        default=consts.MIRROR_DEFAULT,
+        help=consts.MIRROR_HELP_STR.format(consts.SOURCE_MIRROR_STR))
+    parser.add_argument(
+        consts.EXCLUDE_ARG_STR, dest=consts.EXCLUDE_STR, type=str, nargs='*',
+        default=consts.EXCLUDE_DEFAULT,
+        help=consts.EXCLUDE_HELP_STR.format(*EXCLUDES))
+    parser.add_argument(
+        consts.CACHE_DIR_ARG_STR, dest=consts.CACHE_DIR_STR, type=str,
+        default=consts.CACHE_DIR_DEFAULT, help=consts.CACHE_DIR_HELP_STR)
+    parser.add_argument(
+        consts.CACHE_TTL_ARG_STR, dest=consts.CACHE_TTL_STR, type=int,
+        default=consts.CACHE_TTL_DEFAULT, help=consts.CACHE_TTL_HELP_STR)
+    parser.add_argument(
+        consts.CACHE_BACKEND_ARG_STR, dest=consts.CACHE_BACKEND_STR, type=str,
+        default=consts.CACHE_BACKEND_DEFAULT,
+        help=consts.CACHE_BACKEND_HELP_STR.format(
+            consts.CACHE_BACKEND_SQLITE_STR, consts.CACHE_BACKEND_FILES_STR))
+    parser.add_argument(
+        consts.CONNECT_TIMEOUT_ARG_STR, dest=consts.CONNECT_TIMEOUT_STR,
+        type=float, default=consts.CONNECT_TIMEOUT_DEFAULT,
+        help=consts.CONNECT_TIMEOUT_HELP_STR.format(
+            consts.CONNECT_TIMEOUT_DEFAULT))
+    parser.add_argument(
+        consts.READ_TIMEOUT_ARG_STR, dest=consts.READ_TIMEOUT_STR,
+        type=float, default=consts.READ_TIMEOUT_DEFAULT,
+        help=consts.READ_TIMEOUT_HELP_STR.format(consts.READ_TIMEOUT_DEFAULT))
+    parser.add_argument(
+        consts.HEDGE_ARG_STR, dest=consts.HEDGE_STR,
+        action=consts.STORE_CONST_ACTION, const=True, default=False,
+        help=consts.HEDGE_HELP_STR)
+
 
 def _parse_args():
     """Parse the argument and initialize mode indicators
@@ -263,7 +628,22 @@ def _parse_args():
         default=None, help=consts.REQUIREMENTS_HELP_STR)
     seekup_parser.add_argument(
         consts.MAX_JOBS_ARG_STR, dest=consts.MAX_JOBS_STR, type=int,
-        default=consts.MAX_JOBS_DEFAULT, help=consts.MAX_JOBS_HELP_STR)
+        default=consts.MAX_JOBS_DEFAULT,
+        help=consts.MAX_JOBS_HELP_STR.format(
+            consts.ASYNC_CONCURRENCY_DEFAULT))
+    _add_fetch_arguments(seekup_parser)
+    seekup_parser.add_argument(
+        consts.STATE_ARG_STR, dest=consts.STATE_STR, type=str,
+        default=consts.STATE_DEFAULT, help=consts.STATE_HELP_STR)
+    seekup_parser.add_argument(
+        consts.FRESHNESS_ARG_STR, dest=consts.FRESHNESS_STR, type=int,
+        default=consts.FRESHNESS_DEFAULT,
+        help=consts.FRESHNESS_HELP_STR.format(
+            consts.STATE_ARG_STR, consts.FRESHNESS_DEFAULT))
+    seekup_parser.add_argument(
+        consts.SEEKUP_MODE_ARG_STR, dest=consts.SEEKUP_MODE_STR, type=str,
+        default=consts.SEEKUP_MODE_DEFAULT,
+        help=consts.SEEKUP_MODE_HELP_STR.format(*SEEKUP_MODES))
     seekup_parser.add_argument(
         consts.INPUT_STR, metavar=consts.INPUT_METAVAR_STR, type=str,
         help=consts.INPUT_HELP_STR)
@@ -290,7 +670,10 @@ def _parse_args():
         help=consts.SUMMARY_HELP_STR)
     showpack_parser.add_argument(
         consts.MAX_JOBS_ARG_STR, dest=consts.MAX_JOBS_STR, type=int,
-        default=consts.MAX_JOBS_DEFAULT, help=consts.MAX_JOBS_HELP_STR)
+        default=consts.MAX_JOBS_DEFAULT,
+        help=consts.MAX_JOBS_HELP_STR.format(
+            consts.ASYNC_CONCURRENCY_DEFAULT))
+    _add_fetch_arguments(showpack_parser)
     showpack_parser.add_argument(
         consts.RETURN_DATA_ARG_STR, dest=consts.RETURN_DATA_STR,
         action=consts.STORE_CONST_ACTION, const=True, default=False,
@@ -324,11 +707,47 @@ def _parse_args():
         default=None, help=consts.REQUIREMENTS_HELP_STR)
     licenses_parser.add_argument(
         consts.MAX_JOBS_ARG_STR, dest=consts.MAX_JOBS_STR, type=int,
-        default=consts.MAX_JOBS_DEFAULT, help=consts.MAX_JOBS_HELP_STR)
+        default=consts.MAX_JOBS_DEFAULT,
+        help=consts.MAX_JOBS_HELP_STR.format(
+            consts.ASYNC_CONCURRENCY_DEFAULT))
+    _add_fetch_arguments(licenses_parser)
     licenses_parser.add_argument(
         consts.INPUT_STR, metavar=consts.INPUT_METAVAR_STR, type=str,
         help=consts.INPUT_HELP_STR)
 
+    cache_parser = subparsers.add_parser(
+        consts.CACHE_STR, description=consts.CACHE_DESCRIPTION)
+    cache_parser.add_argument(
+        consts.CACHE_ACTION_STR, metavar=consts.CACHE_ACTION_METAVAR_STR,
+        type=str, help=consts.CACHE_ACTION_HELP_STR.format(*CACHE_ACTIONS))
+    cache_parser.add_argument(
+        consts.ENVIRONMENT_ARG_STR, dest=consts.ENVIRONMENT_STR,
+        action=consts.STORE_CONST_ACTION, const=True, default=False,
+        help=consts.ENVIRONMENT_HELP_STR.format(consts.CACHE_WARM_STR))
+    cache_parser.add_argument(
+        consts.MAX_AGE_ARG_STR, dest=consts.MAX_AGE_STR, type=int,
+        default=consts.MAX_AGE_DEFAULT,
+        help=consts.MAX_AGE_HELP_STR.format(consts.CACHE_PRUNE_STR))
+    cache_parser.add_argument(
+        consts.MAX_SIZE_ARG_STR, dest=consts.MAX_SIZE_STR, type=int,
+        default=consts.MAX_SIZE_DEFAULT,
+        help=consts.MAX_SIZE_HELP_STR.format(consts.CACHE_PRUNE_STR))
+    cache_parser.add_argument(
+        consts.MAX_JOBS_ARG_STR, dest=consts.MAX_JOBS_STR, type=int,
+        default=consts.MAX_JOBS_DEFAULT,
+        help=consts.MAX_JOBS_HELP_STR.format(
+            consts.ASYNC_CONCURRENCY_DEFAULT))
+    _add_fetch_arguments(cache_parser)
+    cache_parser.add_argument(
+        consts.RETURN_DATA_ARG_STR, dest=consts.RETURN_DATA_STR,
+        action=consts.STORE_CONST_ACTION, const=True, default=False,
+        help=consts.RETURN_DATA_HELP_STR)
+    cache_parser.add_argument(
+        consts.INPUT_STR, metavar=consts.INPUT_METAVAR_STR, type=str,
+        nargs='*', help=consts.CACHE_INPUT_HELP_STR.format(
+            consts.CACHE_WARM_STR, consts.CACHE_EXPORT_STR,
+            consts.CACHE_IMPORT_STR))
+
     args = main_parser.parse_args()
     return vars(args)
 
@@ -344,6 +763,19 @@ def show_package(**kwargs):
         consts.DEPTH_STR: consts.DEFAULT_DEPTH,
         consts.REQUIREMENTS_STR: consts.REQUIREMENTS_DEFAULT,
         consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+        consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+        consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+        consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+        consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+        consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+        consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+        consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+        consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+        consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+        consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT,
+        consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+        consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+        consts.HEDGE_STR: False,
         consts.SHOW_LICENSE_STR: None,
         consts.VERSIONS_STR: False,
         consts.HOMEPAGE_STR: False,
@@ -353,6 +785,14 @@ def show_package(**kwargs):
     _set_default_kwargs(kwargs, default_kwargs)
     if consts.INPUT_STR not in kwargs:
         return consts.ERROR_MESSAGE_NO_INPUT
+    error = _check_fetch_kwargs(kwargs)
+    if error is not None:
+        return error
+    kwargs[consts.INFO_REQUIRED_STR] = \
+        kwargs[consts.SHOW_LICENSE_STR] is not None \
+        or kwargs[consts.HOMEPAGE_STR] or kwargs[consts.SUMMARY_STR]
+    versions.configure(**kwargs)
+    network.configure(**kwargs)
 
     dependencies_tree = dependencies.build_tree(
         kwargs[consts.INPUT_STR], kwargs[consts.DEPTH_STR])
@@ -363,9 +803,11 @@ def show_package(**kwargs):
             or kwargs[consts.VERSIONS_STR] \
             or kwargs[consts.HOMEPAGE_STR] \
             or kwargs[consts.SUMMARY_STR]:
-        packages_list = _parallel(versions.get_package_data_from_pypi,
-                                  dependencies_tree.keys(),
-                                  kwargs[consts.MAX_JOBS_STR])
+        packages_list = _parallel(
+            versions.get_package_data_from_pypi,
+            dependencies_tree.keys(),
+            kwargs[consts.MAX_JOBS_STR],
+            backend=_get_backend(kwargs, consts.FETCH_BACKEND_DEFAULT))
         packages_dict = dict(
             (item[consts.INFO_KEY][consts.NAME_KEY].lower(), item)
             for item in packages_list
@@ -389,7 +831,7 @@ def show_package(**kwargs):
             if kwargs[consts.SHOW_LICENSE_STR] is not None else None,
             consts.HOMEPAGE_KEY: info.get(consts.HOMEPAGE_KEY, consts.UNKNOWN)
             if kwargs[consts.HOMEPAGE_STR] else None,
-            consts.VERSIONS_KEY: pack_dict.get(consts.RELEASES_KEY, {}).keys()
+            consts.VERSIONS_KEY: list(pack_dict.get(consts.RELEASES_KEY, []))
             if kwargs[consts.VERSIONS_STR] else None
         }
         dependencies_tree[pack] = dict(
@@ -432,6 +874,22 @@ def seekup(**kwargs):
         consts.INPUT_TYPE_STR: consts.DEFAULT_INPUT,
         consts.REQUIREMENTS_STR: consts.REQUIREMENTS_DEFAULT,
         consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+        consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+        consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+        consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+        consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+        consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+        consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+        consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+        consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+        consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+        consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT,
+        consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+        consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+        consts.HEDGE_STR: False,
+        consts.STATE_STR: consts.STATE_DEFAULT,
+        consts.FRESHNESS_STR: consts.FRESHNESS_DEFAULT,
+        consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_DEFAULT,
         consts.SHOW_LICENSE_STR: None,
         consts.BY_MODULE_STR: False,
         consts.RETURN_DATA_STR: False
@@ -440,42 +898,65 @@ def seekup(**kwargs):
     kwargs[consts.DEPTH_STR] = 0
     if consts.INPUT_STR not in kwargs:
         return consts.ERROR_MESSAGE_NO_INPUT
+    error = _check_fetch_kwargs(kwargs)
+    if error is not None:
+        return error
     if kwargs[consts.INPUT_TYPE_STR] not in INPUTS:
         return consts.ERROR_MESSAGE_ILLEGAL_INPUT_TYPE.format(INPUTS.keys())
-
-    dependencies_list = INPUTS[kwargs[consts.INPUT_TYPE_STR]](kwargs)
-
-    if isinstance(dependencies_list, basestring):
-        return dependencies_list
-
-    # build a dictionary of dependencies
+    if kwargs[consts.SEEKUP_MODE_STR] not in SEEKUP_MODES:
+        return consts.ERROR_MESSAGE_ILLEGAL_SEEKUP_MODE.format(SEEKUP_MODES)
+    kwargs[consts.INFO_REQUIRED_STR] = \
+        kwargs[consts.SHOW_LICENSE_STR] is not None
+    versions.configure(**kwargs)
+    network.configure(**kwargs)
+
+    # build a dictionary of dependencies, and of dep per modules
     dependencies_dict = {}
     modules_dict = {}
-    for sub_list, module, _ in dependencies_list:
-        for package, version, operator in sub_list:
-            if package not in dependencies_dict:
-                dependencies_dict[package] = []
-            if operator + version not in dependencies_dict[package]:
-                dependencies_dict[package].append(operator + version)
-
-            # build a dictionary of dep per modules
-            if kwargs[consts.BY_MODULE_STR]:
-                dict_key = module
-                dict_list_item = package, operator + version
+    known_newer = {}
+    seekup_state = state.SeekupState(
+        kwargs[consts.STATE_STR], kwargs[consts.FRESHNESS_STR],
+        versions.settings_key()
+    ) if kwargs[consts.STATE_STR] else None
+    from_state = set()
+    if kwargs[consts.INPUT_TYPE_STR] == consts.INPUT_PATH_STR:
+        versions_list = _seekup_pipeline(
+            kwargs, dependencies_dict, modules_dict, known_newer,
+            seekup_state, from_state)
+        if isinstance(versions_list, basestring):
+            return versions_list
+    else:
+        dependencies_list = INPUTS[kwargs[consts.INPUT_TYPE_STR]](kwargs)
+
+        if isinstance(dependencies_list, basestring):
+            return dependencies_list
+
+        for sub_list, module, _ in dependencies_list:
+            _add_dependencies(dependencies_dict, modules_dict, sub_list,
+                              module, kwargs[consts.BY_MODULE_STR])
+
+        if not dependencies_dict:
+            return consts.ERROR_MESSAGE_NO_DEPENDENCIES
+
+        # serve what previous runs found recently enough
+        versions_list = []
+        stale = []
+        for package in dependencies_dict:
+            result = _get_from_state(
+                seekup_state, package,
+                kwargs[consts.SHOW_LICENSE_STR] is not None, known_newer)
+            if result is None:
+                stale.append(package)
             else:
-                dict_key = package + operator + version
-                dict_list_item = module
-            if dict_key not in modules_dict:
-                modules_dict[dict_key] = []
-            modules_dict[dict_key].append(dict_list_item)
-
-    if not dependencies_dict:
-        return consts.ERROR_MESSAGE_NO_DEPENDENCIES
-
-    # get versions available from chosen source - in parallel
-    versions_list = _parallel(versions.get_from_pypi,
-                              dependencies_dict.keys(),
-                              kwargs[consts.MAX_JOBS_STR])
+                from_state.add(package)
+                versions_list.append(result)
+
+        # get versions available from chosen source - in parallel
+        versions_list += _parallel(
+            versions.get_from_pypi,
+            stale,
+            kwargs[consts.MAX_JOBS_STR],
+            backend=_get_backend(kwargs, consts.FETCH_BACKEND_DEFAULT))
     # put versions available and license in a dictionaries
     versions_dict = dict((name, vers)
                          for name, vers, lic in versions_list
@@ -496,8 +977,9 @@ def seekup(**kwargs):
         return consts.ERROR_MESSAGE_NO_VERSIONS
 
     # get the new versions available for each dependency
-    results = versions.get_new_available(
-        dependencies_dict, versions_dict)
+    all_newer = kwargs[consts.SEEKUP_MODE_STR] == consts.SEEKUP_MODE_ALL_STR
+    results = _get_new_available(
+        kwargs, dependencies_dict, versions_dict, known_newer)
 
     result_dict = {
         consts.RESULTS_KEY: results,
@@ -507,6 +989,14 @@ def seekup(**kwargs):
         result_dict[consts.LICENSE_KEY] = license_dict
     if illegitimate_licenses is not None:
         result_dict[consts.ILLEGITIMATE_LICENSES_KEY] = illegitimate_licenses
+    if seekup_state is not None:
+        # the state keeps all the newer versions, or none
+        _update_state(seekup_state, versions_list,
+                      results if all_newer else [], from_state,
+                      kwargs[consts.SHOW_LICENSE_STR] is not None)
+        result_dict[consts.REFRESHED_KEY] = sorted(
+            name for name, _, __ in versions_list if name not in from_state)
+        result_dict[consts.FROM_STATE_KEY] = sorted(from_state)
 
     if kwargs[consts.RETURN_DATA_STR]:
         return json.dumps(result_dict, indent=consts.TAB_SIZE)
@@ -518,6 +1008,9 @@ def seekup(**kwargs):
         result_str = _seekup_to_string_by_dependency(
             results, modules_dict, license_dict)
 
+    if seekup_state is not None:
+        result_str += _state_to_string(result_dict[consts.REFRESHED_KEY],
+                                       result_dict[consts.FROM_STATE_KEY])
     return result_str + _illegitimate_licenses_to_string(illegitimate_licenses)
 
 
@@ -531,6 +1024,19 @@ def licenses(**kwargs):
     default_kwargs = {
         consts.INPUT_TYPE_STR: consts.DEFAULT_INPUT,
         consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+        consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+        consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+        consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+        consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+        consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+        consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+        consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+        consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+        consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+        consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT,
+        consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+        consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+        consts.HEDGE_STR: False,
         consts.DEPTH_STR: consts.DEFAULT_DEPTH,
         consts.REQUIREMENTS_STR: consts.REQUIREMENTS_DEFAULT,
         consts.SHOW_LICENSE_STR: None,
@@ -540,8 +1046,14 @@ def licenses(**kwargs):
     _set_default_kwargs(kwargs, default_kwargs)
     if consts.INPUT_STR not in kwargs:
         return consts.ERROR_MESSAGE_NO_INPUT
+    error = _check_fetch_kwargs(kwargs)
+    if error is not None:
+        return error
     if kwargs[consts.INPUT_TYPE_STR] not in INPUTS:
         return consts.ERROR_MESSAGE_ILLEGAL_INPUT_TYPE.format(INPUTS.keys())
+    kwargs[consts.INFO_REQUIRED_STR] = True
+    versions.configure(**kwargs)
+    network.configure(**kwargs)
 
     dependencies_list = INPUTS[kwargs[consts.INPUT_TYPE_STR]](kwargs)
     if isinstance(dependencies_list, basestring):
@@ -556,7 +1068,8 @@ def licenses(**kwargs):
             dependencies_set.add(dep)
 
     packages = _parallel(
-        versions.get_from_pypi, dependencies_set, kwargs[consts.MAX_JOBS_STR])
+        versions.get_from_pypi, dependencies_set, kwargs[consts.MAX_JOBS_STR],
+        backend=_get_backend(kwargs, consts.FETCH_BACKEND_DEFAULT))
 
     licenses_dict = {}
     illegitimate_licenses = {}
@@ -587,10 +1100,161 @@ def licenses(**kwargs):
         + _illegitimate_licenses_to_string(illegitimate_licenses)
 
 
+def _warm_cache(kwargs, cache_store):
+    """Fetch the given packages (and those of the environment if asked) so
+    their pypi data is kept in the cache
+
+    :param kwargs: arguments inserted via CLI
+    :param cache_store: the cache
+    """
+
+    packages = list(kwargs[consts.INPUT_STR])
+    if kwargs[consts.ENVIRONMENT_STR]:
+        environment_packages = dependencies.get_environment_packages()
+        if environment_packages is None:
+            return consts.ERROR_MESSAGE_BUILDING_DEPTREE
+        packages.extend(environment_packages)
+    if not packages:
+        return consts.ERROR_MESSAGE_NO_INPUT
+    packages = sorted(set(packages))
+
+    kwargs[consts.INFO_REQUIRED_STR] = False
+    versions.configure(**kwargs)
+    network.configure(**kwargs)
+    records = _parallel(
+        versions.get_package_data_from_pypi, packages,
+        kwargs[consts.MAX_JOBS_STR],
+        backend=_get_backend(kwargs, consts.FETCH_BACKEND_DEFAULT))
+    versions.save_cache_counts()
+    return {
+        consts.CACHE_WARMED_KEY: [package for package, record
+                                  in zip(packages, records)
+                                  if record is not None],
+        consts.CACHE_FAILED_KEY: [package for package, record
+                                  in zip(packages, records)
+                                  if record is None]
+    }
+
+
+def _cache_stats(kwargs, cache_store):
+    """Return the size, entry count and hit ratio of the cache
+
+    :param kwargs: arguments inserted via CLI
+    :param cache_store: the cache
+    """
+
+    return cache_store.stats()
+
+
+def _prune_cache(kwargs, cache_store):
+    """Remove old entries from the cache
+
+    :param kwargs: arguments inserted via CLI
+    :param cache_store: the cache
+    """
+
+    if kwargs[consts.MAX_AGE_STR] is None \
+            and kwargs[consts.MAX_SIZE_STR] is None:
+        return consts.ERROR_MESSAGE_NO_PRUNE_LIMIT
+    return {consts.CACHE_REMOVED_KEY: cache_store.prune(
+        kwargs[consts.MAX_AGE_STR], kwargs[consts.MAX_SIZE_STR])}
+
+
+def _export_cache(kwargs, cache_store):
+    """Write all the cache entries to a bundle file
+
+    :param kwargs: arguments inserted via CLI
+    :param cache_store: the cache
+    """
+
+    if len(kwargs[consts.INPUT_STR]) != 1:
+        return consts.ERROR_MESSAGE_NO_BUNDLE
+    try:
+        return {consts.CACHE_EXPORTED_KEY: cache_store.export_bundle(
+            kwargs[consts.INPUT_STR][0])}
+    except (IOError, OSError) as ex:
+        return consts.ERROR_MESSAGE_BUNDLE.format(ex)
+
+
+def _import_cache(kwargs, cache_store):
+    """Add the entries of a bundle file to the cache
+
+    :param kwargs: arguments inserted via CLI
+    :param cache_store: the cache
+    """
+
+    if len(kwargs[consts.INPUT_STR]) != 1:
+        return consts.ERROR_MESSAGE_NO_BUNDLE
+    try:
+        return {consts.CACHE_IMPORTED_KEY: cache_store.import_bundle(
+            kwargs[consts.INPUT_STR][0])}
+    except (IOError, OSError, tarfile.TarError) as ex:
+        return consts.ERROR_MESSAGE_BUNDLE.format(ex)
+
+
+_CACHE_FUNCTIONS = {
+    consts.CACHE_WARM_STR: _warm_cache,
+    consts.CACHE_STATS_STR: _cache_stats,
+    consts.CACHE_PRUNE_STR: _prune_cache,
+    consts.CACHE_EXPORT_STR: _export_cache,
+    consts.CACHE_IMPORT_STR: _import_cache
+}
+
+
+def manage_cache(**kwargs):
+    """Warm, inspect, prune, export or import the cache of pypi data
+
+    :param kwargs: arguments inserted via CLI
+    """
+
+    # check kwargs
+    default_kwargs = {
+        consts.INPUT_STR: [],
+        consts.ENVIRONMENT_STR: False,
+        consts.MAX_AGE_STR: consts.MAX_AGE_DEFAULT,
+        consts.MAX_SIZE_STR: consts.MAX_SIZE_DEFAULT,
+        consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+        consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+        consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+        consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+        consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+        consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+        consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+        consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+        consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+        consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+        consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT,
+        consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+        consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+        consts.HEDGE_STR: False,
+        consts.RETURN_DATA_STR: False
+    }
+    _set_default_kwargs(kwargs, default_kwargs)
+    if kwargs.get(consts.CACHE_ACTION_STR) not in CACHE_ACTIONS:
+        return consts.ERROR_MESSAGE_ILLEGAL_CACHE_ACTION.format(CACHE_ACTIONS)
+    if not kwargs[consts.CACHE_DIR_STR]:
+        return consts.ERROR_MESSAGE_NO_CACHE_DIR
+    error = _check_fetch_kwargs(kwargs)
+    if error is not None:
+        return error
+
+    cache_store = cache.BACKENDS[kwargs[consts.CACHE_BACKEND_STR]](
+        kwargs[consts.CACHE_DIR_STR], kwargs[consts.CACHE_TTL_STR])
+    result = _CACHE_FUNCTIONS[kwargs[consts.CACHE_ACTION_STR]](
+        kwargs, cache_store)
+    if isinstance(result, basestring):
+        return result
+
+    if kwargs[consts.RETURN_DATA_STR]:
+        return json.dumps(result, indent=consts.TAB_SIZE, sort_keys=True)
+    return _cache_result_to_string(result)
+
+
 functions_dict = {
     consts.SEEKUP_STR: seekup,
     consts.SHOWPACK_STR: show_package,
-    consts.LICENSES_STR: licenses
+    consts.LICENSES_STR: licenses,
+    consts.CACHE_STR: manage_cache
 }
 
 
@@ -599,6 +1263,7 @@ def main():
 
     """
     kwargs = _parse_args()
+    logging.basicConfig(format=consts.LOG_FORMAT)
     sys.stdout.write(
         functions_dict[kwargs[consts.SUBCOMMAND_STR]](**kwargs) + '\n')
 
@@ -0,0 +1,326 @@
+"""Used to read the metadata of the distributions installed in the current
+environment, in process.
+
+"""
+
+import os
+import re
+import sys
+import platform
+
+from . import names
+from . import consts
+from . import versions
+
+
+# a token of an environment marker (see PEP 508)
+_MARKER_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'[^']*'|"[^"]*")
+       |(?P<op>===|==|!=|<=|>=|~=|<|>|not\s+in\b|in\b)
+       |(?P<bool>and\b|or\b)
+       |(?P<paren>[()])
+       |(?P<name>[a-z_][a-z0-9_.]*)
+    )
+""", re.VERBOSE | re.IGNORECASE)
+
+# the values of the environment markers, see _marker_environment
+_environment = {}
+
+
+def _marker_environment():
+    """Return the values of the environment markers for this interpreter
+
+    """
+
+    if not _environment:
+        python_version = platform.python_version()
+        _environment.update({
+            'os_name': os.name,
+            'sys_platform': sys.platform,
+            'platform_machine': platform.machine(),
+            'platform_release': platform.release(),
+            'platform_system': platform.system(),
+            'platform_version': platform.version(),
+            'platform_python_implementation':
+                platform.python_implementation(),
+            'implementation_name': platform.python_implementation().lower(),
+            'implementation_version': python_version,
+            'python_version': '.'.join(python_version.split('.')[:2]),
+            'python_full_version': python_version,
+            # only the requirements of no extra are read
+            'extra': ''
+        })
+    return _environment
+
+
+def _compare_marker(left, oper, right):
+    """Return the result of a marker comparison
+
+    versions are compared as versions, anything else as strings
+
+    :param left: the left value
+    :param oper: the operator
+    :param right: the right value
+    """
+
+    if oper == 'in':
+        return left in right
+    if oper.startswith('not'):
+        return left not in right
+    pattern = right[:-2] if oper in ('==', '!=') \
+        and right.endswith('.*') else right
+    if oper != '===' and versions.is_pep440(left) \
+            and versions.is_pep440(pattern):
+        return versions.specifier_set(oper + right).contains(left)
+    if oper in ('==', '==='):
+        return left == right
+    if oper in versions.OPERATORS:
+        return versions.OPERATORS[oper](left, right)
+    return False
+
+
+def evaluate_marker(marker):
+    """Return whether an environment marker holds in this environment
+
+    :param marker: the marker (e.g. python_version < "3" and os_name == "nt")
+    """
+
+    environment = _marker_environment()
+    tokens = []
+    pos = 0
+    marker = marker.strip()
+    while pos < len(marker):
+        match = _MARKER_TOKEN_RE.match(marker, pos)
+        if match is None or match.end() == pos:
+            raise ValueError('Illegal marker: {0}'.format(marker))
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    tokens.append((None, None))
+    position = [0]
+
+    def take(kind=None):
+        token = tokens[position[0]]
+        if kind is not None and token[0] != kind:
+            raise ValueError('Illegal marker: {0}'.format(marker))
+        position[0] += 1
+        return token[1]
+
+    def value():
+        kind = tokens[position[0]][0]
+        if kind == 'string':
+            return take()[1:-1]
+        name = take('name').replace('.', '_').lower()
+        if name not in environment:
+            raise ValueError('Unknown marker: {0}'.format(name))
+        return environment[name]
+
+    def atom():
+        if tokens[position[0]] == ('paren', '('):
+            take()
+            result = expression()
+            if take('paren') != ')':
+                raise ValueError('Illegal marker: {0}'.format(marker))
+            return result
+        left = value()
+        oper = ' '.join(take('op').split())
+        return _compare_marker(left, oper, value())
+
+    def conjunction():
+        result = atom()
+        while tokens[position[0]] == ('bool', 'and'):
+            take()
+            # every atom is evaluated, so all the tokens are consumed
+            result = atom() and result
+        return result
+
+    def expression():
+        result = conjunction()
+        while tokens[position[0]] == ('bool', 'or'):
+            take()
+            result = conjunction() or result
+        return result
+
+    result = expression()
+    if tokens[position[0]][0] is not None:
+        raise ValueError('Illegal marker: {0}'.format(marker))
+    return result
+
+
+def _applies(marker):
+    """Return whether a requirement of the given marker applies here, which
+    it does when the marker is illegal
+
+    :param marker: the marker, None if there is none
+    """
+
+    if not marker:
+        return True
+    try:
+        return evaluate_marker(marker)
+    except ValueError:
+        return True
+
+
+def _metadata_name(entry, suffix):
+    """Return the distribution name of a metadata entry, e.g. Foo_Bar of
+    Foo_Bar-1.0.dist-info or of Foo_Bar.egg-info
+
+    :param entry: the entry name
+    :param suffix: the entry suffix
+    """
+
+    return entry[:-len(suffix)].split('-')[0]
+
+
+def _scan(path):
+    """Yield (name, kind, metadata path) of the distributions a directory of
+    the import path holds
+
+    :param path: the directory
+    """
+
+    try:
+        entries = sorted(os.listdir(path or os.curdir))
+    except OSError:
+        return
+    if path.endswith(consts.EGG_EXTENSION) \
+            and consts.EGG_INFO_DIR in entries:
+        yield _metadata_name(os.path.basename(path), consts.EGG_EXTENSION), \
+            consts.EGG_INFO_SUFFIX, os.path.join(path, consts.EGG_INFO_DIR)
+    for entry in entries:
+        for suffix in (consts.DIST_INFO_SUFFIX, consts.EGG_INFO_SUFFIX):
+            if entry.endswith(suffix):
+                yield _metadata_name(entry, suffix), suffix, \
+                    os.path.join(path, entry)
+
+
+def _read_dist_info_requires(path):
+    """Return the requirement lines of a .dist-info directory
+
+    :param path: the directory path
+    """
+
+    requires = []
+    try:
+        with open(os.path.join(path, consts.DIST_INFO_METADATA_FILE)) \
+                as metadata:
+            for line in metadata:
+                # the headers end at the first empty line
+                if not line.strip():
+                    break
+                header, _, value = line.partition(':')
+                if header.strip().lower() == consts.REQUIRES_DIST_HEADER:
+                    requires.append(value.strip())
+    except IOError:
+        pass
+    return requires
+
+
+def _read_egg_info_requires(path):
+    """Return the requirement lines of an .egg-info directory, those of its
+    sections (extras, or [:marker] conditions) only if they apply here
+
+    :param path: the directory path (or file path, which has none)
+    """
+
+    requires = []
+    if not os.path.isdir(path):
+        return requires
+    applies = True
+    try:
+        with open(os.path.join(path, consts.EGG_INFO_REQUIRES_FILE)) \
+                as requires_file:
+            for line in requires_file:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('['):
+                    extra, _, marker = line.strip('[]').partition(':')
+                    applies = not extra.strip() and _applies(marker)
+                elif applies:
+                    requires.append(line)
+    except IOError:
+        pass
+    return requires
+
+
+class InstalledDistributions(object):
+    """The distributions installed in the current environment, found by
+    their metadata (*.dist-info, *.egg-info, and the EGG-INFO of eggs) on
+    the import path
+
+    the import path is only listed: the metadata of a distribution is read
+    the first time its requirements are asked for. when a distribution is
+    found twice, the first one on the import path wins, as on import
+    """
+
+    def __init__(self, paths=None):
+        """
+        :param paths: the directories to look in (default: sys.path)
+        """
+        self._locations = {}
+        self._items = {}
+        for path in sys.path if paths is None else paths:
+            for name, kind, metadata_path in _scan(path):
+                self._locations.setdefault(
+                    names.normalize_name(name), (name, kind, metadata_path))
+
+    def names(self):
+        """Return the sorted names of the distributions
+
+        """
+
+        return sorted(name for name, _, __ in self._locations.values())
+
+    def requires(self, package_name):
+        """Return the (name, specifier) of each requirement of a
+        distribution which applies in this environment, None if the
+        distribution is not installed
+
+        requirements of extras are left out
+
+        :param package_name: the distribution name, in any form
+        """
+
+        location = self._locations.get(names.normalize_name(package_name))
+        if location is None:
+            return None
+        _, kind, metadata_path = location
+        if kind == consts.DIST_INFO_SUFFIX:
+            lines = _read_dist_info_requires(metadata_path)
+        else:
+            lines = _read_egg_info_requires(metadata_path)
+        requires = []
+        for line in lines:
+            requirement, _, marker = line.partition(';')
+            if not _applies(marker.strip()):
+                continue
+            parsed = versions.parse_requirement(requirement)
+            if parsed.name:
+                requires.append((parsed.name, parsed.specifier))
+        return requires
+
+    def get(self, package_name):
+        """Return a distribution and its requirements in the form pipdeptree
+        gives them, None if the distribution is not installed
+
+        :param package_name: the distribution name, in any form
+        """
+
+        key = names.normalize_name(package_name)
+        item = self._items.get(key)
+        if item is None:
+            requires = self.requires(package_name)
+            if requires is None:
+                return None
+            item = self._items[key] = {
+                consts.PACKAGE_KEY: {
+                    consts.KEY_KEY: self._locations[key][0].lower()},
+                consts.DEPENDENCIES_KEY: [{
+                    consts.KEY_KEY: name.lower(),
+                    consts.REQUIRED_VERSION_KEY: specifier
+                } for name, specifier in requires]
+            }
+        return item
@@ -0,0 +1,118 @@
+"""Used to run many network-bound calls concurrently within one process.
+
+"""
+
+import sys
+import Queue
+import threading
+
+from . import consts
+
+# tells a worker there are no more tasks
+_STOP = object()
+
+
+class FetchEngine(object):
+    """Run calls concurrently, keeping at most a given number in flight
+
+    there is no asyncio on python 2, so each in-flight call is carried by a
+    light worker thread that mostly waits on its socket. results are
+    gathered in completion order, so a slow call never holds back the others
+    """
+
+    def __init__(self, concurrency=None):
+        """
+        :param concurrency: maximal number of calls in flight
+        """
+        self.concurrency = concurrency or consts.ASYNC_CONCURRENCY_DEFAULT
+
+    @staticmethod
+    def _worker(func, tasks, results):
+        """Run calls from the tasks queue until told to stop
+
+        :param func: the function to call
+        :param tasks: queue of (index, argument) pairs, ended by _STOP
+        :param results: queue to put (index, result, exc_info) triplets in
+        """
+
+        while True:
+            task = tasks.get()
+            if task is _STOP:
+                return
+            index, arg = task
+            try:
+                results.put((index, func(arg), None))
+            except BaseException:
+                results.put((index, None, sys.exc_info()))
+
+    def _feed(self, func, args, tasks, results):
+        """Queue the args as they come, starting workers up to the
+        concurrency limit, and tell how many args there were once they end
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        :param tasks: queue to put (index, argument) pairs in
+        :param results: queue to put the (None, count, exc_info) end in
+        """
+
+        workers = 0
+        count = 0
+        exc_info = None
+        try:
+            for arg in args:
+                tasks.put((count, arg))
+                count += 1
+                if workers < self.concurrency:
+                    worker = threading.Thread(
+                        target=self._worker, args=(func, tasks, results))
+                    worker.daemon = True
+                    worker.start()
+                    workers += 1
+        except BaseException:
+            exc_info = sys.exc_info()
+        for _ in range(workers):
+            tasks.put(_STOP)
+        results.put((None, count, exc_info))
+
+    def imap_unordered(self, func, args):
+        """Yield (index, result) pairs as calls complete
+
+        args are consumed as calls run, so they may be produced while
+        earlier calls are in flight (e.g. a generator fed by another stage).
+        an exception raised by a call, or by the args, is re-raised here
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+
+        tasks = Queue.Queue()
+        results = Queue.Queue()
+        feeder = threading.Thread(
+            target=self._feed, args=(func, args, tasks, results))
+        feeder.daemon = True
+        feeder.start()
+
+        count = None
+        done = 0
+        while count is None or done < count:
+            index, result, exc_info = results.get()
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            if index is None:
+                count = result
+                continue
+            done += 1
+            yield index, result
+
+    def map(self, func, args):
+        """Return the results of calling func over args, in the args order
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+
+        args = list(args)
+        ordered = [None] * len(args)
+        for index, result in self.imap_unordered(func, args):
+            ordered[index] = result
+        return ordered
@@ -0,0 +1,194 @@
+"""Used to run a function over many arguments, serially or in parallel.
+
+"""
+
+import atexit
+import multiprocessing
+import multiprocessing.pool
+
+from . import consts
+from . import engine
+
+
+class SerialExecutor(object):
+    """Run the calls one after the other in the current thread
+
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+
+    def map(self, func, args):
+        """Return the results of calling func over args, in the args order
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+        return [func(arg) for arg in args]
+
+    def imap_unordered(self, func, args):
+        """Yield the results of calling func over args, as calls complete
+
+        args are consumed as calls run, so they may be produced meanwhile
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+        for arg in args:
+            yield func(arg)
+
+    def close(self):
+        """Release the resources held by the executor
+
+        """
+        pass
+
+
+class _PoolExecutor(object):
+    """Run the calls in a pool, created on first use and kept until closed
+
+    """
+
+    pool_class = None
+    # whether the workers hold their own copy of the module settings, taken
+    # when the pool starts
+    isolated = False
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._pool = None
+
+    def _get_pool(self):
+        """Return the pool, creating it on first use
+
+        """
+        if self._pool is None:
+            self._pool = self.pool_class(self.workers)
+        return self._pool
+
+    def map(self, func, args):
+        """Return the results of calling func over args, in the args order
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+        return self._get_pool().map(func, args)
+
+    def imap_unordered(self, func, args):
+        """Yield the results of calling func over args, as calls complete
+
+        args are consumed as calls run, so they may be produced meanwhile
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+        return self._get_pool().imap_unordered(func, args)
+
+    def close(self):
+        """Close the pool and wait for its workers to exit
+
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+class ThreadExecutor(_PoolExecutor):
+    """Run the calls in a pool of threads (default: a thread per cpu)
+
+    """
+
+    pool_class = staticmethod(multiprocessing.pool.ThreadPool)
+
+
+class ProcessExecutor(_PoolExecutor):
+    """Run the calls in a pool of processes (default: a process per cpu)
+
+    """
+
+    pool_class = staticmethod(multiprocessing.Pool)
+    isolated = True
+
+
+class AsyncExecutor(object):
+    """Run the calls concurrently in the current process, via a FetchEngine
+
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._engine = engine.FetchEngine(workers)
+
+    def map(self, func, args):
+        """Return the results of calling func over args, in the args order
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+        return self._engine.map(func, args)
+
+    def imap_unordered(self, func, args):
+        """Yield the results of calling func over args, as calls complete
+
+        args are consumed as calls run, so they may be produced meanwhile
+
+        :param func: the function to call
+        :param args: iterable object containing arguments for the function
+        """
+        for _, result in self._engine.imap_unordered(func, args):
+            yield result
+
+    def close(self):
+        """Release the resources held by the executor
+
+        """
+        pass
+
+
+EXECUTORS = {
+    consts.BACKEND_SERIAL_STR: SerialExecutor,
+    consts.BACKEND_THREAD_STR: ThreadExecutor,
+    consts.BACKEND_PROCESS_STR: ProcessExecutor,
+    consts.BACKEND_ASYNC_STR: AsyncExecutor
+}
+
+# executors in use, by backend and number of workers, with the settings
+# they were created for
+_executors = {}
+
+
+def get_executor(backend, workers=None, settings=None):
+    """Return an executor of the given backend, reusing an existing one
+
+    workers of an isolated executor (processes) keep the settings of the
+    process at the time they started, so an existing one created for other
+    settings is closed and replaced
+
+    :param backend: the backend name (one of EXECUTORS)
+    :param workers: limit the number of workers, None for the default
+    :param settings: the settings the calls run with, comparable to others
+    """
+
+    key = backend, workers
+    if key in _executors:
+        executor, executor_settings = _executors[key]
+        if executor_settings == settings \
+                or not getattr(executor, 'isolated', False):
+            return executor
+        executor.close()
+    executor = EXECUTORS[backend](workers)
+    _executors[key] = executor, settings
+    return executor
+
+
+def close_all():
+    """Close all the executors in use and release their workers
+
+    """
+
+    while _executors:
+        _executors.popitem()[1][0].close()
+
+
+atexit.register(close_all)
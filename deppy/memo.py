@@ -0,0 +1,137 @@
+"""Used to remember results within a process, so repeated queries made by
+a long-lived process do not reach the network again.
+
+"""
+
+import time
+import threading
+
+from . import consts
+
+# indexes of the fields of a link in the recency list
+_PREV, _NEXT, _KEY, _VALUE, _STORED = range(5)
+
+
+class Memo(object):
+    """A thread-safe mapping of a bounded size, dropping the least recently
+    used entries when full, and entries older than a ttl when read
+
+    None is never stored, so get returning None always means a miss
+    """
+
+    def __init__(self, maxsize=consts.MEMO_SIZE_DEFAULT,
+                 ttl=consts.MEMO_TTL_DEFAULT):
+        """
+        :param maxsize: maximal number of entries, 0 disables the memo
+        :param ttl: seconds during which an entry is used, None for ever
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._links = {}
+        # circular doubly linked list, most recently used last
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None, None]
+
+    def _unlink(self, link):
+        """Remove a link from the recency list
+
+        :param link: the link
+        """
+        link[_PREV][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREV] = link[_PREV]
+
+    def _append(self, link):
+        """Put a link at the most recently used end of the recency list
+
+        :param link: the link
+        """
+        last = self._root[_PREV]
+        link[_PREV] = last
+        link[_NEXT] = self._root
+        last[_NEXT] = self._root[_PREV] = link
+
+    def _drop(self, link):
+        """Remove an entry
+
+        :param link: the link of the entry
+        """
+        self._unlink(link)
+        del self._links[link[_KEY]]
+
+    def _shrink(self):
+        """Drop least recently used entries until the size limit is kept
+
+        """
+        while len(self._links) > self.maxsize:
+            self._drop(self._root[_NEXT])
+
+    def configure(self, maxsize, ttl):
+        """Change the limits of the memo, keeping the entries within them
+
+        :param maxsize: maximal number of entries, 0 disables the memo
+        :param ttl: seconds during which an entry is used, None for ever
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._shrink()
+
+    def get(self, key):
+        """Return the value of an entry, None if there is no such entry
+
+        :param key: the entry key
+        """
+        with self._lock:
+            link = self._links.get(key)
+            if link is not None and self.ttl is not None \
+                    and time.time() - link[_STORED] >= self.ttl:
+                self._drop(link)
+                link = None
+            if link is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._unlink(link)
+            self._append(link)
+            return link[_VALUE]
+
+    def put(self, key, value):
+        """Store an entry, replacing an existing one
+
+        :param key: the entry key
+        :param value: the entry value (None is ignored)
+        """
+        if value is None:
+            return
+        with self._lock:
+            if key in self._links:
+                self._drop(self._links[key])
+            link = [None, None, key, value, time.time()]
+            self._links[key] = link
+            self._append(link)
+            self._shrink()
+
+    def clear(self):
+        """Drop all the entries and reset the statistics
+
+        """
+        with self._lock:
+            self._links.clear()
+            self._root[:] = [self._root, self._root, None, None, None]
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the hit/miss statistics and the size of the memo
+
+        """
+        with self._lock:
+            return {
+                consts.MEMO_HITS_KEY: self.hits,
+                consts.MEMO_MISSES_KEY: self.misses,
+                consts.MEMO_SIZE_KEY: len(self._links),
+                consts.MEMO_MAXSIZE_KEY: self.maxsize
+            }
@@ -0,0 +1,50 @@
+"""Used to handle package names and distribution file names.
+
+"""
+
+import re
+
+from . import consts
+
+
+_SEPARATORS_RE = re.compile(r'[-_.]+')
+
+
+def normalize_name(package_name):
+    """Return the normalized form of a package name (see PEP 503)
+
+    :param package_name: package name
+    """
+
+    return _SEPARATORS_RE.sub('-', package_name).lower()
+
+
+def version_from_filename(filename, package_name):
+    """Return the version of a distribution file, None if it is unknown
+
+    :param filename: the distribution file name
+    :param package_name: the name of the package the file belongs to
+    """
+
+    if filename.endswith(consts.WHEEL_EXTENSION) \
+            or filename.endswith(consts.EGG_EXTENSION):
+        # name-version-tags.whl / name-version-pyX.Y.egg, with any '-' in
+        # name and version escaped as '_'
+        parts = filename.split('-')
+        return parts[1] if len(parts) > 2 else None
+
+    for extension in consts.SDIST_EXTENSIONS:
+        if filename.endswith(extension):
+            base_name = filename[:-len(extension)]
+            break
+    else:
+        return None
+
+    # name-version, where the name itself may contain '-'
+    normalized_name = normalize_name(package_name)
+    index = base_name.find('-')
+    while index >= 0:
+        if normalize_name(base_name[:index]) == normalized_name:
+            return base_name[index + 1:] or None
+        index = base_name.find('-', index + 1)
+    return None
@@ -0,0 +1,361 @@
+"""Used to send http requests over pooled keep-alive connections.
+
+"""
+
+import os
+import sys
+import time
+import Queue
+import random
+import urlparse
+import threading
+import collections
+
+import requests
+
+from . import consts
+
+
+requests.packages.urllib3.disable_warnings()
+
+# options used when sending requests, and their defaults
+_DEFAULT_SETTINGS = {
+    consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+    consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+    consts.HEDGE_STR: False
+}
+_settings = dict(_DEFAULT_SETTINGS)
+
+# one session per process, and one limiter per host and process, shared by
+# all threads of that process
+_session = None
+_limiters = {}
+_latencies = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class AimdLimiter(object):
+    """Limit the number of requests in flight, adapting the limit to the
+    capacity of the server (additive increase, multiplicative decrease)
+
+    the limit grows by about one for every limit successful requests, as
+    long as their latency stays close to the best latency seen, and is cut
+    down when the server throttles or fails. requests sent before a cut
+    do not cut it again, so a burst of failures counts once
+    """
+
+    def __init__(self, initial=consts.AIMD_INITIAL_LIMIT,
+                 minimum=consts.AIMD_MIN_LIMIT,
+                 maximum=consts.AIMD_MAX_LIMIT):
+        """
+        :param initial: the initial limit
+        :param minimum: the limit is never cut below this
+        :param maximum: the limit never grows above this
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._best_latency = None
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait until a request may be sent, and return a token for release
+
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return self._generation
+
+    def release(self, token, latency=None, throttled=False):
+        """Mark a request as done and adapt the limit to its outcome
+
+        :param token: the token returned by acquire
+        :param latency: seconds the request took, None if unknown
+        :param throttled: whether the server throttled or failed the request
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                if token == self._generation:
+                    self._generation += 1
+                    self.limit = max(
+                        self.minimum,
+                        self.limit * consts.AIMD_DECREASE_FACTOR)
+            elif latency is not None:
+                if self._best_latency is None \
+                        or latency < self._best_latency:
+                    self._best_latency = latency
+                if latency <= \
+                        self._best_latency * consts.AIMD_LATENCY_TOLERANCE:
+                    self.limit = min(self.maximum,
+                                     self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+def _create_session():
+    """Return a new session with a bounded keep-alive connection pool
+
+    """
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=consts.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=consts.HTTP_POOL_MAXSIZE,
+        pool_block=True)
+    for scheme in consts.HTTP_SCHEMES:
+        session.mount(scheme, adapter)
+    session.headers.update({
+        consts.ACCEPT_ENCODING_HEADER: consts.ACCEPT_ENCODING,
+        consts.CONNECTION_HEADER: consts.KEEP_ALIVE
+    })
+    return session
+
+
+def configure(**kwargs):
+    """Set the options used when sending requests
+
+    :param kwargs: arguments inserted via CLI (irrelevant ones are ignored)
+    """
+
+    for key in _DEFAULT_SETTINGS:
+        _settings[key] = kwargs.get(key, _DEFAULT_SETTINGS[key])
+
+
+def configuration():
+    """Return the options set by configure, comparable to those of other
+    calls
+
+    """
+
+    return tuple(sorted(_settings.items()))
+
+
+class LatencyWindow(object):
+    """The latencies of the last requests, for telling slow ones apart
+
+    """
+
+    def __init__(self, size=consts.HEDGE_WINDOW):
+        """
+        :param size: the number of latencies kept
+        """
+        self._latencies = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency):
+        """Add the latency of a request
+
+        :param latency: seconds the request took
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, percent, min_samples=consts.HEDGE_MIN_SAMPLES):
+        """Return the given percentile of the latencies, None if there are
+        too few latencies to tell
+
+        :param percent: the percentile (0-100)
+        :param min_samples: the minimal number of latencies
+        """
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1,
+                             len(latencies) * percent // 100)]
+
+
+def get_session():
+    """Return the session of the current worker
+
+    a forked worker gets a session of its own, as connections of the parent
+    must not be shared with it
+    """
+
+    global _session, _latencies, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _create_session()
+                _limiters.clear()
+                _latencies = LatencyWindow()
+                _session_pid = pid
+    return _session
+
+
+def get_limiter(url=''):
+    """Return the limiter of the requests of the current worker to the host
+    of a url
+
+    every host (e.g. every package index) gets a limiter of its own, so a
+    slow one does not hold back requests to the others
+
+    :param url: the url
+    """
+
+    get_session()
+    host = urlparse.urlparse(url).netloc.lower()
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _session_lock:
+            limiter = _limiters.setdefault(host, AimdLimiter())
+    return limiter
+
+
+def _discard(results, count):
+    """Close the responses of requests nobody waits for anymore
+
+    :param results: queue of (response, exc_info) pairs
+    :param count: the number of pending requests
+    """
+
+    for _ in range(count):
+        response, __ = results.get()
+        if response is not None:
+            response.close()
+
+
+def _hedged_get(session, url, delay, **kwargs):
+    """Send a GET request, and a duplicate of it if no response arrived
+    after the given delay, returning the first response
+
+    an error is raised only if both requests fail
+
+    :param session: the session
+    :param url: the url
+    :param delay: seconds to wait before sending the duplicate
+    :param kwargs: arguments for requests (headers, etc.)
+    """
+
+    results = Queue.Queue()
+
+    def send():
+        try:
+            results.put((session.get(url, **kwargs), None))
+        except BaseException:
+            results.put((None, sys.exc_info()))
+
+    def start():
+        thread = threading.Thread(target=send)
+        thread.daemon = True
+        thread.start()
+
+    start()
+    pending = 1
+    try:
+        response, exc_info = results.get(timeout=delay)
+        pending = 0
+    except Queue.Empty:
+        response = None
+    if response is None:
+        # no response yet, or the request already failed
+        start()
+        response, exc_info = results.get()
+        if response is None and pending:
+            response, exc_info = results.get()
+            pending = 0
+    if pending:
+        discarder = threading.Thread(
+            target=_discard, args=(results, pending))
+        discarder.daemon = True
+        discarder.start()
+    if response is None:
+        raise exc_info[0], exc_info[1], exc_info[2]
+    return response
+
+
+def _send(session, url, **kwargs):
+    """Send a single GET request, hedged if hedging is on and the typical
+    latency is known
+
+    :param session: the session
+    :param url: the url
+    :param kwargs: arguments for requests (headers, etc.)
+    """
+
+    kwargs.setdefault('timeout', (_settings[consts.CONNECT_TIMEOUT_STR],
+                                  _settings[consts.READ_TIMEOUT_STR]))
+    delay = _latencies.percentile(consts.HEDGE_PERCENTILE) \
+        if _settings[consts.HEDGE_STR] else None
+    if delay is None:
+        return session.get(url, **kwargs)
+    return _hedged_get(session, url, delay, **kwargs)
+
+
+def _is_throttled(response):
+    """Return whether the server throttled or failed a request
+
+    :param response: the response
+    """
+
+    return response.status_code in consts.THROTTLE_STATUS_CODES \
+        or response.status_code >= 500
+
+
+def _backoff(attempt, response=None):
+    """Return the seconds to wait before retrying a failed request
+
+    a Retry-After given by the server is followed, otherwise the wait is
+    drawn at random up to an exponentially growing bound, so retries of
+    many requests failed together are spread over time
+
+    :param attempt: the number of the failed attempt, starting at 0
+    :param response: the response of the failed attempt, if any
+    """
+
+    if response is not None:
+        try:
+            return min(consts.BACKOFF_MAX,
+                       float(response.headers[consts.RETRY_AFTER_HEADER]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return random.uniform(
+        0, min(consts.BACKOFF_MAX, consts.BACKOFF_BASE * 2 ** attempt))
+
+
+def get(url, **kwargs):
+    """Send a GET request through the session of the current worker
+
+    requests time out as configured, unless a timeout is given.
+    requests are sent within the limit of the worker limiter of the url
+    host, and retried with backoff if the server throttles or fails them,
+    or if they fail to connect. the last response is returned (or its error
+    raised) once the retries are exhausted
+
+    :param url: the url
+    :param kwargs: arguments for requests (headers, etc.)
+    """
+
+    session = get_session()
+    limiter = get_limiter(url)
+    attempt = 0
+    while True:
+        token = limiter.acquire()
+        start = time.time()
+        try:
+            response = _send(session, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            limiter.release(token, throttled=True)
+            if attempt >= consts.RETRIES_DEFAULT:
+                raise
+            time.sleep(_backoff(attempt))
+        except BaseException:
+            limiter.release(token)
+            raise
+        else:
+            latency = time.time() - start
+            throttled = _is_throttled(response)
+            limiter.release(token, latency, throttled)
+            if not throttled:
+                _latencies.add(latency)
+            if not throttled or attempt >= consts.RETRIES_DEFAULT:
+                return response
+            response.close()
+            time.sleep(_backoff(attempt, response))
+        attempt += 1
@@ -0,0 +1,220 @@
+"""Used to reduce pypi json pages to the few fields deppy needs, while they
+are being downloaded.
+
+"""
+
+import re
+import json
+
+from . import names
+from . import consts
+
+
+INFO_FIELDS = (
+    consts.NAME_KEY,
+    consts.SUMMARY_KEY,
+    consts.LICENSE_KEY,
+    consts.HOMEPAGE_KEY
+)
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+class _Scanner(object):
+    """Scan a json document given as chunks, without keeping all of it
+
+    only the part of the document from the current position onwards is kept
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = ''
+        self._pos = 0
+
+    def _more(self):
+        """Append the next chunk to the buffer, dropping its consumed part
+
+        """
+
+        for chunk in self._chunks:
+            if chunk:
+                self._buf = self._buf[self._pos:] + chunk
+                self._pos = 0
+                return
+        raise ValueError('Truncated json document')
+
+    def peek(self):
+        """Return the next non-whitespace char, without consuming it
+
+        """
+
+        while True:
+            self._pos = _WHITESPACE_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            self._more()
+
+    def expect(self, char):
+        """Consume the next non-whitespace char, which must be the given one
+
+        :param char: the expected char
+        """
+
+        if self.peek() != char:
+            raise ValueError('Expected {0!r} at {1}'.format(char, self._pos))
+        self._pos += 1
+
+    def read_value(self):
+        """Consume a value of any type and return it decoded
+
+        values are small compared to the whole document (a single release,
+        a single info field), so a value cut by the end of the buffer is
+        simply decoded again once the next chunk arrives
+        """
+
+        delimited = self.peek() in '{["'
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, idx=self._pos)
+            except ValueError:
+                self._more()
+                continue
+            if end == len(self._buf) and not delimited:
+                # a number may continue in the next chunk
+                try:
+                    self._more()
+                    continue
+                except ValueError:
+                    pass
+            self._pos = end
+            return value
+
+    def read_string(self):
+        """Consume a string and return its value
+
+        """
+
+        if self.peek() != '"':
+            raise ValueError('Expected a string at {0}'.format(self._pos))
+        return self.read_value()
+
+    def iter_object(self):
+        """Consume an object, yielding its keys
+
+        the caller must consume the value of each key before asking for the
+        next one
+        """
+
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def iter_array(self):
+        """Consume an array, yielding its items decoded one by one
+
+        """
+
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def reduce_payload(chunks, keep=None):
+    """Return the fields deppy needs from a pypi json page, given as chunks
+
+    the result has the same layout as the page, with only the info fields
+    in INFO_FIELDS, and with the list of release versions as releases
+
+    :param chunks: iterable object of chunks of the json page
+    :param keep: function of (version, list of file dictionaries) telling
+    whether a release is kept, None to keep all releases
+    """
+
+    scanner = _Scanner(chunks)
+    info = {}
+    releases = []
+    for key in scanner.iter_object():
+        if key == consts.INFO_KEY and scanner.peek() == '{':
+            for info_key in scanner.iter_object():
+                if info_key in INFO_FIELDS:
+                    info[info_key] = scanner.read_value()
+                else:
+                    scanner.read_value()
+        elif key == consts.RELEASES_KEY and scanner.peek() == '{':
+            for version in scanner.iter_object():
+                files = scanner.read_value()
+                if keep is None or keep(version, files):
+                    releases.append(version)
+        else:
+            scanner.read_value()
+    return {consts.INFO_KEY: info, consts.RELEASES_KEY: releases}
+
+
+def reduce_simple_payload(chunks, package_name, keep=None):
+    """Return the versions listed in a simple repository api page (the json
+    form, see PEP 691), in the same layout as reduce_payload
+
+    versions are taken from the versions field if the index provides it
+    (see PEP 700), and from the file names otherwise
+
+    :param chunks: iterable object of chunks of the json page
+    :param package_name: package name
+    :param keep: function of (version, list of file dictionaries) telling
+    whether a release is kept, None to keep all releases. the files only
+    tell whether they are yanked
+    """
+
+    scanner = _Scanner(chunks)
+    name = package_name
+    releases = None
+    file_versions = []
+    seen = set()
+    files = {}
+    for key in scanner.iter_object():
+        if key == consts.NAME_KEY:
+            name = scanner.read_value()
+        elif key == consts.VERSIONS_KEY:
+            releases = scanner.read_value()
+        elif key == consts.FILES_KEY and scanner.peek() == '[':
+            for file_info in scanner.iter_array():
+                version = names.version_from_filename(
+                    file_info.get(consts.FILENAME_KEY, ''), package_name)
+                if version is None:
+                    continue
+                if keep is not None:
+                    files.setdefault(version, []).append({
+                        consts.YANKED_KEY:
+                            file_info.get(consts.YANKED_KEY, False)})
+                if version not in seen:
+                    seen.add(version)
+                    file_versions.append(version)
+        else:
+            scanner.read_value()
+    if releases is None:
+        releases = file_versions
+    if keep is not None:
+        releases = [release for release in releases
+                    if keep(release, files.get(release, []))]
+    return {
+        consts.INFO_KEY: {consts.NAME_KEY: name},
+        consts.RELEASES_KEY: releases
+    }
@@ -0,0 +1,96 @@
+"""Used to keep the versions found by a seekup run for the next runs.
+
+"""
+
+import json
+import time
+
+from . import cache
+from . import names
+from . import consts
+
+
+class SeekupState(object):
+    """A json file mapping packages to the versions found for them, their
+    license, the newer versions found for each requirement, and the time
+    they were looked up
+
+    packages are kept under their normalized name, along with the settings
+    they were looked up with, and entries of other settings are stale
+    """
+
+    def __init__(self, path, freshness=consts.FRESHNESS_DEFAULT,
+                 settings=None):
+        """
+        :param path: the state file path (created on save)
+        :param freshness: seconds during which kept versions are used as is
+        :param settings: the settings of the lookups (see
+        versions.settings_key)
+        """
+        self.path = path
+        self.freshness = freshness
+        self.settings = settings
+        self.packages = self._load()
+
+    def _load(self):
+        """Return the packages kept in the state file, empty if there is no
+        such file or if it is broken
+
+        """
+        try:
+            with open(self.path) as state_file:
+                packages = json.load(state_file)[consts.STATE_PACKAGES_KEY]
+        except (IOError, ValueError, KeyError, TypeError):
+            return {}
+        return packages if isinstance(packages, dict) else {}
+
+    def get(self, package_name, license_required=False):
+        """Return the kept entry of a package, None if there is no fresh one
+
+        :param package_name: package name
+        :param license_required: whether an entry without license is useless
+        """
+        entry = self.packages.get(names.normalize_name(package_name))
+        if entry is None \
+                or time.time() - entry.get(consts.STATE_FETCHED_KEY, 0) \
+                >= self.freshness \
+                or entry.get(consts.STATE_SETTINGS_KEY) != self.settings \
+                or (license_required
+                    and entry.get(consts.STATE_LICENSE_KEY) is None):
+            return None
+        return entry
+
+    def update(self, package_name, versions, package_license=None,
+               newer=None):
+        """Keep the versions just found for a package
+
+        :param package_name: package name
+        :param versions: list of the versions available
+        :param package_license: the package license, None if unknown
+        :param newer: a dictionary mapping requirements to newer versions
+        """
+        self.packages[names.normalize_name(package_name)] = {
+            consts.STATE_VERSIONS_KEY: versions,
+            consts.STATE_LICENSE_KEY: package_license,
+            consts.STATE_NEWER_KEY: newer or {},
+            consts.STATE_SETTINGS_KEY: self.settings,
+            consts.STATE_FETCHED_KEY: time.time()
+        }
+
+    def add_newer(self, package_name, newer):
+        """Keep more newer versions for a package whose versions were kept
+        already, whether or not its entry is still fresh
+
+        :param package_name: package name
+        :param newer: a dictionary mapping requirements to newer versions
+        """
+        entry = self.packages.get(names.normalize_name(package_name))
+        if entry is not None:
+            entry[consts.STATE_NEWER_KEY].update(newer)
+
+    def save(self):
+        """Write the state file
+
+        """
+        cache.write_atomic(self.path, json.dumps(
+            {consts.STATE_PACKAGES_KEY: self.packages}, sort_keys=True))
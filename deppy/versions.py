@@ -2,14 +2,25 @@
 
 """
 
+import os
+import re
 import json
+import atexit
+import bisect
+import logging
+import sqlite3
 import operator
+import collections
 
 import requests
 
-from distutils.version import LooseVersion
-
+from . import memo
+from . import engine
+from . import names
+from . import cache
 from . import consts
+from . import network
+from . import payloads
 
 
 OPERATORS = {
@@ -21,6 +32,181 @@ OPERATORS = {
     '!=': operator.ne,
 }
 
+# the operators a requirement clause may start with, beyond the comparisons:
+# compatible release and arbitrary (string) equality
+SPECIFIER_OPERATORS = tuple(OPERATORS) + ('~=', '===')
+
+# options used when getting data from pypi, and their defaults
+_DEFAULT_SETTINGS = {
+    consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+    consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+    consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+    consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+    consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+    consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT,
+    consts.INFO_REQUIRED_STR: True,
+    consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+    consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+    consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+    consts.MEMO_SIZE_STR: consts.MEMO_SIZE_DEFAULT,
+    consts.MEMO_TTL_STR: consts.MEMO_TTL_DEFAULT
+}
+_settings = {}
+
+# the on-disk cache of pypi responses, None if caching is disabled
+_cache = None
+
+# pypi data already fetched by this process, shared by all the commands
+_memo = memo.Memo()
+
+_logger = logging.getLogger(__name__)
+
+
+def configure(**kwargs):
+    """Set the options used when getting data from pypi
+
+    :param kwargs: arguments inserted via CLI (irrelevant ones are ignored)
+    """
+
+    global _cache
+    save_cache_counts()
+    for key in _DEFAULT_SETTINGS:
+        _settings[key] = kwargs.get(key, _DEFAULT_SETTINGS[key])
+    _settings[consts.INDEXES_STR] = tuple(_settings[consts.INDEXES_STR])
+    _settings[consts.EXCLUDE_STR] = tuple(sorted(set(
+        _settings[consts.EXCLUDE_STR])))
+    cache_dir = _settings[consts.CACHE_DIR_STR]
+    _cache = cache.BACKENDS[_settings[consts.CACHE_BACKEND_STR]](
+        cache_dir, _settings[consts.CACHE_TTL_STR]) if cache_dir else None
+    _memo.configure(_settings[consts.MEMO_SIZE_STR],
+                    _settings[consts.MEMO_TTL_STR])
+
+
+def configuration():
+    """Return the options set by configure, comparable to those of other
+    calls
+
+    """
+
+    return tuple(sorted(_settings.items()))
+
+
+def save_cache_counts():
+    """Keep the cache lookup counts of this process with the cache, so the
+    hit ratio covers all runs
+
+    """
+
+    if _cache is not None:
+        _cache.save_counts()
+
+
+configure()
+atexit.register(save_cache_counts)
+
+
+# the operators longest first, so '===' is not taken for '=='
+_OPERATORS_BY_LENGTH = sorted(SPECIFIER_OPERATORS, key=len, reverse=True)
+
+# a requirement line: a name, extras, the specifier (maybe in parentheses)
+# and environment markers
+_REQUIREMENT_RE = re.compile(r"""
+    ^\s*(?P<name>[^\s\[\]()<>=!~;,]*)\s*
+    (?:\[(?P<extras>[^\]]*)\])?\s*
+    \(?\s*(?P<specifier>[^();]*?)\s*\)?\s*
+    (?:;.*)?$
+""", re.VERBOSE | re.DOTALL)
+
+# a direct reference requirement (see PEP 508), e.g. 'name @ https://...'
+_URL_REQUIREMENT_RE = re.compile(r"""
+    ^\s*(?P<name>[^\s\[\]()<>=!~;,@]+)\s*
+    (?:\[(?P<extras>[^\]]*)\])?\s*@
+""", re.VERBOSE)
+
+# a url (e.g. 'git+https://host/repo.git#egg=name'), and its egg fragment
+_URL_RE = re.compile(r'^\s*[a-z][a-z0-9+.-]*://', re.IGNORECASE)
+_EGG_FRAGMENT_RE = re.compile(r'#(?:.*&)?egg=(?P<name>[^&\s]+)')
+
+# a requirement as parsed: the package name ('' for a bare specifier), the
+# extras, the specifier (with no whitespace), the operator and version it
+# starts with (the version running to the specifier end, so operator +
+# version gives the specifier back) and the (version, operator) pair of each
+# clause
+Requirement = collections.namedtuple('Requirement', [
+    'name', 'extras', 'specifier', 'version', 'operator', 'clauses'])
+
+
+def _split_clause(clause):
+    """Return the version and operator of a specifier, the version running
+    to the specifier end
+
+    :param clause: the specifier
+    """
+
+    clause = clause.strip()
+    for op in _OPERATORS_BY_LENGTH:
+        if clause.startswith(op):
+            return clause[len(op):].strip(), op
+    return clause, ''
+
+
+def _parse_requirement(requirement, named):
+    """Return the Requirement parsed from a string
+
+    :param requirement: the requirement
+    :param named: whether the requirement starts with a package name
+    """
+
+    name, extras, specifier = '', (), requirement.strip()
+    if named:
+        # a url, or a direct reference to one, has no specifier
+        direct = _URL_REQUIREMENT_RE.match(requirement)
+        match = direct or _REQUIREMENT_RE.match(requirement)
+        if _URL_RE.match(requirement):
+            # named by its egg fragment, if it has one
+            egg = _EGG_FRAGMENT_RE.search(requirement)
+            name = egg.group('name') if egg else specifier
+            specifier = ''
+        elif not match:
+            name, specifier = specifier, ''
+        else:
+            name = match.group('name')
+            specifier = '' if direct else match.group('specifier')
+            extras = tuple(
+                extra.strip()
+                for extra in (match.group('extras') or '').split(',')
+                if extra.strip())
+    # each clause is stripped around its operator and version, so the
+    # specifier is rebuilt normalized (e.g. '>= 1.0, < 2' as '>=1.0,<2')
+    clauses = tuple(_split_clause(clause) for clause in specifier.split(',')
+                    if clause.strip())
+    specifier = ','.join(oper + version for version, oper in clauses)
+    version, oper = _split_clause(specifier)
+    return Requirement(name, extras, specifier, version, oper, clauses)
+
+
+# requirements already parsed by this process
+_requirements = {}
+
+
+def parse_requirement(requirement, named=True):
+    """Return the Requirement record of a requirement string
+
+    every distinct string is parsed once, later calls reuse its record
+
+    :param requirement: the requirement (e.g. 'requests[security]>=2,<3')
+    :param named: whether the requirement starts with a package name, or is
+    a bare specifier (e.g. '>=2,<3', or '2' for '==2')
+    """
+
+    key = requirement, named
+    parsed = _requirements.get(key)
+    if parsed is None:
+        if len(_requirements) >= consts.REQUIREMENTS_MAXSIZE:
+            _requirements.clear()
+        parsed = _requirements[key] = _parse_requirement(requirement, named)
+    return parsed
+
 
 def split_require(require):
     """Return a tuple of required versions and comparison operand
@@ -28,13 +214,137 @@ def split_require(require):
     :param require: the required version and comparison operand as one string
     """
 
-    ops = [op for op in OPERATORS if require.startswith(op)] + ['']
-    op = max(ops, key=len)
-    return require[len(op):], op
+    parsed = parse_requirement(require, named=False)
+    return parsed.version, parsed.operator
+
+
+# a version of the PEP 440 scheme, in any of the forms it normalizes
+_VERSION_RE = re.compile(r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:[-_.]?(?P<pre_l>alpha|a|beta|b|preview|pre|c|rc)[-_.]?(?P<pre_n>[0-9]+)?)?
+    (?:-(?P<post_n1>[0-9]+)
+       |[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?)?
+    (?:[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+# the order of the pre-release kinds, alpha < beta < release candidate
+_PRE_RANKS = {
+    'a': 0, 'alpha': 0,
+    'b': 1, 'beta': 1,
+    'c': 2, 'rc': 2, 'pre': 2, 'preview': 2
+}
+
+_LEGACY_COMPONENT_RE = re.compile(r'(\d+|[a-z]+|\.)')
+
+
+def _pep440_key(match):
+    """Return the sort key of a PEP 440 version
+
+    the key compares the epoch, the release (trailing zeros aside), then
+    orders dev releases before pre-releases, pre-releases before the final
+    release, and post-releases and local versions after it
+
+    :param match: the match of the version by _VERSION_RE
+    """
+
+    release = [int(part) for part in match.group('release').split('.')]
+    while release and release[-1] == 0:
+        release.pop()
+
+    if match.group('pre_l'):
+        pre = (0, _PRE_RANKS[match.group('pre_l').lower()],
+               int(match.group('pre_n') or 0))
+    elif match.group('dev_l') and not (
+            match.group('post_n1') or match.group('post_l')):
+        # 1.0.dev0 comes before 1.0a0
+        pre = (-1,)
+    else:
+        pre = (1,)
+
+    if match.group('post_n1'):
+        post = int(match.group('post_n1'))
+    elif match.group('post_l'):
+        post = int(match.group('post_n2') or 0)
+    else:
+        post = -1
+
+    dev = (0, int(match.group('dev_n') or 0)) if match.group('dev_l') \
+        else (1,)
+
+    local = ()
+    if match.group('local'):
+        # alphanumeric segments come before numeric ones
+        local = tuple(
+            (1, int(part), '') if part.isdigit() else (0, 0, part.lower())
+            for part in re.split(r'[-_.]', match.group('local')))
+
+    return (0, int(match.group('epoch') or 0), tuple(release), pre, post,
+            dev, local)
+
+
+def _legacy_key(version):
+    """Return the sort key of a version out of the PEP 440 scheme
+
+    such versions are split like LooseVersion does, numbers before words,
+    and come before all PEP 440 versions (as packaging's LegacyVersion
+    does), so they never show up as newer than a PEP 440 version
+
+    :param version: version
+    """
+
+    return (-1, tuple(
+        (0, int(part), '') if part.isdigit() else (1, 0, part)
+        for part in _LEGACY_COMPONENT_RE.split(version.strip().lower())
+        if part and part != '.'))
+
+
+def _parse_key(version):
+    """Return the sort key of a version, parsing it
+
+    :param version: version
+    """
+
+    match = _VERSION_RE.match(version)
+    return _pep440_key(match) if match else _legacy_key(version)
+
+
+def is_pep440(version):
+    """Return whether a version is of the PEP 440 scheme
+
+    :param version: version
+    """
+
+    return _VERSION_RE.match(version) is not None
+
+
+# versions already parsed by this process, mapped to their sort keys
+_version_keys = {}
+
+
+def version_key(version):
+    """Return the sort key of a version: an immutable tuple ordered as
+    PEP 440 orders versions
+
+    every version string is parsed once, later calls reuse its key, so
+    equal versions share a single key
+
+    :param version: version
+    """
+
+    key = _version_keys.get(version)
+    if key is None:
+        if len(_version_keys) >= consts.VERSION_KEYS_MAXSIZE:
+            _version_keys.clear()
+        key = _version_keys[version] = _parse_key(version)
+    return key
 
 
 def compare(version1, version2, oper=None):
-    """Compare 2 versions based on their LooseVersion value
+    """Compare 2 versions based on their PEP 440 order
 
     :param version1: version 1 (self)
     :param version2: version 2 (other)
@@ -42,35 +352,718 @@ def compare(version1, version2, oper=None):
     """
 
     if not oper:
-        return cmp(LooseVersion(version1), LooseVersion(version2))
-    return OPERATORS[oper](LooseVersion(version1), LooseVersion(version2))
+        return cmp(version_key(version1), version_key(version2))
+    return OPERATORS[oper](version_key(version1), version_key(version2))
+
+
+# sorts after the local part of any version
+_MAX_LOCAL = ((2,),)
+
+
+def _release_floor(epoch, release):
+    """Return the key of the first version of a release (its first dev
+    release), which every other version of the release follows
+
+    :param epoch: the epoch
+    :param release: list of the release numbers
+    """
+
+    release = list(release)
+    while release and release[-1] == 0:
+        release.pop()
+    return 0, epoch, tuple(release), (-1,), -1, (0, 0), ()
+
+
+def _is_pre_release(key):
+    """Return whether a PEP 440 version key is of a pre-release or a dev
+    release
+
+    :param key: the version key
+    """
+
+    return key[3] != (1,) or key[5] != (1,)
+
+
+def _within(key, lower, upper):
+    """Return whether a version key is within bounds
+
+    :param key: the version key
+    :param lower: (key, inclusive) lower bound, None if unbounded
+    :param upper: (key, inclusive) upper bound, None if unbounded
+    """
+
+    if lower is not None and (
+            key < lower[0] if lower[1] else key <= lower[0]):
+        return False
+    if upper is not None and (
+            key > upper[0] if upper[1] else key >= upper[0]):
+        return False
+    return True
+
+
+def _compile_clause(version, oper):
+    """Return the (lower, upper, predicate) evaluator of one requirement
+    clause, following the PEP 440 version matching rules
+
+    lower and upper are (key, inclusive) bounds of the version keys allowed,
+    None if unbounded, and predicate is a function of (version, key) which
+    the versions within the bounds must satisfy too, None if they all do
+
+    :param version: the version of the clause
+    :param oper: the operator of the clause ('' stands for '==')
+    """
+
+    if oper == '===':
+        version = version.lower()
+
+        def arbitrary_equal(candidate, key):
+            return candidate.strip().lower() == version
+        return None, None, arbitrary_equal
+
+    if oper == '!=':
+        lower, upper, _ = _compile_clause(version, '==')
+
+        def not_equal(candidate, key):
+            return not _within(key, lower, upper)
+        return None, None, not_equal
+
+    wildcard = oper in ('==', '') and version.endswith('.*')
+    match = _VERSION_RE.match(version[:-2] if wildcard else version)
+    if match is None:
+        # out of the PEP 440 scheme, there is only the versions order
+        key = version_key(version)
+        if oper == '>':
+            return (key, False), None, None
+        if oper == '<':
+            return None, (key, False), None
+        if oper == '<=':
+            return None, (key, True), None
+        if oper in ('==', ''):
+            return (key, True), (key, True), None
+        return (key, True), None, None
+
+    key = version_key(version[:-2] if wildcard else version)
+    epoch = key[1]
+    release = [int(part) for part in match.group('release').split('.')]
+    # local versions match as their public version, except for ==V+local
+    public = key[:6] + ((),)
+    any_local = key[:6] + (_MAX_LOCAL,)
+
+    if wildcard:
+        return (_release_floor(epoch, release), True), \
+            (_release_floor(epoch, release[:-1] + [release[-1] + 1]),
+             False), None
+    if oper == '~=' and len(release) > 1:
+        # ~=1.4.5 is >=1.4.5,==1.4.*
+        return (public, True), \
+            (_release_floor(epoch, release[:-2] + [release[-2] + 1]),
+             False), None
+    if oper in ('==', ''):
+        if key[6]:
+            return (key, True), (key, True), None
+        return (public, True), (any_local, True), None
+    if oper in ('>=', '~='):
+        return (public, True), None, None
+    if oper == '<=':
+        return None, (any_local, True), None
+
+    if oper == '<':
+        predicate = None
+        if not _is_pre_release(key) and key[4] < 0:
+            # <V does not allow the pre-releases of V, which are those of
+            # its release
+            def predicate(candidate, candidate_key):
+                return candidate_key[0] != 0 \
+                    or candidate_key[1:3] != key[1:3] \
+                    or not _is_pre_release(candidate_key)
+        elif not _is_pre_release(key):
+            # nor, for a post-release, its dev releases
+            def predicate(candidate, candidate_key):
+                return candidate_key[0] != 0 \
+                    or candidate_key[1:5] != key[1:5] \
+                    or candidate_key[5] == (1,)
+        return None, (public, False), predicate
+
+    # >V does not allow the post-releases of V, unless V is one (or a dev
+    # release, which has none)
+    predicate = None
+    if key[4] < 0 and key[5] == (1,):
+        def predicate(candidate, candidate_key):
+            return candidate_key[0] != 0 \
+                or candidate_key[1:4] != key[1:4] or candidate_key[4] < 0
+    return (any_local, False), None, predicate
+
+
+class SpecifierSet(object):
+    """A requirement made of any number of comma separated clauses (e.g.
+    '>=1.0,!=1.3.*,<2.0'), compiled to the range of version keys its clauses
+    bound together and the checks left to make within that range
+
+    use specifier_set to get the compiled set of a requirement
+    """
+
+    def __init__(self, specifier):
+        """
+        :param specifier: the requirement
+        """
+        self.specifier = specifier
+        lowers = []
+        uppers = []
+        self.predicates = []
+        starts = []
+        excluded = []
+        named = []
+        for version, oper in parse_requirement(
+                specifier, named=False).clauses:
+            if not version:
+                continue
+            lower, upper, predicate = _compile_clause(version, oper)
+            if lower is not None:
+                lowers.append(lower)
+            if upper is not None:
+                uppers.append(upper)
+            if predicate is not None:
+                self.predicates.append(predicate)
+            version = version[:-2] if version.endswith('.*') else version
+            if oper == '!=':
+                excluded.append(version)
+            else:
+                named.append(version)
+                if oper not in ('<', '<='):
+                    starts.append(version)
+        # the tightest bounds, an exclusive bound being tighter than an
+        # inclusive one of the same key
+        self.lower = max(lowers, key=lambda bound: (bound[0], not bound[1])) \
+            if lowers else None
+        self.upper = min(uppers) if uppers else None
+        # the version the requirement starts from: the latest version it
+        # pins or bounds from below, else the latest version it excludes,
+        # else the latest version it names
+        self.baseline = max(starts or excluded or named or [''],
+                            key=version_key)
+
+    def contains(self, version):
+        """Return whether a version is allowed
+
+        :param version: version
+        """
+
+        key = version_key(version)
+        if not _within(key, self.lower, self.upper):
+            return False
+        for predicate in self.predicates:
+            if not predicate(version, key):
+                return False
+        return True
+
+    def _range(self, keys, newer_than=None):
+        """Return the (start, end) indexes of the sorted keys within the
+        bounds
+
+        :param keys: sorted list of version keys
+        :param newer_than: also require versions newer than this version
+        """
+
+        start, end = 0, len(keys)
+        if self.lower is not None:
+            start = (bisect.bisect_left if self.lower[1]
+                     else bisect.bisect_right)(keys, self.lower[0])
+        if self.upper is not None:
+            end = (bisect.bisect_right if self.upper[1]
+                   else bisect.bisect_left)(keys, self.upper[0])
+        if newer_than:
+            start = max(start, bisect.bisect_right(
+                keys, version_key(newer_than)))
+        return start, end
+
+    def _allowed(self, sorted_versions, index):
+        """Return whether a version within the bounds passes the checks
+
+        :param sorted_versions: SortedVersions
+        :param index: the version index
+        """
+
+        for predicate in self.predicates:
+            if not predicate(sorted_versions.versions[index],
+                             sorted_versions.keys[index]):
+                return False
+        return True
+
+    def select(self, sorted_versions, newer_than=None):
+        """Return the versions allowed, in version order
+
+        :param sorted_versions: SortedVersions
+        :param newer_than: return only versions newer than this version
+        """
+
+        start, end = self._range(sorted_versions.keys, newer_than)
+        return [sorted_versions.versions[index] for index in range(start, end)
+                if self._allowed(sorted_versions, index)]
+
+    def latest(self, sorted_versions):
+        """Return the latest version allowed, None if none is
+
+        :param sorted_versions: SortedVersions
+        """
+
+        start, end = self._range(sorted_versions.keys)
+        for index in range(end - 1, start - 1, -1):
+            if self._allowed(sorted_versions, index):
+                return sorted_versions.versions[index]
+        return None
+
+
+# requirements already compiled by this process
+_specifier_sets = {}
+
+
+def specifier_set(specifier):
+    """Return the compiled SpecifierSet of a requirement
+
+    every distinct requirement is compiled once, later calls reuse it
+
+    :param specifier: the requirement
+    """
+
+    compiled = _specifier_sets.get(specifier)
+    if compiled is None:
+        if len(_specifier_sets) >= consts.SPECIFIER_SETS_MAXSIZE:
+            _specifier_sets.clear()
+        compiled = _specifier_sets[specifier] = SpecifierSet(specifier)
+    return compiled
+
+
+class SortedVersions(object):
+    """The versions of a package sorted by their keys (see version_key), so
+    version ranges are found by bisection and come back in version order
+
+    """
+
+    def __init__(self, versions):
+        """
+        :param versions: list of versions, in any order
+        """
+        keys = [version_key(version) for version in versions]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[index] for index in order]
+        self.versions = [versions[index] for index in order]
+
+    def newer(self, version):
+        """Return the versions newer than the given version
+
+        :param version: version
+        """
+
+        return self.versions[bisect.bisect_right(
+            self.keys, version_key(version)):]
+
+    def latest(self):
+        """Return the latest version, None if there are no versions
+
+        """
+
+        return self.versions[-1] if self.versions else None
+
+    def select(self, require):
+        """Return the versions matching a requirement, which may combine
+        several comma separated clauses (e.g. '>=1.0,<2.0'), in version order
+
+        :param require: the requirement
+        """
+
+        return specifier_set(require).select(self)
 
 
 def _filter_newer(versions, current_version):
-    """Return only the versions newer than the current version
+    """Return only the versions newer than the current version, in version
+    order
 
-    :param versions: list of versions to filter
+    :param versions: list of versions to filter, or their SortedVersions
     :param current_version: current version
     """
 
+    if not isinstance(versions, SortedVersions):
+        versions = SortedVersions(versions)
     if current_version == '':
-        return versions
-    return [version for version in versions if compare(
-        version, current_version, '>')]
+        return list(versions.versions)
+    return versions.newer(current_version)
+
+
+def _read_chunks(path):
+    """Yield the content of a local file in chunks
+
+    :param path: the file path
+    """
+
+    with open(path, 'rb') as local_file:
+        while True:
+            chunk = local_file.read(consts.PAYLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _local_path(location):
+    """Return the path of a local directory given as a path or a file url
+
+    :param location: a path or a file url
+    """
+
+    if location.startswith(consts.FILE_URL_PREFIX):
+        return location[len(consts.FILE_URL_PREFIX):]
+    return location
+
+
+def _release_filter():
+    """Return a function of (version, files) telling whether a release is
+    kept, leaving out the kinds of releases chosen to be excluded, None if
+    all releases are kept (see payloads.reduce_payload)
+
+    """
+
+    exclude = _settings[consts.EXCLUDE_STR]
+    if not exclude:
+        return None
+    pre = consts.EXCLUDE_PRE_STR in exclude
+    yanked = consts.EXCLUDE_YANKED_STR in exclude
+    fileless = consts.EXCLUDE_FILELESS_STR in exclude
+
+    def keep(version, files):
+        if fileless and not files:
+            return False
+        if yanked and files and all(release_file.get(consts.YANKED_KEY)
+                                    for release_file in files):
+            return False
+        if pre:
+            key = version_key(version)
+            # versions out of the PEP 440 scheme tell no pre-releases
+            return key[0] != 0 or not _is_pre_release(key)
+        return True
+    return keep
+
+
+def _reduce_response(response, reducer):
+    """Return the fields deppy needs from a page response
+
+    the page is reduced while it is streamed, so it is never held whole.
+    an error is raised for error responses (a missing package, etc.)
+
+    :param response: a streamed response
+    :param reducer: function reducing the page chunks to a record
+    """
+
+    try:
+        response.raise_for_status()
+        return reducer(response.iter_content(consts.PAYLOAD_CHUNK_SIZE))
+    finally:
+        response.close()
+
+
+def _get_record(url, key, reducer, headers=None):
+    """Return a page reduced to the fields deppy needs
+
+    if a cache is configured, a fresh cached record is returned as is, and a
+    stale one is revalidated with a conditional request
+
+    :param url: the page url
+    :param key: the cache key of the page
+    :param reducer: function reducing the page chunks to a record
+    :param headers: additional request headers
+    """
+
+    headers = dict(headers or {})
+    if _settings[consts.EXCLUDE_STR]:
+        # the releases kept depend on the kinds excluded
+        key = '{0}#{1}'.format(key, ','.join(_settings[consts.EXCLUDE_STR]))
+    if _cache is None:
+        return _reduce_response(
+            network.get(url, headers=headers, stream=True), reducer)
+
+    entry = _cache.get(key)
+    if entry is not None and _cache.is_fresh(entry):
+        _cache.record(consts.CACHE_HITS_KEY)
+        return _cache.load(entry)
+
+    headers.update(_cache.validators(entry))
+    response = network.get(url, headers=headers, stream=True)
+    if response.status_code == requests.codes.not_modified \
+            and entry is not None:
+        response.close()
+        _cache.touch(key, entry)
+        _cache.record(consts.CACHE_REVALIDATED_KEY)
+        return _cache.load(entry)
+    _cache.record(consts.CACHE_MISSES_KEY)
+    record = _reduce_response(response, reducer)
+    if response.status_code == requests.codes.ok:
+        _cache.store(key, record,
+                     response.headers.get(consts.ETAG_HEADER),
+                     response.headers.get(consts.LAST_MODIFIED_HEADER))
+    return record
+
+
+def _index_url(index, package_name):
+    """Return the url of the json page of a package on a package index
+
+    :param index: the index base url, or a url with {0} for the package name
+    :param package_name: package name
+    """
+
+    if '{0}' in index:
+        return index.format(package_name)
+    return consts.INDEX_JSON_URL.format(index.rstrip('/'), package_name)
+
+
+def _get_index_record(index, package_name):
+    """Return the json page of the given package on a package index, reduced
+
+    :param index: the index (see _index_url)
+    :param package_name: package name
+    """
+
+    keep = _release_filter()
+
+    def reducer(chunks):
+        return payloads.reduce_payload(chunks, keep)
+
+    return _get_record(_index_url(index, package_name),
+                       _index_url(index, names.normalize_name(package_name)),
+                       reducer)
+
+
+def _merge_records(records):
+    """Return the records of a package from several indexes as one
+
+    info is taken from the first record, and versions of all the records
+    are kept, in order of appearance
+
+    :param records: list of records, in order of preference
+    """
+
+    releases = []
+    seen = set()
+    for record in records:
+        for version in record.get(consts.RELEASES_KEY, []):
+            if version not in seen:
+                seen.add(version)
+                releases.append(version)
+    return {
+        consts.INFO_KEY: records[0].get(consts.INFO_KEY, {}),
+        consts.RELEASES_KEY: releases
+    }
+
+
+# the errors of a lookup which failed: network and http errors (raised once
+# the retries are exhausted), unreadable files, broken pages, and failures
+# of the cache (a locked database, an unwritable directory)
+_LOOKUP_ERRORS = (requests.RequestException, IOError, OSError, ValueError,
+                  sqlite3.Error)
+
+
+def _is_missing(error):
+    """Return whether a lookup error tells the package does not exist
+
+    :param error: the error raised by the lookup
+    """
+
+    response = getattr(error, 'response', None)
+    return isinstance(error, requests.HTTPError) and response is not None \
+        and response.status_code == requests.codes.not_found
+
+
+def _get_json_record(package_name):
+    """Return the json page of the given package, reduced, from the
+    configured indexes
+
+    the indexes are queried concurrently. with the first policy, the record
+    of the first index in order which has the package is returned as soon
+    as all the indexes before it failed. with the merge policy, records of
+    all the indexes which have the package are merged
+
+    :param package_name: package name
+    """
+
+    indexes = _settings[consts.INDEXES_STR]
+    if len(indexes) == 1:
+        return _get_index_record(indexes[0], package_name)
+
+    errors = []
+
+    def fetch(index):
+        try:
+            return _get_index_record(index, package_name)
+        except _LOOKUP_ERRORS as error:
+            if not _is_missing(error):
+                errors.append(error)
+            return None
+
+    pending = object()
+    records = [pending] * len(indexes)
+    first = _settings[consts.INDEX_POLICY_STR] == consts.INDEX_POLICY_FIRST_STR
+    for index, record in engine.FetchEngine(len(indexes)).imap_unordered(
+            fetch, indexes):
+        records[index] = record
+        if first:
+            for earlier_record in records:
+                if earlier_record is pending:
+                    break
+                if earlier_record is not None:
+                    return earlier_record
+
+    found = [record for record in records if record is not None]
+    if found:
+        return _merge_records(found)
+    if errors:
+        # the package may be on the indexes which failed
+        raise errors[0]
+    return None
+
+
+def _get_simple_record(package_name):
+    """Return the versions of the given package from the simple repository
+    api, read from a url or from a local directory
+
+    :param package_name: package name
+    """
+
+    index = _settings[consts.SIMPLE_INDEX_STR]
+    name = names.normalize_name(package_name)
+
+    keep = _release_filter()
+
+    def reducer(chunks):
+        return payloads.reduce_simple_payload(chunks, package_name, keep)
+
+    if not index.startswith(consts.HTTP_SCHEMES):
+        return reducer(_read_chunks(os.path.join(
+            _local_path(index), name, consts.SIMPLE_JSON_INDEX_FILE)))
+    url = '{0}/{1}/'.format(index.rstrip('/'), name)
+    return _get_record(
+        url, url, reducer,
+        {consts.ACCEPT_HEADER: consts.SIMPLE_JSON_CONTENT_TYPE})
+
+
+def _get_mirror_record(package_name):
+    """Return the data of the given package from a local pypi mirror
+
+    the json page of the package is read from web/json/<name> (or from
+    web/pypi/<name>/json). if license, summary and homepage are not needed,
+    the smaller simple index file is preferred when the mirror has one
+
+    :param package_name: package name
+    """
+
+    web_dir = os.path.join(_local_path(_settings[consts.MIRROR_STR]),
+                           consts.MIRROR_WEB_DIR)
+    name = names.normalize_name(package_name)
+    if not _settings[consts.INFO_REQUIRED_STR]:
+        path = os.path.join(web_dir, consts.MIRROR_SIMPLE_DIR, name,
+                            consts.SIMPLE_JSON_INDEX_FILE)
+        if os.path.isfile(path):
+            return payloads.reduce_simple_payload(
+                _read_chunks(path), package_name, _release_filter())
+
+    for path in [
+            os.path.join(web_dir, consts.MIRROR_JSON_DIR, package_name),
+            os.path.join(web_dir, consts.MIRROR_JSON_DIR, name),
+            os.path.join(web_dir, consts.MIRROR_PYPI_DIR, name,
+                         consts.MIRROR_JSON_DIR)]:
+        if os.path.isfile(path):
+            return payloads.reduce_payload(
+                _read_chunks(path), _release_filter())
+    return None
+
+
+SOURCES = {
+    consts.SOURCE_JSON_STR: _get_json_record,
+    consts.SOURCE_SIMPLE_STR: _get_simple_record,
+    consts.SOURCE_MIRROR_STR: _get_mirror_record
+}
+
+
+def _location(source):
+    """Return the places the data of packages is read from by a source
+
+    :param source: the source used
+    """
+
+    if source == consts.SOURCE_JSON_STR:
+        return _settings[consts.INDEXES_STR], \
+            _settings[consts.INDEX_POLICY_STR]
+    if source == consts.SOURCE_SIMPLE_STR:
+        return _settings[consts.SIMPLE_INDEX_STR]
+    return _settings[consts.MIRROR_STR], _settings[consts.INFO_REQUIRED_STR]
+
+
+def _memo_key(source, package_name):
+    """Return the key under which the data of a package is kept by this
+    process, telling apart the places it may be read from and the kinds of
+    releases excluded
+
+    :param source: the source used
+    :param package_name: package name
+    """
+
+    return source, _location(source), _settings[consts.EXCLUDE_STR], \
+        names.normalize_name(package_name)
+
+
+def settings_key():
+    """Return a string telling apart, across runs, the places the data of
+    packages is read from and the kinds of releases excluded
+
+    """
+
+    source = _settings[consts.SOURCE_STR]
+    return json.dumps([source, _location(source),
+                       _settings[consts.EXCLUDE_STR]])
+
+
+def memo_stats():
+    """Return the hit/miss statistics of the pypi data kept by this process
+
+    """
+
+    return _memo.stats()
+
+
+def clear_memo():
+    """Forget the pypi data kept by this process
+
+    """
+
+    _memo.clear()
 
 
 def get_package_data_from_pypi(package_name):
-    """Return the json page from pypi for the given package
+    """Return the pypi page for the given package, reduced to the fields
+    deppy needs (see payloads.reduce_payload)
+
+    only json pages hold license, summary and homepage, so they are used
+    whenever those are required, even if the simple source is chosen.
+    pages are kept by this process under the normalized package name, so
+    the returned data must not be modified. None is returned for a missing
+    package, and for a package whose lookup failed, which is logged as a
+    warning
 
     :param package_name: package name
     """
 
-    try:
-        requests.packages.urllib3.disable_warnings()
-        return json.loads(requests.get(
-            consts.PYPI_URL.format(package_name)).content)
-    except BaseException:
-        return None
+    source = _settings[consts.SOURCE_STR]
+    if source == consts.SOURCE_SIMPLE_STR \
+            and _settings[consts.INFO_REQUIRED_STR]:
+        source = consts.SOURCE_JSON_STR
+    key = _memo_key(source, package_name)
+    record = _memo.get(key)
+    if record is None:
+        try:
+            record = SOURCES[source](package_name)
+        except _LOOKUP_ERRORS as error:
+            if not _is_missing(error):
+                _logger.warning(consts.WARNING_LOOKUP_FAILED.format(
+                    package_name, error))
+            return None
+        _memo.put(key, record)
+    return record
 
 
 def get_from_pypi(package_name):
@@ -90,26 +1083,100 @@ def get_from_pypi(package_name):
     return package_name, releases, package_license
 
 
-def get_new_available(my_versions, all_versions):
+def get_new_available(my_versions, all_versions, known=None,
+                      allowed_only=False):
     """Return list of tuples of package name, current version and a list of
     newer versions available
 
     does not include tuples with no newer versions available
 
+    newer versions are those newer than the version a requirement starts
+    from (see SpecifierSet.baseline)
+
+    :param my_versions: a dictionary mapping package name to list of versions
+    in current project
+    :param all_versions: a dictionary mapping package name to list of versions
+    available on pypi
+    :param known: a dictionary mapping (package name, version in current
+    project) to newer versions already found, None if there are none
+    :param allowed_only: return only the newer versions the requirement
+    still allows (known newer versions are not used then)
+    """
+
+    known = {} if allowed_only else known or {}
+    result = []
+    for my_dependency in sorted(my_versions):
+        if my_dependency in all_versions:
+            # sorted once per package, whatever the number of requirements
+            sorted_versions = None
+            for current_version in my_versions[my_dependency]:
+                newer = known.get((my_dependency, current_version))
+                if newer is None:
+                    if sorted_versions is None:
+                        sorted_versions = SortedVersions(
+                            all_versions[my_dependency])
+                    specifier = specifier_set(current_version)
+                    if allowed_only:
+                        newer = specifier.select(
+                            sorted_versions, specifier.baseline)
+                    else:
+                        newer = _filter_newer(
+                            sorted_versions, specifier.baseline)
+                result.append({
+                    consts.PACKAGE_KEY: my_dependency,
+                    consts.REQUIRE_KEY: current_version,
+                    consts.NEW_VERS_KEY: newer})
+    return result
+
+
+def _latest(package_versions, specifier=None):
+    """Return the latest of the versions, in a single scan, None if there
+    are none
+
+    :param package_versions: list of versions, in any order
+    :param specifier: a SpecifierSet the version must be allowed by, None
+    for any version
+    """
+
+    latest = latest_key = None
+    for version in package_versions:
+        key = version_key(version)
+        if (latest_key is None or key >= latest_key) \
+                and (specifier is None or specifier.contains(version)):
+            latest, latest_key = version, key
+    return latest
+
+
+def get_latest_available(my_versions, all_versions, compatible=False):
+    """Return the same list as get_new_available, keeping only the latest
+    of the newer versions of each requirement, if there are any
+
+    versions are not sorted: each requirement takes a single scan over the
+    versions of its package (a single one for all its requirements, unless
+    compatible)
+
     :param my_versions: a dictionary mapping package name to list of versions
     in current project
     :param all_versions: a dictionary mapping package name to list of versions
     available on pypi
+    :param compatible: keep the latest version the requirement still allows,
+    rather than the latest version
     """
 
     result = []
     for my_dependency in sorted(my_versions):
         if my_dependency in all_versions:
+            package_versions = all_versions[my_dependency]
+            latest = None if compatible else _latest(package_versions)
             for current_version in my_versions[my_dependency]:
+                specifier = specifier_set(current_version)
+                if compatible:
+                    latest = _latest(package_versions, specifier)
+                newer = [latest] if latest is not None and (
+                    not specifier.baseline
+                    or compare(latest, specifier.baseline, '>')) else []
                 result.append({
                     consts.PACKAGE_KEY: my_dependency,
                     consts.REQUIRE_KEY: current_version,
-                    consts.NEW_VERS_KEY: _filter_newer(
-                        all_versions[my_dependency],
-                        split_require(current_version)[0])})
+                    consts.NEW_VERS_KEY: newer})
     return result
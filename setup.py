@@ -2,8 +2,7 @@
 from setuptools import setup
 
 install_requires = [
-    'requests==2.9.1',
-    'pipdeptree==0.6.0'
+    'requests==2.9.1'
 ]
 
 setup(
@@ -23,6 +22,10 @@ setup(
                     'main package and its dependencies.',
         zip_safe=False,
         install_requires=install_requires,
+        extras_require={
+            # a vectorized search of newer versions (see deppy.batch)
+            'numpy': ['numpy']
+        },
         entry_points={
             'console_scripts': [
                 'deppy = deppy.deppy:main'
@@ -0,0 +1,85 @@
+import random
+
+import mock
+import testtools
+
+from deppy import batch
+from deppy import consts
+from deppy import versions
+
+
+class TestBatch(testtools.TestCase):
+
+    def test_version_table(self):
+
+        table = batch.VersionTable(
+            {'b': ['2.0', '1.0', '1.0.0'], 'a': ['1.1', '1.0rc1']}, ['1.5'])
+        self.assertEqual(table.packages, ['a', 'b'])
+        self.assertEqual(table.stride, 6)
+        self.assertEqual(table.codes, [0, 2, 7, 7, 10])
+        self.assertEqual(table.versions,
+                         ['1.0rc1', '1.1', '1.0', '1.0.0', '2.0'])
+
+        self.assertEqual(
+            table.newer([('a', ''), ('b', '1.0'), ('b', '1.5'), ('a', '1.1'),
+                         ('b', '')]),
+            [['1.0rc1', '1.1'], ['2.0'], ['2.0'], [],
+             ['1.0', '1.0.0', '2.0']])
+        self.assertEqual(table.newer([]), [])
+
+    def test_get_new_available(self):
+
+        all_versions = {
+            'a': ['1', '3', '2.0rc1', '2'],
+            'b': ['4', '5'],
+            'c': []
+        }
+        my_versions = {
+            'a': ['2', '>=1,<3', '', '0.5', '7'],
+            'b': ['==4.*'],
+            'c': ['1'],
+            'd': ['1']
+        }
+        self.assertEqual(
+            batch.get_new_available(my_versions, all_versions),
+            versions.get_new_available(my_versions, all_versions))
+
+        known = {('a', '2'): ['known'], ('b', '1'): ['other']}
+        expected = versions.get_new_available(
+            my_versions, all_versions, known)
+        self.assertEqual(expected[0], {
+            consts.PACKAGE_KEY: 'a',
+            consts.REQUIRE_KEY: '2',
+            consts.NEW_VERS_KEY: ['known']
+        })
+        self.assertEqual(
+            batch.get_new_available(my_versions, all_versions, known),
+            expected)
+        self.assertEqual(batch.get_new_available({}, all_versions), [])
+
+    def test_is_vectorized(self):
+
+        with mock.patch.object(batch, 'numpy', None):
+            self.assertFalse(batch.is_vectorized())
+        with mock.patch.object(batch, 'numpy', mock.Mock()):
+            self.assertTrue(batch.is_vectorized())
+
+    def test_fallback(self):
+
+        # the pure python search finds what the per package search does
+        rand = random.Random(0)
+        all_versions = dict(
+            ('package{0}'.format(index),
+             ['{0}.{1}{2}'.format(rand.randint(0, 3), rand.randint(0, 12),
+                                  rand.choice(['', 'rc1', '.post1', '.dev0']))
+              for _ in range(rand.randint(0, 30))])
+            for index in range(50))
+        my_versions = dict(
+            (name, ['>={0}.{1}'.format(rand.randint(0, 4),
+                                       rand.randint(0, 12)),
+                    '=={0}'.format(rand.choice(all_versions[name] or ['1']))])
+            for name in all_versions)
+        with mock.patch.object(batch, 'numpy', None):
+            self.assertEqual(
+                batch.get_new_available(my_versions, all_versions),
+                versions.get_new_available(my_versions, all_versions))
@@ -0,0 +1,238 @@
+import os
+import time
+import shutil
+import tarfile
+import tempfile
+import threading
+
+import mock
+import testtools
+
+from deppy import cache
+from deppy import consts
+
+
+class TestCache(testtools.TestCase):
+
+    def setUp(self):
+        super(TestCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super(TestCache, self).tearDown()
+
+    def test_file_cache_get_put(self):
+
+        file_cache = cache.FileCache(self.cache_dir)
+
+        self.assertIsNone(file_cache.get('package1'))
+
+        file_cache.put('package1', '{"a": 1}', 'etag1', 'date1')
+        entry = file_cache.get('package1')
+        self.assertEqual(entry[consts.CACHE_BODY_KEY], '{"a": 1}')
+        self.assertEqual(entry[consts.CACHE_ETAG_KEY], 'etag1')
+        self.assertEqual(entry[consts.CACHE_LAST_MODIFIED_KEY], 'date1')
+        self.assertIsNone(file_cache.get('package2'))
+
+        file_cache.put('package1', '{"a": 2}')
+        entry = file_cache.get('package1')
+        self.assertEqual(entry[consts.CACHE_BODY_KEY], '{"a": 2}')
+        self.assertIsNone(entry[consts.CACHE_ETAG_KEY])
+
+        # keys are never used as paths as is
+        file_cache.put('../package3', 'body')
+        self.assertEqual(
+            file_cache.get('../package3')[consts.CACHE_BODY_KEY], 'body')
+
+    def test_write_atomic_mode(self):
+
+        path = os.path.join(self.cache_dir, 'file')
+        for umask in [0o022, 0o002, 0o077]:
+            with mock.patch.object(cache, '_UMASK', umask):
+                cache.write_atomic(path, 'data')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+        with open(path) as written:
+            self.assertEqual(written.read(), 'data')
+        self.assertEqual(os.listdir(self.cache_dir), ['file'])
+
+    def test_file_cache_is_fresh(self):
+
+        file_cache = cache.FileCache(self.cache_dir)
+        file_cache.put('package1', 'body')
+        entry = file_cache.get('package1')
+        self.assertFalse(file_cache.is_fresh(entry))
+
+        file_cache = cache.FileCache(self.cache_dir, ttl=60)
+        self.assertTrue(file_cache.is_fresh(entry))
+
+        entry[consts.CACHE_FETCHED_KEY] = time.time() - 120
+        self.assertFalse(file_cache.is_fresh(entry))
+        file_cache.touch('package1', entry)
+        self.assertTrue(file_cache.is_fresh(file_cache.get('package1')))
+
+    def test_file_cache_validators(self):
+
+        func = cache.FileCache.validators
+
+        self.assertEqual(func(None), {})
+        self.assertEqual(func({consts.CACHE_ETAG_KEY: None,
+                               consts.CACHE_LAST_MODIFIED_KEY: None}), {})
+        self.assertEqual(
+            func({consts.CACHE_ETAG_KEY: 'etag1',
+                  consts.CACHE_LAST_MODIFIED_KEY: 'date1'}),
+            {consts.IF_NONE_MATCH_HEADER: 'etag1',
+             consts.IF_MODIFIED_SINCE_HEADER: 'date1'})
+
+    def _backends(self):
+        """Yield a fresh cache of every backend
+
+        """
+        for name in sorted(cache.BACKENDS):
+            yield cache.BACKENDS[name](os.path.join(self.cache_dir, name))
+
+    def test_sqlite_cache_get_store(self):
+
+        sqlite_cache = cache.SqliteCache(self.cache_dir)
+        self.assertIsNone(sqlite_cache.get('package1'))
+
+        record = {
+            consts.INFO_KEY: {
+                consts.NAME_KEY: 'package1',
+                consts.LICENSE_KEY: None,
+                consts.SUMMARY_KEY: 'summary'
+            },
+            consts.RELEASES_KEY: ['1.0', '0.9', '1.1']
+        }
+        sqlite_cache.store('package1', record, 'etag1', 'date1')
+        entry = sqlite_cache.get('package1')
+        self.assertEqual(sqlite_cache.load(entry), record)
+        self.assertEqual(entry[consts.CACHE_ETAG_KEY], 'etag1')
+        self.assertEqual(entry[consts.CACHE_LAST_MODIFIED_KEY], 'date1')
+        self.assertFalse(sqlite_cache.is_fresh(entry))
+
+        # a record without versions, replacing an existing one
+        record = {consts.INFO_KEY: {}, consts.RELEASES_KEY: []}
+        sqlite_cache.store('package1', record)
+        entry = sqlite_cache.get('package1')
+        self.assertEqual(sqlite_cache.load(entry), record)
+        self.assertIsNone(entry[consts.CACHE_ETAG_KEY])
+
+        # the database is shared by other instances, threads and processes
+        other_cache = cache.SqliteCache(self.cache_dir, ttl=60)
+        entry[consts.CACHE_FETCHED_KEY] = time.time() - 120
+        self.assertFalse(other_cache.is_fresh(entry))
+        other_cache.touch('package1', entry)
+        self.assertTrue(other_cache.is_fresh(sqlite_cache.get('package1')))
+
+        def store(index):
+            other_cache.store('package{0}'.format(index), {
+                consts.INFO_KEY: {},
+                consts.RELEASES_KEY: [str(index)]
+            })
+
+        threads = [threading.Thread(target=store, args=(index,))
+                   for index in range(2, 10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                store(10)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(len(sqlite_cache.entries()), 10)
+        self.assertEqual(sqlite_cache.load(sqlite_cache.get('package10')),
+                         {consts.INFO_KEY: {}, consts.RELEASES_KEY: ['10']})
+        sqlite_cache.close()
+        other_cache.close()
+
+    def test_prune(self):
+
+        for backend_cache in self._backends():
+            self.assertEqual(backend_cache.entries(), [])
+            self.assertEqual(backend_cache.prune(max_age=0), 0)
+
+            now = time.time()
+            for key, age in [('package1', 120), ('package2', 60),
+                             ('package3', 0)]:
+                with mock.patch.object(time, 'time', return_value=now - age):
+                    backend_cache.store(key, {consts.RELEASES_KEY: ['1']})
+
+            sizes = dict((key, size)
+                         for key, size, _ in backend_cache.entries())
+            self.assertEqual(sorted(sizes),
+                             ['package1', 'package2', 'package3'])
+            size = sizes['package3']
+
+            self.assertEqual(backend_cache.prune(), 0)
+            self.assertEqual(backend_cache.prune(max_age=90), 1)
+            self.assertIsNone(backend_cache.get('package1'))
+            self.assertEqual(backend_cache.prune(max_size=size), 1)
+            self.assertIsNone(backend_cache.get('package2'))
+            self.assertIsNotNone(backend_cache.get('package3'))
+
+    def test_stats(self):
+
+        for backend_cache in self._backends():
+            stats = backend_cache.stats()
+            self.assertEqual(stats[consts.CACHE_ENTRIES_KEY], 0)
+            self.assertIsNone(stats[consts.CACHE_HIT_RATIO_KEY])
+
+            backend_cache.store('package1', {consts.RELEASES_KEY: ['1']})
+            backend_cache.record(consts.CACHE_HITS_KEY)
+            backend_cache.record(consts.CACHE_MISSES_KEY)
+            backend_cache.save_counts()
+            backend_cache.record(consts.CACHE_REVALIDATED_KEY)
+            backend_cache.record(consts.CACHE_MISSES_KEY)
+
+            # the counts of former runs are added up
+            stats = type(backend_cache)(backend_cache.path).stats()
+            self.assertEqual(stats[consts.CACHE_ENTRIES_KEY], 1)
+            self.assertEqual(stats[consts.CACHE_HITS_KEY], 1)
+            self.assertEqual(stats[consts.CACHE_MISSES_KEY], 1)
+            self.assertEqual(stats[consts.CACHE_HIT_RATIO_KEY], 0.5)
+            stats = backend_cache.stats()
+            self.assertEqual(stats[consts.CACHE_REVALIDATED_KEY], 1)
+            self.assertEqual(stats[consts.CACHE_MISSES_KEY], 2)
+            self.assertEqual(stats[consts.CACHE_HIT_RATIO_KEY], 0.5)
+
+    def test_export_import(self):
+
+        bundle_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, bundle_dir, ignore_errors=True)
+        bundle_path = os.path.join(bundle_dir, 'bundle.tar.gz')
+        record = {
+            consts.INFO_KEY: {consts.NAME_KEY: 'package1'},
+            consts.RELEASES_KEY: ['1.0']
+        }
+
+        # bundles are the same whatever the backend
+        for backend_cache in self._backends():
+            backend_cache.store('package1', record, 'etag1')
+            backend_cache.store('../package2', {
+                consts.INFO_KEY: {}, consts.RELEASES_KEY: []})
+            self.assertEqual(backend_cache.export_bundle(bundle_path), 2)
+
+            for other_cache in self._backends():
+                shutil.rmtree(other_cache.path, ignore_errors=True)
+                self.assertEqual(other_cache.import_bundle(bundle_path), 2)
+                entry = other_cache.get('package1')
+                self.assertEqual(other_cache.load(entry), record)
+                self.assertEqual(entry[consts.CACHE_ETAG_KEY], 'etag1')
+                self.assertEqual(
+                    other_cache.load(other_cache.get('../package2')),
+                    {consts.INFO_KEY: {}, consts.RELEASES_KEY: []})
+
+        # members which are not plain cache files are skipped
+        evil_path = os.path.join(bundle_dir, 'evil.tar.gz')
+        with tarfile.open(evil_path, 'w:gz') as bundle:
+            bundle.add(bundle_path, arcname='../escaped.meta')
+            bundle.add(bundle_path, arcname='other.txt')
+        for other_cache in self._backends():
+            self.assertEqual(other_cache.import_bundle(evil_path), 0)
+        self.assertFalse(os.path.exists(
+            os.path.join(bundle_dir, 'escaped.meta')))
@@ -1,17 +1,26 @@
 
 import os
+import shutil
+import tempfile
 
 import mock
-import json
 import testtools
 
 import tests_consts
 
 from deppy import consts
 from deppy import dependencies
+from deppy import distributions
 from helpers import cmp_elements
 
 
+def _write_file(path, content):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as file_object:
+        file_object.write(content)
+
+
 class TestDependencies(testtools.TestCase):
 
     def __init__(self, *args, **kwargs):
@@ -127,8 +136,63 @@ class TestDependencies(testtools.TestCase):
                 ]
             }
         ]
-        with mock.patch.object(json, 'loads', return_value=mock_return):
+        installed = mock.Mock()
+        installed.get.side_effect = dict(
+            (item[consts.PACKAGE_KEY][consts.KEY_KEY], item)
+            for item in mock_return).get
+        with mock.patch.object(distributions, 'InstalledDistributions',
+                               return_value=installed):
             test(expected, *func_args)
+        # only the packages of the tree are read
+        self.assertEqual(
+            sorted(call[0][0] for call in installed.get.call_args_list),
+            ['a', 'b', 'c', 'd', 'e'])
+
+    def _installed(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        _write_file(
+            os.path.join(path, 'Foo_Bar-1.0.dist-info', 'METADATA'),
+            'Name: Foo_Bar\n'
+            'Requires-Dist: Zope.Interface (>=4)\n'
+            'Requires-Dist: docs; extra == "docs"\n'
+            '\n'
+            'Requires-Dist: body\n')
+        _write_file(
+            os.path.join(path, 'zope.interface-4.0.egg-info', 'requires.txt'),
+            'setuptools\n\n[docs]\nsphinx\n')
+        return distributions.InstalledDistributions([path])
+
+    def test_build_tree_index(self):
+
+        installed = self._installed()
+        # packages are found whatever form their names are given in
+        with mock.patch.object(distributions, 'InstalledDistributions',
+                               return_value=installed):
+            self.assertEqual(dependencies.build_tree('foo.bar'), {
+                'foo.bar': [{
+                    consts.PACKAGE_KEY: 'zope.interface',
+                    consts.REQUIRE_KEY: '>=4'
+                }],
+                'zope.interface': [{
+                    consts.PACKAGE_KEY: 'setuptools',
+                    consts.REQUIRE_KEY: ''
+                }]
+            })
+            self.assertEqual(dependencies.build_tree('FOO-BAR', 0), {
+                'foo-bar': [{
+                    consts.PACKAGE_KEY: 'zope.interface',
+                    consts.REQUIRE_KEY: '>=4'
+                }]
+            })
+            self.assertEqual(dependencies.build_tree('other'), {})
+
+    def test_get_environment_packages(self):
+
+        with mock.patch.object(distributions, 'InstalledDistributions',
+                               return_value=self._installed()):
+            self.assertEqual(dependencies.get_environment_packages(),
+                             ['foo_bar', 'setuptools', 'zope.interface'])
 
     def test_get_from_file(self):
 
@@ -203,6 +267,33 @@ class TestDependencies(testtools.TestCase):
                                   'setup_for_test_with_requirements.py')]
         test(expected, *func_args)
 
+    def test_get_from_file_specifiers(self):
+
+        setup_kwargs = {
+            consts.NAME_ARG: 'deppy',
+            consts.INSTALL_REQUIRES_ARG: [
+                'requests>=2.0,<3.0',
+                'joblib <0.10, >0.9',
+                'six~=1.10',
+                'pipdeptree===0.6.0',
+                'mock',
+                'testtools[test] (>1.0); python_version < "3"'
+            ]
+        }
+        with mock.patch.object(dependencies, '_get_setup_kwargs',
+                               return_value=setup_kwargs):
+            dependencies_list, package_name, _ = \
+                dependencies.get_from_file('setup.py')
+        self.assertEqual(package_name, 'deppy')
+        self.assertEqual(dependencies_list, [
+            ('requests', '2.0,<3.0', '>='),
+            ('joblib', '0.10,>0.9', '<'),
+            ('six', '1.10', '~='),
+            ('pipdeptree', '0.6.0', '==='),
+            ('mock', '', ''),
+            ('testtools', '1.0', '>')
+        ])
+
     def test_get_by_url(self):
 
         tested_func = dependencies.get_by_url
@@ -2,7 +2,10 @@
 import os
 import sys
 import json
+import time
 import copy
+import shutil
+import tempfile
 
 import mock
 import yaml
@@ -10,12 +13,18 @@ import testtools
 
 import tests_consts
 
+from deppy import batch
 from deppy import deppy
 from deppy import consts
+from deppy import versions
 from deppy import dependencies
 from helpers import cmp_elements
 
 
+# tests replace it with mocks
+_parallel = deppy._parallel
+
+
 class TestDeppy(testtools.TestCase):
 
     def __init__(self, *args, **kwargs):
@@ -147,6 +156,38 @@ class TestDeppy(testtools.TestCase):
             )
         )
 
+        for backend in deppy.BACKENDS:
+            self.assertTrue(
+                cmp_elements(
+                    outputs,
+                    deppy._parallel(
+                        deppy._illegitimate_licenses_to_string,
+                        inputs,
+                        threads_num=2,
+                        backend=backend
+                    )
+                )
+            )
+
+    def test_get_backend(self):
+
+        func = deppy._get_backend
+        fetch = consts.FETCH_BACKEND_DEFAULT
+        parse = consts.PARSE_BACKEND_DEFAULT
+
+        self.assertEqual(func({}, fetch), fetch)
+        self.assertEqual(func({consts.BACKEND_STR: None}, parse), parse)
+        for backend in deppy.BACKENDS:
+            self.assertEqual(
+                func({consts.BACKEND_STR: backend}, fetch), backend)
+        self.assertEqual(func({consts.BACKEND_STR: consts.BACKEND_SERIAL_STR},
+                              parse), consts.BACKEND_SERIAL_STR)
+        # setup.py files are never evaluated by threads
+        self.assertEqual(func({consts.BACKEND_STR: consts.BACKEND_THREAD_STR},
+                              parse), parse)
+        self.assertEqual(func({consts.BACKEND_STR: consts.BACKEND_ASYNC_STR},
+                              parse), parse)
+
     def test_parse_args(self):
 
         sys.stdout = None
@@ -167,7 +208,23 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: None,
             consts.BY_MODULE_STR: False,
             consts.RETURN_DATA_STR: False,
-            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.STATE_STR: consts.STATE_DEFAULT,
+            consts.FRESHNESS_STR: consts.FRESHNESS_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -186,7 +243,23 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: [],
             consts.BY_MODULE_STR: False,
             consts.RETURN_DATA_STR: False,
-            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.STATE_STR: consts.STATE_DEFAULT,
+            consts.FRESHNESS_STR: consts.FRESHNESS_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -199,6 +272,8 @@ class TestDeppy(testtools.TestCase):
                     consts.BY_MODULE_ARG_STR,
                     consts.RETURN_DATA_ARG_STR,
                     consts.MAX_JOBS_ARG_STR, str(num_for_test),
+                    consts.CACHE_DIR_ARG_STR, 'cache',
+                    consts.CACHE_TTL_ARG_STR, str(num_for_test),
                     consts.SHOW_LICENSE_ARG_STR, 'license1', 'license2'
                     ]
         result = {
@@ -209,7 +284,23 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: ['license1', 'license2'],
             consts.BY_MODULE_STR: True,
             consts.RETURN_DATA_STR: True,
-            consts.MAX_JOBS_STR: num_for_test
+            consts.MAX_JOBS_STR: num_for_test,
+            consts.CACHE_DIR_STR: 'cache',
+            consts.CACHE_TTL_STR: num_for_test,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.STATE_STR: consts.STATE_DEFAULT,
+            consts.FRESHNESS_STR: consts.FRESHNESS_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -221,7 +312,10 @@ class TestDeppy(testtools.TestCase):
                     consts.RETURN_DATA_ARG_STR,
                     consts.MAX_JOBS_ARG_STR, str(num_for_test),
                     consts.REQUIREMENTS_ARG_STR, 'bla',
-                    consts.BY_MODULE_ARG_STR
+                    consts.BY_MODULE_ARG_STR,
+                    consts.SEEKUP_MODE_ARG_STR, consts.SEEKUP_MODE_LATEST_STR,
+                    consts.EXCLUDE_ARG_STR, consts.EXCLUDE_PRE_STR,
+                    consts.EXCLUDE_YANKED_STR
                     ]
         result = {
             consts.SUBCOMMAND_STR: consts.SEEKUP_STR,
@@ -231,7 +325,24 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: ['license1', 'license2'],
             consts.BY_MODULE_STR: True,
             consts.RETURN_DATA_STR: True,
-            consts.MAX_JOBS_STR: num_for_test
+            consts.MAX_JOBS_STR: num_for_test,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.STATE_STR: consts.STATE_DEFAULT,
+            consts.FRESHNESS_STR: consts.FRESHNESS_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_LATEST_STR,
+            consts.EXCLUDE_STR: [consts.EXCLUDE_PRE_STR,
+                                 consts.EXCLUDE_YANKED_STR]
         }
         test(result)
 
@@ -249,7 +360,23 @@ class TestDeppy(testtools.TestCase):
                 consts.SHOW_LICENSE_STR: None,
                 consts.BY_MODULE_STR: False,
                 consts.RETURN_DATA_STR: False,
-                consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+                consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+                consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+                consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+                consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+                consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+                consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+                consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+                consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+                consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+                consts.HEDGE_STR: False,
+                consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+                consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+                consts.STATE_STR: consts.STATE_DEFAULT,
+                consts.FRESHNESS_STR: consts.FRESHNESS_DEFAULT,
+                consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+                consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_DEFAULT,
+                consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
             }
             test(result)
 
@@ -264,7 +391,20 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: None,
             consts.BY_MODULE_STR: False,
             consts.RETURN_DATA_STR: False,
-            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -285,7 +425,20 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: [],
             consts.BY_MODULE_STR: False,
             consts.RETURN_DATA_STR: False,
-            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -310,7 +463,20 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: ['license1', 'license2'],
             consts.BY_MODULE_STR: True,
             consts.RETURN_DATA_STR: True,
-            consts.MAX_JOBS_STR: num_for_test
+            consts.MAX_JOBS_STR: num_for_test,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -334,7 +500,20 @@ class TestDeppy(testtools.TestCase):
             consts.SHOW_LICENSE_STR: ['license1', 'license2'],
             consts.BY_MODULE_STR: True,
             consts.RETURN_DATA_STR: True,
-            consts.MAX_JOBS_STR: num_for_test
+            consts.MAX_JOBS_STR: num_for_test,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -353,7 +532,20 @@ class TestDeppy(testtools.TestCase):
                 consts.SHOW_LICENSE_STR: None,
                 consts.BY_MODULE_STR: False,
                 consts.RETURN_DATA_STR: False,
-                consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+                consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+                consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+                consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+                consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+                consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+                consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+                consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+                consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+                consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+                consts.HEDGE_STR: False,
+                consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+                consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+                consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+                consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
             }
             test(result)
 
@@ -368,7 +560,20 @@ class TestDeppy(testtools.TestCase):
             consts.HOMEPAGE_STR: False,
             consts.SUMMARY_STR: False,
             consts.RETURN_DATA_STR: False,
-            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -392,7 +597,20 @@ class TestDeppy(testtools.TestCase):
             consts.HOMEPAGE_STR: True,
             consts.SUMMARY_STR: True,
             consts.RETURN_DATA_STR: True,
-            consts.MAX_JOBS_STR: num_for_test
+            consts.MAX_JOBS_STR: num_for_test,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -416,7 +634,81 @@ class TestDeppy(testtools.TestCase):
             consts.HOMEPAGE_STR: True,
             consts.SUMMARY_STR: True,
             consts.RETURN_DATA_STR: True,
-            consts.MAX_JOBS_STR: num_for_test
+            consts.MAX_JOBS_STR: num_for_test,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
+        }
+        test(result)
+
+        # cache
+        sys.argv = ['', consts.CACHE_STR, consts.CACHE_WARM_STR,
+                    'package1', 'package2',
+                    consts.ENVIRONMENT_ARG_STR,
+                    consts.CACHE_DIR_ARG_STR, 'cache'
+                    ]
+        result = {
+            consts.SUBCOMMAND_STR: consts.CACHE_STR,
+            consts.CACHE_ACTION_STR: consts.CACHE_WARM_STR,
+            consts.INPUT_STR: ['package1', 'package2'],
+            consts.ENVIRONMENT_STR: True,
+            consts.MAX_AGE_STR: consts.MAX_AGE_DEFAULT,
+            consts.MAX_SIZE_STR: consts.MAX_SIZE_DEFAULT,
+            consts.RETURN_DATA_STR: False,
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: 'cache',
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
+        }
+        test(result)
+
+        sys.argv = ['', consts.CACHE_STR, consts.CACHE_PRUNE_STR,
+                    consts.MAX_AGE_ARG_STR, '60',
+                    consts.MAX_SIZE_ARG_STR, '1000',
+                    consts.RETURN_DATA_ARG_STR
+                    ]
+        result = {
+            consts.SUBCOMMAND_STR: consts.CACHE_STR,
+            consts.CACHE_ACTION_STR: consts.CACHE_PRUNE_STR,
+            consts.INPUT_STR: [],
+            consts.ENVIRONMENT_STR: False,
+            consts.MAX_AGE_STR: 60,
+            consts.MAX_SIZE_STR: 1000,
+            consts.RETURN_DATA_STR: True,
+            consts.MAX_JOBS_STR: consts.MAX_JOBS_DEFAULT,
+            consts.CACHE_DIR_STR: consts.CACHE_DIR_DEFAULT,
+            consts.CACHE_TTL_STR: consts.CACHE_TTL_DEFAULT,
+            consts.BACKEND_STR: consts.BACKEND_DEFAULT,
+            consts.SOURCE_STR: consts.SOURCE_DEFAULT,
+            consts.SIMPLE_INDEX_STR: consts.SIMPLE_INDEX_DEFAULT,
+            consts.MIRROR_STR: consts.MIRROR_DEFAULT,
+            consts.CONNECT_TIMEOUT_STR: consts.CONNECT_TIMEOUT_DEFAULT,
+            consts.READ_TIMEOUT_STR: consts.READ_TIMEOUT_DEFAULT,
+            consts.HEDGE_STR: False,
+            consts.INDEXES_STR: consts.INDEXES_DEFAULT,
+            consts.INDEX_POLICY_STR: consts.INDEX_POLICY_DEFAULT,
+            consts.CACHE_BACKEND_STR: consts.CACHE_BACKEND_DEFAULT,
+            consts.EXCLUDE_STR: consts.EXCLUDE_DEFAULT
         }
         test(result)
 
@@ -476,6 +768,11 @@ class TestDeppy(testtools.TestCase):
             ['', consts.SHOWPACK_STR, '-h'],
             ['', consts.SHOWPACK_STR, '--help'],
 
+            ['', consts.CACHE_STR],
+            ['', consts.CACHE_STR, consts.CACHE_PRUNE_STR,
+             consts.MAX_AGE_ARG_STR, 'bla'],
+            ['', consts.CACHE_STR, '-h'],
+
             ['', 'bla'],
             ['', ''],
             [''],
@@ -532,7 +829,7 @@ class TestDeppy(testtools.TestCase):
             consts.MAX_JOBS_STR: 7
         }
 
-        def mock_parallel(func, args, threads_num=None):
+        def mock_parallel(func, args, threads_num=None, backend=None):
             return cmp_elements(func, dependencies.get_from_file) \
                    and cmp_elements(args, paths) \
                    and threads_num in [None, func_kwargs[consts.MAX_JOBS_STR]]
@@ -543,6 +840,82 @@ class TestDeppy(testtools.TestCase):
                 deppy, mocked_find_name, return_value=paths):
             self.assertTrue(deppy._get_dependencies_from_path(func_kwargs))
 
+    def test_seekup_pipeline(self):
+
+        calls = []
+        parsed = {
+            'a': ([('package2', '2', '=='), ('package3', '', '')],
+                  'package1', ''),
+            'b': ([('package2', '1', '>='), ('package5', '1', '==')],
+                  'package4', '')
+        }
+
+        def mock_get_from_file(path):
+            calls.append(path)
+            return parsed[path]
+
+        def mock_get_from_pypi(package):
+            calls.append(package)
+            return package, ['1', '2', '3'], ''
+
+        kwargs = {
+            consts.INPUT_STR: 'bla',
+            consts.MAX_JOBS_STR: None,
+            consts.BY_MODULE_STR: False,
+            consts.SHOW_LICENSE_STR: None,
+            consts.BACKEND_STR: consts.BACKEND_SERIAL_STR
+        }
+        dependencies_dict = {}
+        modules_dict = {}
+        known_newer = {}
+        with mock.patch.object(deppy, '_find_files_in_path',
+                               return_value=['a', 'b']), \
+                mock.patch.object(dependencies, 'get_from_file',
+                                  side_effect=mock_get_from_file), \
+                mock.patch.object(versions, 'get_from_pypi',
+                                  side_effect=mock_get_from_pypi):
+            result = deppy._seekup_pipeline(
+                kwargs, dependencies_dict, modules_dict, known_newer)
+
+        # packages are looked up once, as soon as they are found
+        self.assertEqual(
+            calls, ['a', 'package2', 'package3', 'b', 'package5'])
+        self.assertEqual(result, [
+            ('package2', ['1', '2', '3'], ''),
+            ('package3', ['1', '2', '3'], ''),
+            ('package5', ['1', '2', '3'], '')
+        ])
+        self.assertEqual(dependencies_dict, {
+            'package2': ['==2', '>=1'],
+            'package3': [''],
+            'package5': ['==1']
+        })
+        self.assertEqual(modules_dict, {
+            'package2==2': ['package1'],
+            'package3': ['package1'],
+            'package2>=1': ['package4'],
+            'package5==1': ['package4']
+        })
+        # requirements found after the lookup are left to the caller
+        self.assertEqual(known_newer, {
+            ('package2', '==2'): ['3'],
+            ('package3', ''): ['1', '2', '3'],
+            ('package5', '==1'): ['2', '3']
+        })
+
+        with mock.patch.object(deppy, '_find_files_in_path',
+                               return_value=[]):
+            self.assertEqual(
+                deppy._seekup_pipeline(kwargs, {}, {}, {}),
+                consts.ERROR_MESSAGE_NO_SETUP)
+        with mock.patch.object(deppy, '_find_files_in_path',
+                               return_value=['a']), \
+                mock.patch.object(dependencies, 'get_from_file',
+                                  return_value=([], 'package1', '')):
+            self.assertEqual(
+                deppy._seekup_pipeline(kwargs, {}, {}, {}),
+                consts.ERROR_MESSAGE_NO_DEPENDENCIES)
+
     def test_get_dependencies_from_url(self):
 
         def test(expected):
@@ -1333,7 +1706,7 @@ class TestDeppy(testtools.TestCase):
         def mock_input(args):
             return args['mock_input_result']
 
-        def mock_parallel(_, packages, __):
+        def mock_parallel(_, packages, __, backend=None):
             return [
                 (package,
                  [package + '_1', package + '_2'],
@@ -1623,7 +1996,7 @@ class TestDeppy(testtools.TestCase):
                 **kwargs
             )
 
-        def mock_parallel(_, packages, __):
+        def mock_parallel(_, packages, __, backend=None):
             result = [{
                 consts.INFO_KEY: {
                     consts.NAME_KEY: package_name,
@@ -1864,6 +2237,180 @@ class TestDeppy(testtools.TestCase):
                 yaml.safe_load(deppy.show_package(**kwargs))
             ))
 
+    def test_seekup_state(self):
+
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, ignore_errors=True)
+        looked_up = []
+
+        def mock_input(args):
+            return args['mock_input_result']
+
+        def mock_parallel(_, packages, __, backend=None):
+            looked_up.append(sorted(packages))
+            return [(package, ['1', '2', '3'], package + '_license')
+                    for package in packages]
+
+        kwargs = {
+            consts.INPUT_TYPE_STR: '_mock_for_test',
+            consts.INPUT_STR: '',
+            consts.RETURN_DATA_STR: True,
+            consts.STATE_STR: os.path.join(state_dir, 'state.json'),
+            'mock_input_result': [
+                ([('package2', '1', '=='), ('package3', '', '')],
+                 'package1', '')]
+        }
+
+        with mock.patch.dict(deppy.INPUTS, {'_mock_for_test': mock_input}), \
+                mock.patch.object(deppy, '_parallel',
+                                  side_effect=mock_parallel):
+            result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+            self.assertEqual(result[consts.REFRESHED_KEY],
+                             ['package2', 'package3'])
+            self.assertEqual(result[consts.FROM_STATE_KEY], [])
+
+            # a fresh state is used, requirements found since included
+            kwargs['mock_input_result'][0][0].append(('package2', '2', '>='))
+            expected_results = result[consts.RESULTS_KEY]
+            expected_results.insert(1, {
+                consts.PACKAGE_KEY: 'package2',
+                consts.REQUIRE_KEY: '>=2',
+                consts.NEW_VERS_KEY: ['3']
+            })
+            result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+            self.assertEqual(result[consts.REFRESHED_KEY], [])
+            self.assertEqual(result[consts.FROM_STATE_KEY],
+                             ['package2', 'package3'])
+            self.assertEqual(result[consts.RESULTS_KEY], expected_results)
+
+            # licenses were not kept, so they are looked up
+            kwargs[consts.SHOW_LICENSE_STR] = []
+            result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+            self.assertEqual(result[consts.REFRESHED_KEY],
+                             ['package2', 'package3'])
+            self.assertEqual(result[consts.LICENSE_KEY]['package2'],
+                             'package2_license')
+
+            # a stale state is refreshed
+            kwargs[consts.FRESHNESS_STR] = 0
+            result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+            self.assertEqual(result[consts.FROM_STATE_KEY], [])
+
+            kwargs[consts.FRESHNESS_STR] = 60
+            kwargs[consts.RETURN_DATA_STR] = False
+            self.assertIn('Kept from previous runs:  package2, package3',
+                          deppy.seekup(**copy.deepcopy(kwargs)))
+
+            # versions kept with other excluded releases are looked up
+            kwargs[consts.RETURN_DATA_STR] = True
+            kwargs[consts.EXCLUDE_STR] = [consts.EXCLUDE_PRE_STR]
+            for refreshed in (['package2', 'package3'], []):
+                result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+                self.assertEqual(result[consts.REFRESHED_KEY], refreshed)
+            del kwargs[consts.EXCLUDE_STR]
+            result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+            self.assertEqual(result[consts.REFRESHED_KEY],
+                             ['package2', 'package3'])
+
+        self.assertEqual(looked_up, [['package2', 'package3'], [],
+                                     ['package2', 'package3'],
+                                     ['package2', 'package3'], [],
+                                     ['package2', 'package3'], [],
+                                     ['package2', 'package3']])
+
+    def test_seekup_state_goes_stale(self):
+
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, ignore_errors=True)
+        now = [time.time()]
+
+        def mock_parallel(_, packages, __, backend=None):
+            # the lookups take the kept entries past their freshness
+            now[0] += 60
+            return [(package, ['1', '2', '3'], package + '_license')
+                    for package in packages]
+
+        kwargs = {
+            consts.INPUT_TYPE_STR: '_mock_for_test',
+            consts.INPUT_STR: '',
+            consts.RETURN_DATA_STR: True,
+            consts.STATE_STR: os.path.join(state_dir, 'state.json'),
+            consts.FRESHNESS_STR: 30,
+            'mock_input_result': [([('package2', '1', '==')], 'package1', '')]
+        }
+
+        with mock.patch.dict(deppy.INPUTS, {
+                '_mock_for_test': lambda args: args['mock_input_result']}), \
+                mock.patch.object(deppy, '_parallel',
+                                  side_effect=mock_parallel), \
+                mock.patch.object(time, 'time', side_effect=lambda: now[0]):
+            deppy.seekup(**copy.deepcopy(kwargs))
+            kwargs['mock_input_result'][0][0].extend(
+                [('package2', '2', '>='), ('package3', '', '')])
+            result = json.loads(deppy.seekup(**copy.deepcopy(kwargs)))
+            self.assertEqual(result[consts.FROM_STATE_KEY], ['package2'])
+            self.assertEqual(result[consts.REFRESHED_KEY], ['package3'])
+
+        with open(kwargs[consts.STATE_STR]) as state_file:
+            kept = json.load(state_file)[consts.STATE_PACKAGES_KEY]
+        self.assertEqual(kept['package2'][consts.STATE_NEWER_KEY],
+                         {'==1': ['2', '3'], '>=2': ['3']})
+
+    def test_get_new_available(self):
+
+        my_versions = {'a': ['==1.0']}
+        all_versions = {'a': ['1.0', '2.0']}
+        kwargs = {consts.SEEKUP_MODE_STR: consts.SEEKUP_MODE_ALL_STR}
+        # the batch search is only used when vectorized
+        for vectorized, searched in [(True, batch), (False, versions)]:
+            with mock.patch.object(batch, 'is_vectorized',
+                                   return_value=vectorized), \
+                    mock.patch.object(searched, 'get_new_available',
+                                      return_value=[]) as search:
+                self.assertEqual(deppy._get_new_available(
+                    kwargs, my_versions, all_versions, {}), [])
+            search.assert_called_once_with(my_versions, all_versions, {})
+
+    def test_seekup_process_settings(self):
+
+        self.addCleanup(versions.configure)
+        self.addCleanup(versions.clear_memo)
+        mirrors = []
+        for releases in ['"1.0": [], "2.0": []', '"1.0": [], "3.0": []']:
+            mirror_dir = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, mirror_dir, ignore_errors=True)
+            json_dir = os.path.join(mirror_dir, consts.MIRROR_WEB_DIR,
+                                    consts.MIRROR_JSON_DIR)
+            os.makedirs(json_dir)
+            for package in ['package1', 'package2']:
+                with open(os.path.join(json_dir, package), 'w') as f:
+                    f.write('{"info": {"name": "' + package + '"}, '
+                            '"releases": {' + releases + '}}')
+            mirrors.append(mirror_dir)
+
+        kwargs = {
+            consts.INPUT_TYPE_STR: '_mock_for_test',
+            consts.INPUT_STR: '',
+            consts.RETURN_DATA_STR: True,
+            consts.BACKEND_STR: consts.BACKEND_PROCESS_STR,
+            consts.SOURCE_STR: consts.SOURCE_MIRROR_STR,
+            'mock_input_result': [
+                ([('package1', '1.0', '=='), ('package2', '1.0', '==')],
+                 'module1', '')]
+        }
+        # the workers of a pool started for the first mirror do not read
+        # the second one
+        with mock.patch.dict(deppy.INPUTS, {
+                '_mock_for_test': lambda args: args['mock_input_result']}), \
+                mock.patch.object(deppy, '_parallel', _parallel):
+            for mirror_dir, newer in zip(mirrors, ['2.0', '3.0']):
+                result = json.loads(deppy.seekup(
+                    mirror=mirror_dir, **copy.deepcopy(kwargs)))
+                self.assertEqual(
+                    [item[consts.NEW_VERS_KEY]
+                     for item in result[consts.RESULTS_KEY]],
+                    [[newer], [newer]])
+
     def test_seekup(self):
 
         def test_error(expected, **func_args):
@@ -1877,10 +2424,10 @@ class TestDeppy(testtools.TestCase):
         def mock_input(args):
             return args['mock_input_result']
 
-        def mock_parallel(_, packages, __):
+        def mock_parallel(_, packages, __, backend=None):
             return [
                 (package,
-                 [package + '_3', package + '_5'],
+                 ['3+' + package, '5+' + package],
                  package + '_license')
                 for package in packages
             ] if kwargs['map_return_value'] else []
@@ -1906,6 +2453,34 @@ class TestDeppy(testtools.TestCase):
             deppy.INPUTS.keys()),
             input_type='', input='')
 
+        test_error(expected=consts.ERROR_MESSAGE_ILLEGAL_BACKEND.format(
+            deppy.BACKENDS),
+            backend='', input='')
+
+        test_error(expected=consts.ERROR_MESSAGE_ILLEGAL_SOURCE.format(
+            versions.SOURCES.keys()),
+            source='', input='')
+
+        test_error(expected=consts.ERROR_MESSAGE_NO_MIRROR.format(
+            consts.SOURCE_MIRROR_STR, consts.MIRROR_ARG_STR),
+            source=consts.SOURCE_MIRROR_STR, input='')
+
+        test_error(expected=consts.ERROR_MESSAGE_ILLEGAL_INDEX_POLICY.format(
+            deppy.INDEX_POLICIES),
+            index_policy='', input='')
+
+        test_error(expected=consts.ERROR_MESSAGE_ILLEGAL_CACHE_BACKEND.format(
+            deppy.cache.BACKENDS.keys()),
+            cache_backend='', input='')
+
+        test_error(expected=consts.ERROR_MESSAGE_ILLEGAL_EXCLUDE.format(
+            deppy.EXCLUDES),
+            exclude=[consts.EXCLUDE_PRE_STR, ''], input='')
+
+        test_error(expected=consts.ERROR_MESSAGE_ILLEGAL_SEEKUP_MODE.format(
+            deppy.SEEKUP_MODES),
+            mode='', input='')
+
         test_error(expected=dependencies_failure_message,
                    input_type='_mock_for_test',
                    input='', mock_input_result=dependencies_failure_message)
@@ -1937,8 +2512,8 @@ class TestDeppy(testtools.TestCase):
                 {
                     'require': '==2',
                     'new_versions_available': [
-                        'package2_3',
-                        'package2_5'
+                        '3+package2',
+                        '5+package2'
                     ],
                     'package': 'package2'
                 }
@@ -1962,56 +2537,56 @@ class TestDeppy(testtools.TestCase):
             {
                 'require': '==2',
                 'new_versions_available': [
-                    'package2_3',
-                    'package2_5'
+                    '3+package2',
+                    '5+package2'
                 ],
                 'package': 'package2'
             },
             {
                 'require': '>=1',
                 'new_versions_available': [
-                    'package3_3',
-                    'package3_5'
+                    '3+package3',
+                    '5+package3'
                 ],
                 'package': 'package3'
             },
             {
                 'require': '==1',
                 'new_versions_available': [
-                    'package3_3',
-                    'package3_5'
+                    '3+package3',
+                    '5+package3'
                 ],
                 'package': 'package3'
             },
             {
                 'require': '',
                 'new_versions_available': [
-                    'package5_3',
-                    'package5_5'
+                    '3+package5',
+                    '5+package5'
                 ],
                 'package': 'package5'
             },
             {
                 'require': '>2',
                 'new_versions_available': [
-                    'package7_3',
-                    'package7_5'
+                    '3+package7',
+                    '5+package7'
                 ],
                 'package': 'package7'
             },
             {
                 'require': '',
                 'new_versions_available': [
-                    'package2_3',
-                    'package2_5'
+                    '3+package2',
+                    '5+package2'
                 ],
                 'package': 'package2'
             },
             {
                 'require': '==1',
                 'new_versions_available': [
-                    'package9_3',
-                    'package9_5'
+                    '3+package9',
+                    '5+package9'
                 ],
                 'package': 'package9'
             }
@@ -2048,6 +2623,17 @@ class TestDeppy(testtools.TestCase):
         },
             **kwargs)
 
+        # only the latest newer version
+        latest_results = [
+            dict(result, new_versions_available=result[
+                'new_versions_available'][-1:])
+            for result in results]
+        test(expected={
+            consts.MODULES_KEY: dependencies_to_modules,
+            consts.RESULTS_KEY: latest_results
+        },
+            mode=consts.SEEKUP_MODE_LATEST_STR, **kwargs)
+
         kwargs[consts.BY_MODULE_STR] = True
 
         test(expected={
@@ -2158,6 +2744,92 @@ class TestDeppy(testtools.TestCase):
         },
             **kwargs)
 
+    def test_manage_cache(self):
+
+        def test_error(expected, **func_kwargs):
+            self.assertEqual(expected, deppy.manage_cache(**func_kwargs))
+
+        def test(expected, **func_kwargs):
+            self.assertEqual(
+                expected, json.loads(deppy.manage_cache(**func_kwargs)))
+
+        def mock_parallel(_, packages, __, backend=None):
+            return [None if package == 'package2' else {}
+                    for package in packages]
+
+        deppy._parallel = mock_parallel
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        self.addCleanup(versions.configure)
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        bundle_path = os.path.join(tmp_dir, 'bundle.tar.gz')
+
+        test_error(consts.ERROR_MESSAGE_ILLEGAL_CACHE_ACTION.format(
+            deppy.CACHE_ACTIONS))
+        test_error(consts.ERROR_MESSAGE_ILLEGAL_CACHE_ACTION.format(
+            deppy.CACHE_ACTIONS), action='bla', cache_dir=cache_dir)
+        test_error(consts.ERROR_MESSAGE_NO_CACHE_DIR,
+                   action=consts.CACHE_STATS_STR)
+        test_error(consts.ERROR_MESSAGE_NO_INPUT,
+                   action=consts.CACHE_WARM_STR, cache_dir=cache_dir)
+        test_error(consts.ERROR_MESSAGE_NO_PRUNE_LIMIT,
+                   action=consts.CACHE_PRUNE_STR, cache_dir=cache_dir)
+        test_error(consts.ERROR_MESSAGE_NO_BUNDLE,
+                   action=consts.CACHE_EXPORT_STR, cache_dir=cache_dir)
+
+        kwargs = {
+            consts.CACHE_DIR_STR: cache_dir,
+            consts.RETURN_DATA_STR: True
+        }
+
+        test({
+            consts.CACHE_WARMED_KEY: ['package1', 'package3'],
+            consts.CACHE_FAILED_KEY: ['package2']
+        }, action=consts.CACHE_WARM_STR,
+            input=['package3', 'package2', 'package1', 'package3'], **kwargs)
+
+        with mock.patch.object(dependencies, 'get_environment_packages',
+                               return_value=None):
+            test_error(consts.ERROR_MESSAGE_BUILDING_DEPTREE,
+                       action=consts.CACHE_WARM_STR, environment=True,
+                       cache_dir=cache_dir)
+        with mock.patch.object(dependencies, 'get_environment_packages',
+                               return_value=['package4']):
+            test({
+                consts.CACHE_WARMED_KEY: ['package1', 'package4'],
+                consts.CACHE_FAILED_KEY: []
+            }, action=consts.CACHE_WARM_STR, input=['package1'],
+                environment=True, **kwargs)
+
+        for package in ['package1', 'package2']:
+            deppy.cache.SqliteCache(cache_dir).store(
+                package, {consts.RELEASES_KEY: ['1.0']})
+        test({
+            consts.CACHE_ENTRIES_KEY: 2,
+            consts.CACHE_SIZE_KEY: deppy.cache.SqliteCache(cache_dir).stats()[
+                consts.CACHE_SIZE_KEY],
+            consts.CACHE_HITS_KEY: 0,
+            consts.CACHE_REVALIDATED_KEY: 0,
+            consts.CACHE_MISSES_KEY: 0,
+            consts.CACHE_HIT_RATIO_KEY: None
+        }, action=consts.CACHE_STATS_STR, **kwargs)
+
+        test({consts.CACHE_EXPORTED_KEY: 2},
+             action=consts.CACHE_EXPORT_STR, input=[bundle_path], **kwargs)
+        test({consts.CACHE_REMOVED_KEY: 2},
+             action=consts.CACHE_PRUNE_STR, max_size=0, **kwargs)
+        test({consts.CACHE_IMPORTED_KEY: 2},
+             action=consts.CACHE_IMPORT_STR, input=[bundle_path], **kwargs)
+        self.assertTrue(deppy.manage_cache(
+            action=consts.CACHE_IMPORT_STR, cache_dir=cache_dir,
+            input=[os.path.join(tmp_dir, 'missing')]).startswith(
+            consts.ERROR_MESSAGE_BUNDLE.format('')))
+
+        self.assertEqual(
+            deppy.manage_cache(action=consts.CACHE_PRUNE_STR,
+                               cache_dir=cache_dir, max_age=60),
+            '{0}:  0'.format(consts.CACHE_REMOVED_KEY))
+
     # def test_main(self):
     #
     #     def test(expected):
@@ -0,0 +1,153 @@
+import os
+import sys
+import shutil
+import tempfile
+
+import mock
+import testtools
+
+from deppy import consts
+from deppy import distributions
+
+
+class TestDistributions(testtools.TestCase):
+
+    def setUp(self):
+        super(TestDistributions, self).setUp()
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def _write(self, content, *parts):
+        path = os.path.join(self.path, *parts)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as file_object:
+            file_object.write(content)
+
+    def test_evaluate_marker(self):
+
+        func = distributions.evaluate_marker
+        environment = {
+            'os_name': 'posix',
+            'sys_platform': 'linux2',
+            'python_version': '2.7',
+            'python_full_version': '2.7.18',
+            'platform_python_implementation': 'CPython',
+            'extra': ''
+        }
+        with mock.patch.object(distributions, '_marker_environment',
+                               return_value=environment):
+            self.assertTrue(func('python_version < "3"'))
+            self.assertTrue(func('python_version >= "2.6"'))
+            # versions are compared as versions, not as strings
+            self.assertTrue(func("python_version < '2.10'"))
+            self.assertTrue(func('python_full_version == "2.7.*"'))
+            self.assertFalse(func('python_version ~= "3.4"'))
+            self.assertTrue(func('os_name == "posix" and '
+                                 'sys_platform != "win32"'))
+            self.assertTrue(func('os_name == "nt" or os_name == "posix"'))
+            self.assertFalse(func('os_name == "nt" and os_name == "posix"'))
+            self.assertTrue(func('(os_name == "nt" or python_version < "3")'
+                                 ' and sys_platform == "linux2"'))
+            self.assertTrue(func('"linux" in sys_platform'))
+            self.assertTrue(func('"win" not in sys_platform'))
+            self.assertTrue(func('"2.7" == python_version'))
+            self.assertTrue(func('platform.python_implementation=="CPython"'))
+            self.assertFalse(func('extra == "docs"'))
+            for marker in ('python_version <', 'python_version < "3" and',
+                           '(os_name == "nt"', 'os_name == "nt")',
+                           'unknown == "1"', 'os_name = "nt"', ''):
+                self.assertRaises(ValueError, func, marker)
+
+    def test_installed_distributions(self):
+
+        self._write('Metadata-Version: 2.0\n'
+                    'Name: Foo_Bar\n'
+                    'Requires-Dist: requests (>=2.9, <3)\n'
+                    'Requires-Dist: six\n'
+                    'Requires-Dist: sphinx; extra == "docs"\n'
+                    'Requires-Dist: futures; python_version < "0"\n'
+                    'Requires-Dist: enum34 ; python_version >= "2"\n'
+                    'Requires-Dist: broken; python_version <\n'
+                    '\n'
+                    'Requires-Dist: description\n',
+                    'Foo_Bar-1.0.dist-info', 'METADATA')
+        self._write('six\n', 'six-1.10.0.dist-info', 'RECORD')
+        self._write('Name: simplejson\n', 'simplejson-3.8.egg-info')
+        self._write('requests[security]==2.9.1\n'
+                    '# a comment\n'
+                    'Jinja2>=2.7\n'
+                    '\n'
+                    '[docs]\n'
+                    'sphinx\n'
+                    '[:python_version < "0"]\n'
+                    'futures\n'
+                    '[:python_version >= "2"]\n'
+                    'enum34\n'
+                    '[test:python_version >= "2"]\n'
+                    'mock\n',
+                    'cloudify_rest_client-3.3.egg-info', 'requires.txt')
+        self._write('Name: Old\n', 'Old-0.1-py2.7.egg', 'EGG-INFO',
+                    'PKG-INFO')
+        self._write('pytz\n', 'Old-0.1-py2.7.egg', 'EGG-INFO',
+                    'requires.txt')
+        self._write('', 'not_a_distribution.py')
+        self._write('Requires-Dist: other\n', 'other', 'six-2.0.dist-info',
+                    'METADATA')
+
+        installed = distributions.InstalledDistributions(
+            [os.path.join(self.path, 'Old-0.1-py2.7.egg'), self.path,
+             os.path.join(self.path, 'other'),
+             os.path.join(self.path, 'missing')])
+        self.assertEqual(installed.names(), [
+            'Foo_Bar', 'Old', 'cloudify_rest_client', 'simplejson', 'six'])
+
+        self.assertEqual(installed.requires('foo-bar'), [
+            ('requests', '>=2.9,<3'), ('six', ''), ('enum34', ''),
+            ('broken', '')])
+        self.assertEqual(installed.requires('Cloudify-Rest-Client'), [
+            ('requests', '==2.9.1'), ('Jinja2', '>=2.7'), ('enum34', '')])
+        self.assertEqual(installed.requires('old'), [('pytz', '')])
+        # the first distribution found wins, even without metadata
+        self.assertEqual(installed.requires('six'), [])
+        self.assertEqual(installed.requires('simplejson'), [])
+        self.assertIsNone(installed.requires('missing'))
+
+        self.assertEqual(installed.get('Cloudify.Rest.Client'), {
+            consts.PACKAGE_KEY: {consts.KEY_KEY: 'cloudify_rest_client'},
+            consts.DEPENDENCIES_KEY: [
+                {
+                    consts.KEY_KEY: 'requests',
+                    consts.REQUIRED_VERSION_KEY: '==2.9.1'
+                },
+                {
+                    consts.KEY_KEY: 'jinja2',
+                    consts.REQUIRED_VERSION_KEY: '>=2.7'
+                },
+                {
+                    consts.KEY_KEY: 'enum34',
+                    consts.REQUIRED_VERSION_KEY: ''
+                }
+            ]
+        })
+        self.assertIsNone(installed.get('missing'))
+
+    def test_lazy_read(self):
+
+        self._write('Requires-Dist: b\n', 'a-1.0.dist-info', 'METADATA')
+        self._write('', 'b-1.0.dist-info', 'METADATA')
+        with mock.patch.object(sys, 'path', [self.path]):
+            installed = distributions.InstalledDistributions()
+        self.assertEqual(installed.names(), ['a', 'b'])
+
+        # no metadata is read until a distribution is asked for, and then
+        # only once
+        with mock.patch.object(
+                distributions, '_read_dist_info_requires',
+                wraps=distributions._read_dist_info_requires) as read:
+            self.assertEqual(read.call_count, 0)
+            item = installed.get('a')
+            self.assertIs(installed.get('A'), item)
+            self.assertEqual(read.call_count, 1)
+            self.assertEqual(read.call_args[0][0],
+                             os.path.join(self.path, 'a-1.0.dist-info'))
@@ -0,0 +1,87 @@
+import time
+import threading
+
+import testtools
+
+from deppy import engine
+
+
+class TestEngine(testtools.TestCase):
+
+    def test_map(self):
+
+        func = engine.FetchEngine(3).map
+
+        self.assertEqual(func(str, []), [])
+        self.assertEqual(func(str, [1]), ['1'])
+        self.assertEqual(func(str, xrange(10)), [str(i) for i in range(10)])
+
+        # results keep the args order even if they complete out of order
+        def delayed(arg):
+            time.sleep(arg / 100.0)
+            return arg
+
+        self.assertEqual(func(delayed, [5, 1, 3, 0]), [5, 1, 3, 0])
+
+    def test_imap_unordered(self):
+
+        # the slowest call does not hold back the others
+        def delayed(arg):
+            time.sleep(arg / 50.0)
+            return arg
+
+        results = list(engine.FetchEngine(4).imap_unordered(
+            delayed, [5, 0, 1]))
+        self.assertEqual([result for _, result in results], [0, 1, 5])
+        self.assertEqual([index for index, _ in results], [1, 2, 0])
+
+    def test_imap_unordered_stream(self):
+
+        # args are consumed while earlier calls run
+        produced = []
+
+        def args():
+            for arg in range(3):
+                produced.append(arg)
+                yield arg
+
+        results = engine.FetchEngine(2).imap_unordered(
+            lambda arg: (arg, list(produced)), args())
+        for index, (arg, seen) in results:
+            self.assertEqual(index, arg)
+            self.assertIn(arg, seen)
+
+        def failing_args():
+            yield 1
+            raise ValueError()
+
+        self.assertRaises(ValueError, list, engine.FetchEngine(2).
+                          imap_unordered(str, failing_args()))
+
+    def test_concurrency(self):
+
+        lock = threading.Lock()
+        in_flight = [0]
+        max_in_flight = [0]
+
+        def tracked(arg):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return arg
+
+        engine.FetchEngine(3).map(tracked, range(20))
+        self.assertTrue(1 < max_in_flight[0] <= 3)
+
+    def test_exception(self):
+
+        def failing(arg):
+            if arg == 2:
+                raise ValueError(arg)
+            return arg
+
+        self.assertRaises(ValueError, engine.FetchEngine(2).map,
+                          failing, range(5))
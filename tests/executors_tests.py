@@ -0,0 +1,59 @@
+import testtools
+
+from deppy import consts
+from deppy import executors
+
+
+class TestExecutors(testtools.TestCase):
+
+    def tearDown(self):
+        executors.close_all()
+        super(TestExecutors, self).tearDown()
+
+    def test_map(self):
+
+        for backend in executors.EXECUTORS:
+            executor = executors.EXECUTORS[backend](2)
+            self.assertEqual(executor.map(str, []), [])
+            self.assertEqual(executor.map(str, range(5)),
+                             ['0', '1', '2', '3', '4'])
+            # a pool is reused until closed
+            self.assertEqual(executor.map(abs, [-1, 2]), [1, 2])
+            self.assertEqual(
+                sorted(executor.imap_unordered(str, iter(range(5)))),
+                ['0', '1', '2', '3', '4'])
+            executor.close()
+            executor.close()
+
+    def test_get_executor(self):
+
+        func = executors.get_executor
+
+        executor = func(consts.BACKEND_THREAD_STR, 2)
+        self.assertIsInstance(executor, executors.ThreadExecutor)
+        self.assertIs(executor, func(consts.BACKEND_THREAD_STR, 2))
+        self.assertIsNot(executor, func(consts.BACKEND_THREAD_STR, 3))
+        self.assertIsNot(executor, func(consts.BACKEND_SERIAL_STR, 2))
+
+        executor.map(str, range(3))
+        executors.close_all()
+        self.assertIsNone(executor._pool)
+        self.assertIsNot(executor, func(consts.BACKEND_THREAD_STR, 2))
+
+    def test_get_executor_settings(self):
+
+        func = executors.get_executor
+
+        # workers of processes are replaced when the settings change
+        executor = func(consts.BACKEND_PROCESS_STR, 2, 'settings1')
+        self.assertEqual(executor.map(abs, [-1]), [1])
+        self.assertIs(executor, func(consts.BACKEND_PROCESS_STR, 2,
+                                     'settings1'))
+        other = func(consts.BACKEND_PROCESS_STR, 2, 'settings2')
+        self.assertIsNot(other, executor)
+        self.assertIsNone(executor._pool)
+
+        # threads share the settings of the process
+        executor = func(consts.BACKEND_THREAD_STR, 2, 'settings1')
+        self.assertIs(executor, func(consts.BACKEND_THREAD_STR, 2,
+                                     'settings2'))
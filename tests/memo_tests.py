@@ -0,0 +1,57 @@
+import time
+
+import mock
+import testtools
+
+from deppy import memo
+from deppy import consts
+
+
+class TestMemo(testtools.TestCase):
+
+    def test_memo_get_put(self):
+
+        func_memo = memo.Memo(maxsize=2, ttl=None)
+        self.assertIsNone(func_memo.get('a'))
+        func_memo.put('a', 1)
+        func_memo.put('b', 2)
+        func_memo.put('c', None)
+        self.assertEqual(func_memo.get('a'), 1)
+
+        # 'b' is the least recently used
+        func_memo.put('c', 3)
+        self.assertIsNone(func_memo.get('b'))
+        self.assertEqual(func_memo.get('a'), 1)
+        self.assertEqual(func_memo.get('c'), 3)
+
+        func_memo.put('a', 4)
+        self.assertEqual(func_memo.get('a'), 4)
+        self.assertEqual(func_memo.stats(), {
+            consts.MEMO_HITS_KEY: 4,
+            consts.MEMO_MISSES_KEY: 2,
+            consts.MEMO_SIZE_KEY: 2,
+            consts.MEMO_MAXSIZE_KEY: 2
+        })
+
+        func_memo.configure(1, None)
+        self.assertIsNone(func_memo.get('c'))
+        self.assertEqual(func_memo.get('a'), 4)
+
+        func_memo.clear()
+        self.assertIsNone(func_memo.get('a'))
+        self.assertEqual(func_memo.stats()[consts.MEMO_HITS_KEY], 0)
+
+        func_memo.configure(0, None)
+        func_memo.put('a', 1)
+        self.assertIsNone(func_memo.get('a'))
+
+    def test_memo_ttl(self):
+
+        func_memo = memo.Memo(maxsize=10, ttl=60)
+        now = time.time()
+        with mock.patch.object(time, 'time', return_value=now):
+            func_memo.put('a', 1)
+            self.assertEqual(func_memo.get('a'), 1)
+        with mock.patch.object(time, 'time', return_value=now + 60):
+            self.assertIsNone(func_memo.get('a'))
+        self.assertEqual(func_memo.stats()[consts.MEMO_SIZE_KEY], 0)
@@ -0,0 +1,32 @@
+import testtools
+
+from deppy import names
+
+
+class TestNames(testtools.TestCase):
+
+    def test_normalize_name(self):
+
+        func = names.normalize_name
+        self.assertEqual(func('package1'), 'package1')
+        self.assertEqual(func('Package_Name'), 'package-name')
+        self.assertEqual(func('package.-_name'), 'package-name')
+        self.assertEqual(func('PACKAGE--name.x'), 'package-name-x')
+
+    def test_version_from_filename(self):
+
+        func = names.version_from_filename
+        self.assertEqual(
+            func('package_name-1.0-py2.py3-none-any.whl', 'package-name'),
+            '1.0')
+        self.assertEqual(func('package_name-1.0-py2.7.egg', 'package-name'),
+                         '1.0')
+        self.assertEqual(func('package-name-1.0.tar.gz', 'package_name'),
+                         '1.0')
+        self.assertEqual(func('Package.Name-2.0rc1.zip', 'package-name'),
+                         '2.0rc1')
+        self.assertEqual(func('package-1.0.tar.bz2', 'package'), '1.0')
+        self.assertIsNone(func('other-1.0.tar.gz', 'package'))
+        self.assertIsNone(func('package-.tar.gz', 'package'))
+        self.assertIsNone(func('package-1.0.exe', 'package'))
+        self.assertIsNone(func('package.whl', 'package'))
@@ -0,0 +1,241 @@
+import os
+import time
+import threading
+
+import mock
+import requests
+import testtools
+
+from deppy import consts
+from deppy import network
+
+
+class TestNetwork(testtools.TestCase):
+
+    def setUp(self):
+        super(TestNetwork, self).setUp()
+        network._session = None
+        network._session_pid = None
+
+    def test_get_session(self):
+
+        session = network.get_session()
+        self.assertIs(session, network.get_session())
+        self.assertEqual(
+            session.headers[consts.ACCEPT_ENCODING_HEADER],
+            consts.ACCEPT_ENCODING)
+        for scheme in consts.HTTP_SCHEMES:
+            adapter = session.get_adapter(scheme + 'pypi.python.org')
+            self.assertEqual(adapter._pool_maxsize, consts.HTTP_POOL_MAXSIZE)
+            self.assertTrue(adapter._pool_block)
+
+        # a forked worker must not reuse the connections of its parent
+        with mock.patch.object(os, 'getpid', return_value=-1):
+            self.assertIsNot(session, network.get_session())
+
+    def test_get(self):
+
+        response = mock.Mock(status_code=requests.codes.ok)
+        with mock.patch.object(requests.Session, 'get',
+                               return_value=response) as mock_get:
+            self.assertIs(network.get('url', headers={'a': 'b'}), response)
+            mock_get.assert_called_once_with(
+                'url', headers={'a': 'b'},
+                timeout=(consts.CONNECT_TIMEOUT_DEFAULT,
+                         consts.READ_TIMEOUT_DEFAULT))
+        self.assertEqual(network.get_limiter().in_flight, 0)
+
+        # timeouts are configured per run, unless given
+        self.addCleanup(network.configure)
+        network.configure(connect_timeout=1, read_timeout=2)
+        with mock.patch.object(requests.Session, 'get',
+                               return_value=response) as mock_get:
+            network.get('url')
+            mock_get.assert_called_once_with('url', timeout=(1, 2))
+            network.get('url', timeout=3)
+            mock_get.assert_called_with('url', timeout=3)
+
+    def test_get_retries(self):
+
+        def response(status_code, headers=None):
+            return mock.Mock(status_code=status_code, headers=headers or {})
+
+        throttled = response(429, {consts.RETRY_AFTER_HEADER: '2'})
+        failed = response(503)
+        ok = response(requests.codes.ok)
+        not_found = response(requests.codes.not_found)
+
+        with mock.patch.object(network.time, 'sleep') as mock_sleep:
+            with mock.patch.object(
+                    requests.Session, 'get',
+                    side_effect=[throttled, requests.ConnectionError(),
+                                 failed, ok]) as mock_get:
+                self.assertIs(network.get('url'), ok)
+                self.assertEqual(mock_get.call_count, 4)
+            self.assertEqual(mock_sleep.call_args_list[0], mock.call(2.0))
+            self.assertTrue(throttled.close.called)
+
+            # not found is an answer, not a failure
+            with mock.patch.object(requests.Session, 'get',
+                                   return_value=not_found) as mock_get:
+                self.assertIs(network.get('url'), not_found)
+                self.assertEqual(mock_get.call_count, 1)
+
+            # retries are exhausted
+            with mock.patch.object(requests.Session, 'get',
+                                   return_value=failed) as mock_get:
+                self.assertIs(network.get('url'), failed)
+                self.assertEqual(mock_get.call_count,
+                                 consts.RETRIES_DEFAULT + 1)
+            with mock.patch.object(requests.Session, 'get',
+                                   side_effect=requests.Timeout()):
+                self.assertRaises(requests.Timeout, network.get, 'url')
+
+            # errors which are not worth retrying
+            with mock.patch.object(requests.Session, 'get',
+                                   side_effect=requests.URLRequired()) \
+                    as mock_get:
+                self.assertRaises(requests.URLRequired, network.get, 'url')
+                self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(network.get_limiter().in_flight, 0)
+
+    def test_limiter_per_host(self):
+
+        limiter = network.get_limiter('https://pypi.org/pypi/a/json')
+        self.assertIs(network.get_limiter('https://PYPI.org/simple/a/'),
+                      limiter)
+        self.assertIsNot(network.get_limiter('https://mirror/pypi/a/json'),
+                         limiter)
+
+        # a slow host holds back its own requests only
+        response = mock.Mock(status_code=requests.codes.ok)
+        with mock.patch.object(requests.Session, 'get',
+                               return_value=response):
+            token = limiter.acquire()
+            network.get('https://mirror/pypi/a/json')
+            self.assertEqual(limiter.in_flight, 1)
+            limiter.release(token)
+        self.assertEqual(limiter.in_flight, 0)
+
+        # a forked worker gets limiters of its own
+        with mock.patch.object(os, 'getpid', return_value=-1):
+            self.assertIsNot(
+                network.get_limiter('https://pypi.org/pypi/a/json'), limiter)
+
+    def test_backoff(self):
+
+        for attempt in range(10):
+            backoff = network._backoff(attempt)
+            self.assertTrue(0 <= backoff <= min(
+                consts.BACKOFF_MAX, consts.BACKOFF_BASE * 2 ** attempt))
+        self.assertEqual(network._backoff(0, mock.Mock(
+            headers={consts.RETRY_AFTER_HEADER: '3'})), 3.0)
+        self.assertEqual(network._backoff(0, mock.Mock(
+            headers={consts.RETRY_AFTER_HEADER: '3600'})), consts.BACKOFF_MAX)
+        self.assertTrue(network._backoff(0, mock.Mock(headers={
+            consts.RETRY_AFTER_HEADER: 'Wed, 21 Oct 2015 07:28:00 GMT'}))
+            <= consts.BACKOFF_BASE)
+
+    def test_aimd_limiter(self):
+
+        limiter = network.AimdLimiter(initial=2, minimum=1, maximum=3)
+
+        # the limit grows while latency stays close to the best one
+        for _ in range(4):
+            limiter.release(limiter.acquire(), latency=1.0)
+        self.assertEqual(limiter.limit, 3)
+        limit = limiter.limit
+        limiter.release(limiter.acquire(), latency=0.5)
+        limiter.release(limiter.acquire(), latency=5.0)
+        self.assertEqual(limiter.limit, limit)
+
+        # failures of requests sent together cut the limit once
+        tokens = [limiter.acquire() for _ in range(3)]
+        self.assertEqual(limiter.in_flight, 3)
+        for token in tokens:
+            limiter.release(token, throttled=True)
+        self.assertEqual(limiter.limit, 1.5)
+        self.assertEqual(limiter.in_flight, 0)
+
+        for _ in range(3):
+            limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(limiter.limit, 1)
+
+    def test_latency_window(self):
+
+        window = network.LatencyWindow(size=100)
+        self.assertIsNone(window.percentile(95, min_samples=1))
+        for latency in range(200, 0, -1):
+            window.add(latency)
+        # only the last 100 latencies are kept
+        self.assertEqual(window.percentile(95), 96)
+        self.assertEqual(window.percentile(0), 1)
+        self.assertEqual(window.percentile(100), 100)
+        self.assertIsNone(window.percentile(95, min_samples=101))
+
+    def test_hedged_get(self):
+
+        session = mock.Mock()
+        slow = mock.Mock(name='slow')
+        fast = mock.Mock(name='fast')
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def get_slow_then_fast(url, **kwargs):
+            if session.get.call_count == 1:
+                release.wait(5)
+                return slow
+            return fast
+
+        session.get.side_effect = get_slow_then_fast
+        self.assertIs(network._hedged_get(session, 'url', 0.01, a='b'), fast)
+        session.get.assert_called_with('url', a='b')
+
+        # the late response is closed once it arrives
+        release.set()
+        for _ in range(100):
+            if slow.close.called:
+                break
+            time.sleep(0.01)
+        self.assertTrue(slow.close.called)
+
+        # fast requests are not duplicated
+        session = mock.Mock()
+        session.get.return_value = fast
+        self.assertIs(network._hedged_get(session, 'url', 5), fast)
+        self.assertEqual(session.get.call_count, 1)
+
+        # an error is raised only if both requests fail
+        session = mock.Mock()
+        session.get.side_effect = [requests.ConnectionError(), fast]
+        self.assertIs(network._hedged_get(session, 'url', 0), fast)
+        session = mock.Mock()
+        session.get.side_effect = [requests.ConnectionError(), fast]
+        self.assertIs(network._hedged_get(session, 'url', 5), fast)
+        session = mock.Mock()
+        session.get.side_effect = requests.ConnectionError()
+        self.assertRaises(requests.ConnectionError,
+                          network._hedged_get, session, 'url', 0)
+
+    def test_send(self):
+
+        self.addCleanup(network.configure)
+        network.get_session()
+        session = mock.Mock()
+
+        # no hedging until the typical latency is known
+        network.configure(hedge=True)
+        with mock.patch.object(network, '_hedged_get') as mock_hedged:
+            network._send(session, 'url')
+            self.assertFalse(mock_hedged.called)
+            for _ in range(consts.HEDGE_MIN_SAMPLES):
+                network._latencies.add(1.0)
+            network._send(session, 'url')
+            mock_hedged.assert_called_once_with(
+                session, 'url', 1.0,
+                timeout=(consts.CONNECT_TIMEOUT_DEFAULT,
+                         consts.READ_TIMEOUT_DEFAULT))
+
+            network.configure()
+            network._send(session, 'url')
+            self.assertEqual(mock_hedged.call_count, 1)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import json
+
+import testtools
+
+from deppy import consts
+from deppy import payloads
+
+
+class TestPayloads(testtools.TestCase):
+
+    def test_reduce_payload(self):
+
+        func = payloads.reduce_payload
+
+        document = {
+            consts.INFO_KEY: {
+                consts.NAME_KEY: 'package1',
+                consts.LICENSE_KEY: None,
+                consts.SUMMARY_KEY: 'a "summary" with {[brackets]}',
+                consts.HOMEPAGE_KEY: u'h\xe9me \\ page',
+                'description': 'long\n' * 100,
+                'classifiers': ['a', 'b'],
+                'downloads': {'last_day': -1, 'last_week': 2.5e3}
+            },
+            'last_serial': 1234,
+            consts.RELEASES_KEY: {
+                '1.0': [{'filename': 'package1-1.0]}.tar.gz', 'size': 10}],
+                '2.0rc1': [],
+                '3.0': [{'yanked': True, 'comment_text': '\\"'}]
+            },
+            'urls': [],
+            'vulnerabilities': []
+        }
+        expected = {
+            consts.INFO_KEY: {
+                consts.NAME_KEY: 'package1',
+                consts.LICENSE_KEY: None,
+                consts.SUMMARY_KEY: 'a "summary" with {[brackets]}',
+                consts.HOMEPAGE_KEY: u'h\xe9me \\ page'
+            },
+            consts.RELEASES_KEY: ['1.0', '2.0rc1', '3.0']
+        }
+        body = json.dumps(document, indent=2)
+
+        # any chunking of the document gives the same result
+        for size in [1, 2, 3, 7, 64, len(body)]:
+            result = func(body[i:i + size]
+                          for i in range(0, len(body), size))
+            result[consts.RELEASES_KEY].sort()
+            self.assertEqual(result, expected)
+
+        self.assertEqual(func(['{}']), {
+            consts.INFO_KEY: {}, consts.RELEASES_KEY: []})
+        self.assertEqual(func(['{"info": null, "releases": {}, "x": 1}']), {
+            consts.INFO_KEY: {}, consts.RELEASES_KEY: []})
+
+        for bad_body in ['', '<html></html>', '[1]', '{"info": {"name": "a"',
+                         '{"releases": {"1.0": [}}']:
+            self.assertRaises(ValueError, func, [bad_body])
+
+        # releases are filtered as they are read, given their files
+        seen = []
+
+        def keep(version, files):
+            seen.append((version, files))
+            return bool(files)
+
+        result = func([body], keep)
+        self.assertEqual(sorted(result[consts.RELEASES_KEY]), ['1.0', '3.0'])
+        self.assertIn(('2.0rc1', []), seen)
+        self.assertIn(('3.0', [{'yanked': True, 'comment_text': '\\"'}]),
+                      seen)
+
+    def test_reduce_simple_payload(self):
+
+        func = payloads.reduce_simple_payload
+
+        document = {
+            'meta': {'api-version': '1.1'},
+            consts.NAME_KEY: 'my-package',
+            consts.FILES_KEY: [
+                {consts.FILENAME_KEY: 'my_package-1.0-py2-none-any.whl',
+                 'hashes': {}},
+                {consts.FILENAME_KEY: 'my-package-1.0.tar.gz', 'hashes': {}},
+                {consts.FILENAME_KEY: 'My.Package-2.0b1.zip', 'hashes': {}},
+                {consts.FILENAME_KEY: 'my_package-3.0-py2.7.egg'},
+                {consts.FILENAME_KEY: 'other-4.0.tar.gz'},
+                {consts.FILENAME_KEY: 'my-package-5.0.exe'}
+            ]
+        }
+        body = json.dumps(document)
+        for size in [1, 5, len(body)]:
+            result = func((body[i:i + size]
+                           for i in range(0, len(body), size)), 'My_Package')
+            self.assertEqual(result, {
+                consts.INFO_KEY: {consts.NAME_KEY: 'my-package'},
+                consts.RELEASES_KEY: ['1.0', '2.0b1', '3.0']
+            })
+
+        # the versions field is preferred when present
+        document[consts.VERSIONS_KEY] = ['1.0', '2.0b1', '3.0', '6.0']
+        self.assertEqual(
+            func([json.dumps(document)], 'my-package')[consts.RELEASES_KEY],
+            ['1.0', '2.0b1', '3.0', '6.0'])
+
+        # releases are filtered given whether their files are yanked
+        document[consts.FILES_KEY][0][consts.YANKED_KEY] = 'broken'
+        seen = {}
+
+        def keep(version, files):
+            seen[version] = files
+            return version != '2.0b1'
+
+        self.assertEqual(
+            func([json.dumps(document)], 'my-package',
+                 keep)[consts.RELEASES_KEY],
+            ['1.0', '3.0', '6.0'])
+        self.assertEqual(seen, {
+            '1.0': [{consts.YANKED_KEY: 'broken'},
+                    {consts.YANKED_KEY: False}],
+            '2.0b1': [{consts.YANKED_KEY: False}],
+            '3.0': [{consts.YANKED_KEY: False}],
+            '6.0': []
+        })
+
+        self.assertEqual(func(['{}'], 'package1'), {
+            consts.INFO_KEY: {consts.NAME_KEY: 'package1'},
+            consts.RELEASES_KEY: []})
+        self.assertRaises(ValueError, func, ['<html></html>'], 'package1')
@@ -0,0 +1,90 @@
+import os
+import time
+import shutil
+import tempfile
+
+import mock
+import testtools
+
+from deppy import state
+from deppy import consts
+
+
+class TestState(testtools.TestCase):
+
+    def setUp(self):
+        super(TestState, self).setUp()
+        self.state_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.state_dir, 'state.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        super(TestState, self).tearDown()
+
+    def test_seekup_state(self):
+
+        seekup_state = state.SeekupState(self.state_path, 60)
+        self.assertEqual(seekup_state.packages, {})
+        self.assertIsNone(seekup_state.get('package1'))
+
+        seekup_state.update('Package_1', ['1.0', '2.0'], 'MIT',
+                            {'==1.0': ['2.0']})
+        seekup_state.update('package2', ['3.0'])
+        seekup_state.save()
+        # the state may be shared, as any new file
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(self.state_path).st_mode & 0o777,
+                         0o666 & ~umask)
+
+        seekup_state = state.SeekupState(self.state_path, 60)
+        entry = seekup_state.get('package-1')
+        self.assertEqual(entry[consts.STATE_VERSIONS_KEY], ['1.0', '2.0'])
+        self.assertEqual(entry[consts.STATE_LICENSE_KEY], 'MIT')
+        self.assertEqual(entry[consts.STATE_NEWER_KEY], {'==1.0': ['2.0']})
+        self.assertIsNotNone(seekup_state.get('Package.1', True))
+
+        # an entry without license is useless if a license is required
+        self.assertIsNotNone(seekup_state.get('package2'))
+        self.assertIsNone(seekup_state.get('package2', True))
+
+        # entries older than the freshness window are stale
+        with mock.patch.object(time, 'time',
+                               return_value=time.time() + 60):
+            self.assertIsNone(seekup_state.get('package-1'))
+
+    def test_seekup_state_settings(self):
+
+        seekup_state = state.SeekupState(self.state_path, 60, 'settings1')
+        seekup_state.update('package1', ['1.0', '2.0rc1'])
+        seekup_state.save()
+
+        # entries looked up with other settings are stale
+        self.assertIsNotNone(state.SeekupState(
+            self.state_path, 60, 'settings1').get('package1'))
+        self.assertIsNone(state.SeekupState(
+            self.state_path, 60, 'settings2').get('package1'))
+        self.assertIsNone(state.SeekupState(
+            self.state_path, 60).get('package1'))
+
+    def test_add_newer(self):
+
+        seekup_state = state.SeekupState(self.state_path, 60)
+        seekup_state.update('Package_1', ['1.0', '2.0'], newer={'==1.0': []})
+        # stale entries are updated all the same
+        with mock.patch.object(time, 'time',
+                               return_value=time.time() + 60):
+            seekup_state.add_newer('package-1', {'>=1.0': ['2.0']})
+            seekup_state.add_newer('package2', {'>=1.0': ['2.0']})
+        self.assertEqual(
+            seekup_state.packages['package-1'][consts.STATE_NEWER_KEY],
+            {'==1.0': [], '>=1.0': ['2.0']})
+        self.assertNotIn('package2', seekup_state.packages)
+
+    def test_seekup_state_broken_file(self):
+
+        for content in ['', 'not json', '[]', '{"packages": []}']:
+            with open(self.state_path, 'w') as state_file:
+                state_file.write(content)
+            self.assertEqual(
+                state.SeekupState(self.state_path).packages, {})
@@ -1,10 +1,20 @@
 
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+
 import mock
+import requests
 import testtools
 
 import tests_consts
 
+from deppy import batch
+from deppy import cache
 from deppy import consts
+from deppy import network
 from deppy import versions
 from helpers import cmp_elements
 
@@ -237,6 +247,47 @@ class TestVersions(testtools.TestCase):
         test(False, '1.4.2', '1.3.5', '==')
         test(True, '1.4.2', '1.3.5', '!=')
 
+    def test_version_key(self):
+
+        # versions out of the PEP 440 scheme first, then the order it gives
+        ordered = ['package2_3', 'package2_5', '0.9', '1.0.dev456', '1.0a1',
+                   '1.0a2.dev456', '1.0a12.dev456', '1.0a12', '1.0b1.dev456',
+                   '1.0b2',
+                   '1.0b2.post345.dev456', '1.0b2.post345', '1.0rc1.dev456',
+                   '1.0rc1', '1.0', '1.0+abc.5', '1.0+abc.7', '1.0+5',
+                   '1.0.post456.dev34', '1.0.post456', '1.0.15', '1.1.dev1',
+                   '1.2', '1.10', '2', '1!0.1']
+        keys = [versions.version_key(version) for version in ordered]
+        for key, next_key in zip(keys, keys[1:]):
+            self.assertTrue(key < next_key)
+        self.assertEqual(sorted(reversed(ordered), key=versions.version_key),
+                         ordered)
+
+        # the forms PEP 440 normalizes are equal
+        for version1, version2 in [
+                ('1.0', '1.0.0'), ('1', 'v1.0'), ('1.0RC1', '1.0rc1'),
+                ('1.0-c1', '1.0rc1'), ('1.0.alpha.1', '1.0a1'),
+                ('1.0-1', '1.0.post1'), ('1.0.r', '1.0.post0'),
+                ('1.0-dev', '1.0.dev0'), (' 0!1.0 ', '1.0')]:
+            self.assertEqual(versions.version_key(version1),
+                             versions.version_key(version2))
+        self.assertTrue(versions.version_key('1.0rc1') <
+                        versions.version_key('1.0'))
+        self.assertEqual(hash(versions.version_key('1.2')),
+                         hash(versions.version_key('1.2.0')))
+
+        # every version is parsed once, equal versions share their key
+        versions._version_keys.clear()
+        with mock.patch.object(versions, '_parse_key',
+                               wraps=versions._parse_key) as mock_parse:
+            versions.get_new_available(
+                {'package1': ['==1.0', '>=1.1', '']},
+                {'package1': ['0.9', '1.0', '1.1', '1.2']})
+            versions.compare('1.2', '1.1', '>')
+            self.assertEqual(mock_parse.call_count, 4)
+        self.assertIs(versions.version_key('1.2'),
+                      versions.version_key('1.2'))
+
     def test_split_require(self):
 
         def test(expected_result, *tested_func_args):
@@ -244,7 +295,7 @@ class TestVersions(testtools.TestCase):
                                expected_result, *tested_func_args)
 
         ver_str = '7.5'
-        for op in versions.OPERATORS:
+        for op in versions.SPECIFIER_OPERATORS:
             expected = (ver_str, op)
             func_args = [op + ver_str]
             test(expected, *func_args)
@@ -252,6 +303,59 @@ class TestVersions(testtools.TestCase):
         func_args = [ver_str]
         test(expected, *func_args)
 
+    def test_parse_requirement(self):
+
+        def test(requirement, expected, named=True):
+            self.assertEqual(
+                tuple(versions.parse_requirement(requirement, named)),
+                expected)
+
+        test('requests', ('requests', (), '', '', '', ()))
+        # whitespace around the operators and versions is left out
+        test(' requests >= 2.0 , <3 ',
+             ('requests', (), '>=2.0,<3', '2.0,<3', '>=',
+              (('2.0', '>='), ('3', '<'))))
+        test('foo >= 1.0, < 2',
+             ('foo', (), '>=1.0,<2', '1.0,<2', '>=',
+              (('1.0', '>='), ('2', '<'))))
+        test('foo (== 1.0 )', ('foo', (), '==1.0', '1.0', '==',
+                               (('1.0', '=='),)))
+        test('requests[security, socks]~=2.9;python_version<"3"',
+             ('requests', ('security', 'socks'), '~=2.9', '2.9', '~=',
+              (('2.9', '~='),)))
+        test('pipdeptree (===0.6.0)',
+             ('pipdeptree', (), '===0.6.0', '0.6.0', '===',
+              (('0.6.0', '==='),)))
+        # urls and direct references name packages, with no specifier
+        test('git+https://host/x.git@v1#egg=b',
+             ('b', (), '', '', '', ()))
+        test('https://host/x.tar.gz#sha256=0&egg=b_c',
+             ('b_c', (), '', '', '', ()))
+        test('https://host/x-1.0.tar.gz',
+             ('https://host/x-1.0.tar.gz', (), '', '', '', ()))
+        test('foo[bar] @ https://host/foo-1.0.zip ; python_version<"3"',
+             ('foo', ('bar',), '', '', '', ()))
+        test('foo@git+https://host/foo.git@v1.0',
+             ('foo', (), '', '', '', ()))
+        test('2.0', ('', (), '2.0', '2.0', '', (('2.0', ''),)), False)
+        test('!=1.5,>1', ('', (), '!=1.5,>1', '1.5,>1', '!=',
+                          (('1.5', '!='), ('1', '>'))), False)
+        test('', ('', (), '', '', '', ()), False)
+        test(' >= 1.0, < 2 ', ('', (), '>=1.0,<2', '1.0,<2', '>=',
+                               (('1.0', '>='), ('2', '<'))), False)
+
+        # every distinct string is parsed once, whoever asks for it
+        versions._requirements.clear()
+        with mock.patch.object(versions, '_parse_requirement',
+                               wraps=versions._parse_requirement) as parse:
+            for _ in range(3):
+                versions.split_require('>=7.1,<8')
+                versions.parse_requirement('package>=7.1,<8')
+                versions.specifier_set('>=7.1,<8')
+            self.assertEqual(parse.call_count, 2)
+        self.assertIs(versions.parse_requirement('package>=7.1,<8'),
+                      versions.parse_requirement('package>=7.1,<8'))
+
     def test_filter_newer(self):
 
         def test(expected_result, *tested_func_args):
@@ -317,6 +421,123 @@ class TestVersions(testtools.TestCase):
         func_args = [['1', '2', '3'], '2']
         test(expected, *func_args)
 
+    def test_sorted_versions(self):
+
+        sorted_versions = versions.SortedVersions(
+            ['1.10', '1.2', '2.0', '0.9', '1.2.1', '1.2'])
+        self.assertEqual(sorted_versions.versions,
+                         ['0.9', '1.2', '1.2', '1.2.1', '1.10', '2.0'])
+        self.assertEqual(sorted_versions.latest(), '2.0')
+        self.assertIsNone(versions.SortedVersions([]).latest())
+
+        self.assertEqual(sorted_versions.newer('1.2'),
+                         ['1.2.1', '1.10', '2.0'])
+        self.assertEqual(sorted_versions.newer('3'), [])
+        self.assertEqual(sorted_versions.newer('0'),
+                         sorted_versions.versions)
+
+        def test(expected, require):
+            self.assertEqual(sorted_versions.select(require), expected)
+
+        test(['1.2', '1.2', '1.2.1', '1.10'], '>=1.2,<2.0')
+        test(['1.2.1', '1.10'], '>1.2, <=1.10')
+        test(['1.2', '1.2'], '==1.2')
+        test(['1.2', '1.2'], '1.2')
+        test(['0.9', '1.2.1', '2.0'], '!=1.2,!=1.10')
+        test(['1.2.1', '1.10'], '>=1.2,!=1.2,<2')
+        test([], '>2.0')
+        test([], '>1.10,<1.2')
+        test(sorted_versions.versions, '')
+
+        # newer versions come back in version order
+        self.assertEqual(versions._filter_newer(['3', '1.2', '2'], '1'),
+                         ['1.2', '2', '3'])
+        self.assertEqual(versions._filter_newer(sorted_versions, '1.2.1'),
+                         ['1.10', '2.0'])
+
+    def test_specifier_set(self):
+
+        def test(require, allowed, not_allowed):
+            specifier = versions.specifier_set(require)
+            for version in allowed:
+                self.assertTrue(specifier.contains(version),
+                                '{0} {1}'.format(version, require))
+            for version in not_allowed:
+                self.assertFalse(specifier.contains(version),
+                                 '{0} {1}'.format(version, require))
+
+        test('>=1.0,<2.0,!=1.5', ['1.0', '1.4', '1.6', '1.9.9'],
+             ['0.9', '1.5', '1.5.0', '2.0', '2.0.1'])
+        test('==1.1.*', ['1.1', '1.1.0', '1.1.9', '1.1a1', '1.1.post1'],
+             ['1.0', '1.2', '1.10', '1.2.dev1'])
+        test('!=1.1.*', ['1.0', '1.2'], ['1.1', '1.1.5'])
+        test('~=1.4.5', ['1.4.5', '1.4.6', '1.4.10'], ['1.4.4', '1.5'])
+        test('~=2.2', ['2.2', '2.3', '2.10'], ['2.1', '3.0', '3.0.dev1'])
+        test('===1.0-Foo', ['1.0-foo'], ['1.0', '1.0-bar'])
+        test('==1.0', ['1.0', '1.0.0', '1.0+local'], ['1.0.1', '1.0rc1'])
+        test('==1.0+local', ['1.0+local'], ['1.0', '1.0+other'])
+        test('<1.0', ['0.9', '0.9rc1', 'package_1'],
+             ['1.0rc1', '1.0.dev1', '1.0'])
+        test('<1.0rc2', ['1.0rc1', '0.9'], ['1.0rc2', '1.0'])
+        test('>1.0', ['1.0.1', '2.0rc1'], ['1.0', '1.0.post1', '1.0+local'])
+        test('>1.0.post1', ['1.0.post2', '1.1'], ['1.0.post1'])
+        # only the pre-releases of V itself are not below it, and only the
+        # post-releases of V itself not above it
+        test('<1.0.post1', ['1.0', '1.0rc1', '1.0.post0.dev0'],
+             ['1.0.post1.dev0', '1.0.post1'])
+        test('<1.0.post2', ['1.0.post1', '1.0'], ['1.0.post2.dev0'])
+        test('>1.0a1', ['1.0.post1', '1.0', '1.0a2'],
+             ['1.0a1.post1', '1.0a1.post2.dev0'])
+        test('>1.0.dev0', ['1.0.post1', '1.0', '1.0a1', '1.0.dev1'],
+             ['1.0.dev0'])
+        test('>1.0a1.dev0', ['1.0a1.post1', '1.0a1'], ['1.0a1.dev0'])
+        test('>1.0', ['1.1'], ['1.0.post1.dev0', '1.0.post1'])
+        test('<=1.0', ['1.0', '1.0+local', '0.1'], ['1.0.post1'])
+        test('>=1.0', ['1.0'], ['1.0rc1', 'package_1'])
+        test(' >= 1.0 , < 1.1 ', ['1.0.5'], ['1.1'])
+        test('', ['0.1', 'package_1'], [])
+
+        # every distinct requirement is compiled once
+        self.assertIs(versions.specifier_set('>=1.0,<2.0,!=1.5'),
+                      versions.specifier_set('>=1.0,<2.0,!=1.5'))
+
+        sorted_versions = versions.SortedVersions(
+            ['2.0', '1.0', '1.5', '1.1rc1', '1.1', '0.9', '1.1.post1'])
+        specifier = versions.specifier_set('>=1.0,!=1.5,<2.0')
+        self.assertEqual(specifier.select(sorted_versions),
+                         ['1.0', '1.1rc1', '1.1', '1.1.post1'])
+        self.assertEqual(specifier.select(sorted_versions, '1.1'),
+                         ['1.1.post1'])
+        self.assertEqual(versions.specifier_set('>1.1').select(
+            sorted_versions), ['1.5', '2.0'])
+        self.assertEqual(specifier.latest(sorted_versions), '1.1.post1')
+        self.assertEqual(versions.specifier_set('!=2.0').latest(
+            sorted_versions), '1.5')
+        self.assertIsNone(versions.specifier_set('>2.0').latest(
+            sorted_versions))
+
+        self.assertEqual(specifier.baseline, '1.0')
+        self.assertEqual(versions.specifier_set('<2.0,<=1.5').baseline,
+                         '2.0')
+        self.assertEqual(versions.specifier_set('==1.1.*').baseline, '1.1')
+        self.assertEqual(versions.specifier_set('!=1.1').baseline, '1.1')
+        self.assertEqual(
+            versions.specifier_set('!=1.5,!=1.1.*,<3').baseline, '1.5')
+
+    def test_not_equal_only(self):
+
+        # a requirement of != clauses only starts from the latest of them
+        all_versions = {'p': ['1.0', '1.5', '2.0']}
+        for my_versions, newer in [({'p': ['!=1.5']}, ['2.0']),
+                                   ({'p': ['!=1.0,!=1.5']}, ['2.0']),
+                                   ({'p': ['!=2.0']}, [])]:
+            for func in (versions.get_new_available,
+                         batch.get_new_available,
+                         versions.get_latest_available):
+                self.assertEqual(
+                    func(my_versions, all_versions)[0][consts.NEW_VERS_KEY],
+                    newer)
+
     def test_get_new_available(self):
 
         def test(expected_result, *tested_func_args):
@@ -424,6 +645,401 @@ class TestVersions(testtools.TestCase):
         func_args = [{}, {}]
         test(expected, *func_args)
 
+        # newer versions already found are not searched again
+        expected = [{
+            consts.PACKAGE_KEY: 'a',
+            consts.REQUIRE_KEY: '2',
+            consts.NEW_VERS_KEY: ['known']
+        }, {
+            consts.PACKAGE_KEY: 'a',
+            consts.REQUIRE_KEY: '1',
+            consts.NEW_VERS_KEY: ['3']
+        }]
+        func_args = [{'a': ['2', '1']}, {'a': ['1', '3']},
+                     {('a', '2'): ['known'], ('b', '1'): ['other']}]
+        test(expected, *func_args)
+
+        # newer than the version a requirement of several clauses starts
+        # from, or only those it still allows
+        all_versions = {'a': ['1.0', '1.5', '2.0', '2.1']}
+        self.assertEqual(versions.get_new_available(
+            {'a': ['>=1.0,<2.0', '==1.5']}, all_versions), [{
+                consts.PACKAGE_KEY: 'a',
+                consts.REQUIRE_KEY: '>=1.0,<2.0',
+                consts.NEW_VERS_KEY: ['1.5', '2.0', '2.1']
+            }, {
+                consts.PACKAGE_KEY: 'a',
+                consts.REQUIRE_KEY: '==1.5',
+                consts.NEW_VERS_KEY: ['2.0', '2.1']
+            }])
+        self.assertEqual(versions.get_new_available(
+            {'a': ['>=1.0,<2.0', '==1.5']}, all_versions,
+            {('a', '==1.5'): ['known']}, True), [{
+                consts.PACKAGE_KEY: 'a',
+                consts.REQUIRE_KEY: '>=1.0,<2.0',
+                consts.NEW_VERS_KEY: ['1.5']
+            }, {
+                consts.PACKAGE_KEY: 'a',
+                consts.REQUIRE_KEY: '==1.5',
+                consts.NEW_VERS_KEY: []
+            }])
+
+    def test_get_latest_available(self):
+
+        all_versions = {'a': ['1.5', '2.1', '1.0', '2.0', '1.9rc1'], 'b': []}
+        my_versions = {'a': ['>=1.0,<2.0', '==2.1', '', '~=1.5'], 'b': ['1']}
+
+        def test(compatible, *expected):
+            self.assertEqual(
+                versions.get_latest_available(
+                    my_versions, all_versions, compatible),
+                [{
+                    consts.PACKAGE_KEY: package,
+                    consts.REQUIRE_KEY: require,
+                    consts.NEW_VERS_KEY: newer
+                } for package, require, newer in expected])
+
+        test(False,
+             ('a', '>=1.0,<2.0', ['2.1']), ('a', '==2.1', []),
+             ('a', '', ['2.1']), ('a', '~=1.5', ['2.1']), ('b', '1', []))
+        test(True,
+             ('a', '>=1.0,<2.0', ['1.9rc1']), ('a', '==2.1', []),
+             ('a', '', ['2.1']), ('a', '~=1.5', ['1.9rc1']), ('b', '1', []))
+        # the latest of the newer versions get_new_available finds
+        self.assertEqual(
+            [result[consts.NEW_VERS_KEY][-1:] for result in
+             versions.get_new_available(my_versions, all_versions)],
+            [result[consts.NEW_VERS_KEY] for result in
+             versions.get_latest_available(my_versions, all_versions)])
+
+    def test_mixed_schemes(self):
+
+        # an old version out of the PEP 440 scheme is no upgrade
+        self.assertTrue(versions.compare('2004d', '2023.3', '<'))
+        self.assertTrue(versions.compare('2004e', '2004d', '>'))
+        all_versions = {'pytz': ['2004d', '2023.3', '2024.1']}
+        my_versions = {'pytz': ['==2023.3']}
+        self.assertEqual(
+            versions._filter_newer(
+                versions.SortedVersions(all_versions['pytz']), '2023.3'),
+            ['2024.1'])
+        for func in (versions.get_new_available,
+                     versions.get_latest_available):
+            self.assertEqual(
+                func(my_versions, all_versions)[0][consts.NEW_VERS_KEY],
+                ['2024.1'])
+        self.assertEqual(
+            versions.get_latest_available({'pytz': ['']}, all_versions)[0][
+                consts.NEW_VERS_KEY], ['2024.1'])
+
+    def test_get_json_record(self):
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        self.addCleanup(versions.configure)
+        package_name = tests_consts.PYPI_PACKAGE_NAME
+
+        body = '{"info": {"name": "pip", "license": "MIT", ' \
+               '"description": "long"}, "releases": {"1.0": []}}'
+        record = {
+            consts.INFO_KEY: {
+                consts.NAME_KEY: 'pip',
+                consts.LICENSE_KEY: 'MIT'
+            },
+            consts.RELEASES_KEY: ['1.0']
+        }
+
+        def ok_response(*_, **__):
+            return mock.Mock(
+                status_code=requests.codes.ok,
+                iter_content=lambda chunk_size: iter([body[:20], body[20:]]),
+                headers={consts.ETAG_HEADER: 'etag1'})
+
+        not_modified_response = mock.Mock(
+            status_code=requests.codes.not_modified, headers={})
+
+        # no cache - the response is reduced as is
+        versions.configure()
+        with mock.patch.object(network, 'get',
+                               side_effect=ok_response) as mock_get:
+            self.assertEqual(versions._get_json_record(package_name), record)
+            self.assertEqual(mock_get.call_count, 1)
+
+        # first request fills the cache
+        versions.configure(cache_dir=cache_dir)
+        with mock.patch.object(network, 'get',
+                               side_effect=ok_response) as mock_get:
+            self.assertEqual(versions._get_json_record(package_name), record)
+            self.assertEqual(mock_get.call_args[1]['headers'], {})
+
+        # stale entry is revalidated, and reused on 304
+        with mock.patch.object(network, 'get',
+                               return_value=not_modified_response) \
+                as mock_get:
+            self.assertEqual(versions._get_json_record(package_name), record)
+            self.assertEqual(mock_get.call_args[1]['headers'],
+                             {consts.IF_NONE_MATCH_HEADER: 'etag1'})
+
+        # fresh entry is used without any request
+        versions.configure(cache_dir=cache_dir, cache_ttl=60)
+        with mock.patch.object(network, 'get') as mock_get:
+            self.assertEqual(versions._get_json_record(package_name), record)
+            self.assertFalse(mock_get.called)
+
+        # the entry is kept per index
+        versions.configure(cache_dir=cache_dir, cache_ttl=60,
+                           indexes=['https://index/pypi'])
+        with mock.patch.object(network, 'get',
+                               side_effect=ok_response) as mock_get:
+            self.assertEqual(versions._get_json_record(package_name), record)
+            self.assertEqual(mock_get.call_args[0][0],
+                             'https://index/pypi/pip/json')
+
+        # the lookups are counted with the cache once it is replaced
+        versions.configure()
+        stats = cache.SqliteCache(cache_dir).stats()
+        self.assertEqual(stats[consts.CACHE_HITS_KEY], 1)
+        self.assertEqual(stats[consts.CACHE_REVALIDATED_KEY], 1)
+        self.assertEqual(stats[consts.CACHE_MISSES_KEY], 2)
+
+    def test_exclude_releases(self):
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        self.addCleanup(versions.configure)
+        yanked = {consts.YANKED_KEY: True}
+        present = {consts.YANKED_KEY: False}
+        body = json.dumps({
+            consts.INFO_KEY: {consts.NAME_KEY: 'pip'},
+            consts.RELEASES_KEY: {
+                '1.0': [present],
+                '1.1': [yanked, present],
+                '1.2': [yanked],
+                '1.3': [],
+                '2.0rc1': [present],
+                '2.0.dev1': [present],
+                'build_2': [present]
+            }
+        })
+
+        def ok_response(*_, **__):
+            return mock.Mock(
+                status_code=requests.codes.ok,
+                iter_content=lambda chunk_size: iter([body]),
+                headers={})
+
+        # runs of other excluded releases tell their settings apart
+        versions.configure()
+        settings = versions.settings_key()
+        versions.configure(exclude=[consts.EXCLUDE_PRE_STR])
+        self.assertNotEqual(versions.settings_key(), settings)
+        versions.configure(source=consts.SOURCE_SIMPLE_STR)
+        self.assertNotEqual(versions.settings_key(), settings)
+
+        def test(expected, exclude):
+            versions.configure(cache_dir=cache_dir, cache_ttl=60,
+                               exclude=exclude)
+            with mock.patch.object(network, 'get',
+                                   side_effect=ok_response) as mock_get:
+                for _ in range(2):
+                    self.assertEqual(sorted(versions._get_json_record(
+                        tests_consts.PYPI_PACKAGE_NAME)[consts.RELEASES_KEY]),
+                        expected)
+                # the releases kept are cached per kinds excluded
+                self.assertEqual(mock_get.call_count, 1)
+
+        test(['1.0', '1.1', '1.2', '1.3', '2.0.dev1', '2.0rc1', 'build_2'],
+             [])
+        test(['1.0', '1.1', '1.2', '1.3', 'build_2'],
+             [consts.EXCLUDE_PRE_STR])
+        test(['1.0', '1.1', '1.3', '2.0.dev1', '2.0rc1', 'build_2'],
+             [consts.EXCLUDE_YANKED_STR])
+        test(['1.0', '1.1', 'build_2'],
+             [consts.EXCLUDE_FILELESS_STR, consts.EXCLUDE_YANKED_STR,
+              consts.EXCLUDE_PRE_STR])
+
+        # as are the pages kept by this process
+        versions.configure()
+        key = versions._memo_key(consts.SOURCE_JSON_STR, 'pip')
+        versions.configure(exclude=[consts.EXCLUDE_PRE_STR])
+        self.assertNotEqual(
+            versions._memo_key(consts.SOURCE_JSON_STR, 'pip'), key)
+
+    def test_get_json_record_indexes(self):
+
+        self.addCleanup(versions.configure)
+        records = {
+            'a': {consts.INFO_KEY: {consts.NAME_KEY: 'a'},
+                  consts.RELEASES_KEY: ['1.0', '2.0']},
+            'b': {consts.INFO_KEY: {consts.NAME_KEY: 'b'},
+                  consts.RELEASES_KEY: ['2.0', '3.0']}
+        }
+
+        def get_index_record(index, package_name):
+            if index not in records:
+                raise requests.HTTPError(response=mock.Mock(
+                    status_code=requests.codes.not_found))
+            return records[index]
+
+        def test(expected, indexes, policy):
+            versions.configure(indexes=indexes, index_policy=policy)
+            self.assertEqual(versions._get_json_record('package1'), expected)
+
+        with mock.patch.object(versions, '_get_index_record',
+                               side_effect=get_index_record):
+            first = consts.INDEX_POLICY_FIRST_STR
+            test(records['a'], ['missing', 'a', 'b'], first)
+            test(records['b'], ['b', 'a'], first)
+            test(None, ['missing', 'other'], first)
+
+            merge = consts.INDEX_POLICY_MERGE_STR
+            test({consts.INFO_KEY: {consts.NAME_KEY: 'b'},
+                  consts.RELEASES_KEY: ['2.0', '3.0', '1.0']},
+                 ['missing', 'b', 'a'], merge)
+            test(records['a'], ['a', 'missing'], merge)
+            test(None, ['missing', 'other'], merge)
+
+    def test_index_url(self):
+
+        func = versions._index_url
+        self.assertEqual(func('https://index/pypi/', 'a'),
+                         'https://index/pypi/a/json')
+        self.assertEqual(func(consts.PYPI_URL, 'a'),
+                         consts.PYPI_URL.format('a'))
+
+    def test_get_simple_record(self):
+
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir, ignore_errors=True)
+        self.addCleanup(versions.configure)
+        self.addCleanup(versions.clear_memo)
+        versions.clear_memo()
+        os.mkdir(os.path.join(index_dir, 'package-name'))
+        with open(os.path.join(index_dir, 'package-name',
+                               consts.SIMPLE_JSON_INDEX_FILE), 'w') as f:
+            f.write('{"name": "package-name", "files": '
+                    '[{"filename": "package_name-1.0.tar.gz"}]}')
+        record = {
+            consts.INFO_KEY: {consts.NAME_KEY: 'package-name'},
+            consts.RELEASES_KEY: ['1.0']
+        }
+
+        # local directory, by path and by file url
+        for index in [index_dir, consts.FILE_URL_PREFIX + index_dir]:
+            versions.configure(source=consts.SOURCE_SIMPLE_STR,
+                               simple_index=index, info_required=False)
+            self.assertEqual(
+                versions.get_package_data_from_pypi('Package_Name'), record)
+            self.assertIsNone(versions.get_package_data_from_pypi('other'))
+
+        # json pages are read whenever info is required
+        versions.configure(source=consts.SOURCE_SIMPLE_STR,
+                           simple_index=index_dir)
+        mock_json = mock.Mock(return_value='json')
+        with mock.patch.dict(versions.SOURCES,
+                             {consts.SOURCE_JSON_STR: mock_json}):
+            self.assertEqual(
+                versions.get_package_data_from_pypi('Package_Name'), 'json')
+            mock_json.assert_called_once_with('Package_Name')
+
+        # remote index, asking for the json form
+        versions.configure(source=consts.SOURCE_SIMPLE_STR,
+                           simple_index='https://index/simple',
+                           info_required=False)
+        response = mock.Mock(
+            status_code=requests.codes.ok, headers={},
+            iter_content=lambda chunk_size: iter(['{"versions": ["1.0"]}']))
+        with mock.patch.object(network, 'get',
+                               return_value=response) as mock_get:
+            self.assertEqual(
+                versions.get_package_data_from_pypi('Package_Name'), {
+                    consts.INFO_KEY: {consts.NAME_KEY: 'Package_Name'},
+                    consts.RELEASES_KEY: ['1.0']
+                })
+            mock_get.assert_called_once_with(
+                'https://index/simple/package-name/',
+                headers={consts.ACCEPT_HEADER:
+                         consts.SIMPLE_JSON_CONTENT_TYPE},
+                stream=True)
+
+    def test_get_mirror_record(self):
+
+        mirror_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, mirror_dir, ignore_errors=True)
+        self.addCleanup(versions.configure)
+        self.addCleanup(versions.clear_memo)
+        versions.clear_memo()
+        web_dir = os.path.join(mirror_dir, consts.MIRROR_WEB_DIR)
+        json_dir = os.path.join(web_dir, consts.MIRROR_JSON_DIR)
+        simple_dir = os.path.join(web_dir, consts.MIRROR_SIMPLE_DIR, 'pkg-a')
+        os.makedirs(json_dir)
+        os.makedirs(simple_dir)
+        with open(os.path.join(json_dir, 'Pkg_A'), 'w') as f:
+            f.write('{"info": {"name": "Pkg_A", "license": "MIT"}, '
+                    '"releases": {"1.0": [], "2.0": []}}')
+        with open(os.path.join(simple_dir,
+                               consts.SIMPLE_JSON_INDEX_FILE), 'w') as f:
+            f.write('{"name": "pkg-a", "versions": ["1.0", "2.0"]}')
+
+        json_record = {
+            consts.INFO_KEY: {consts.NAME_KEY: 'Pkg_A',
+                              consts.LICENSE_KEY: 'MIT'},
+            consts.RELEASES_KEY: ['1.0', '2.0']
+        }
+        simple_record = {
+            consts.INFO_KEY: {consts.NAME_KEY: 'pkg-a'},
+            consts.RELEASES_KEY: ['1.0', '2.0']
+        }
+
+        for mirror in [mirror_dir, consts.FILE_URL_PREFIX + mirror_dir]:
+            versions.clear_memo()
+            versions.configure(source=consts.SOURCE_MIRROR_STR,
+                               mirror=mirror)
+            result = versions.get_package_data_from_pypi('Pkg_A')
+            result[consts.RELEASES_KEY].sort()
+            self.assertEqual(result, json_record)
+            self.assertIsNone(versions.get_package_data_from_pypi('other'))
+
+            # the simple index is enough when no info is required
+            versions.configure(source=consts.SOURCE_MIRROR_STR,
+                               mirror=mirror, info_required=False)
+            self.assertEqual(
+                versions.get_package_data_from_pypi('Pkg_A'), simple_record)
+
+        # json pages saved under the normalized name are found as well
+        os.rename(os.path.join(json_dir, 'Pkg_A'),
+                  os.path.join(json_dir, 'pkg-a'))
+        versions.clear_memo()
+        versions.configure(source=consts.SOURCE_MIRROR_STR, mirror=mirror_dir)
+        self.assertEqual(
+            versions.get_package_data_from_pypi('Pkg_A')[consts.INFO_KEY],
+            json_record[consts.INFO_KEY])
+
+    def test_memo_stats(self):
+
+        self.addCleanup(versions.clear_memo)
+        versions.clear_memo()
+        record = {consts.INFO_KEY: {}, consts.RELEASES_KEY: ['1.0']}
+        mock_json = mock.Mock(side_effect=[record, None, None])
+        with mock.patch.dict(versions.SOURCES,
+                             {consts.SOURCE_JSON_STR: mock_json}):
+            # names differing only by case and separators share an entry
+            for name in ['Package_Name', 'package-name', 'package.name']:
+                self.assertEqual(
+                    versions.get_package_data_from_pypi(name), record)
+            self.assertEqual(mock_json.call_count, 1)
+
+            # failures are not kept
+            for _ in range(2):
+                self.assertIsNone(
+                    versions.get_package_data_from_pypi('other'))
+            self.assertEqual(mock_json.call_count, 3)
+
+        stats = versions.memo_stats()
+        self.assertEqual(stats[consts.MEMO_HITS_KEY], 2)
+        self.assertEqual(stats[consts.MEMO_MISSES_KEY], 3)
+        self.assertEqual(stats[consts.MEMO_SIZE_KEY], 1)
+
     def test_get_package_data_from_pypi(self):
 
         tested_func = versions.get_package_data_from_pypi
@@ -442,6 +1058,50 @@ class TestVersions(testtools.TestCase):
             package_name.lower()
         )
 
+    def test_lookup_failures(self):
+
+        self.addCleanup(versions.configure)
+        versions.configure()
+        versions.clear_memo()
+        package_name = tests_consts.DUMMY_PACKAGE_NAME
+
+        def response(status_code):
+            error = requests.HTTPError(
+                response=mock.Mock(status_code=status_code))
+            return mock.Mock(status_code=status_code,
+                             raise_for_status=mock.Mock(side_effect=error))
+
+        def test(warned, **get_kwargs):
+            with mock.patch.object(network, 'get', **get_kwargs), \
+                    mock.patch.object(versions, '_logger') as logger:
+                self.assertIsNone(
+                    versions.get_package_data_from_pypi(package_name))
+            self.assertEqual(logger.warning.called, warned)
+
+        # a missing package is no failure
+        test(False, return_value=response(requests.codes.not_found))
+        # failures left once retries are exhausted are logged
+        test(True, return_value=response(requests.codes.too_many_requests))
+        test(True, side_effect=requests.ConnectionError())
+        # as are failures of the cache
+        test(True, side_effect=sqlite3.OperationalError('database locked'))
+        test(True, side_effect=OSError(13, 'Permission denied'))
+        test(True, return_value=mock.Mock(
+            status_code=requests.codes.ok, raise_for_status=lambda: None,
+            iter_content=lambda chunk_size: iter(['not json'])))
+        with mock.patch.object(network, 'get',
+                               side_effect=KeyboardInterrupt):
+            self.assertRaises(KeyboardInterrupt,
+                              versions.get_package_data_from_pypi,
+                              package_name)
+
+        # with several indexes, a package not found is only missing if no
+        # index failed
+        versions.configure(indexes=['https://a', 'https://b'])
+        test(False, return_value=response(requests.codes.not_found))
+        test(True, side_effect=[response(requests.codes.not_found),
+                                requests.ConnectionError()])
+
     def test_get_from_pypi(self):
 
         tested_func = versions.get_from_pypi